@@ -7,21 +7,30 @@ from .multirecordingchannelextractor import concatenate_recordings_by_channel, M
 from .multirecordingtimeextractor import concatenate_recordings_by_time, MultiRecordingTimeExtractor
 from .multisortingextractor import concatenate_sortings, MultiSortingExtractor
 
-from .extractorlist import *
+from . import extractorlist
 
 from . import example_datasets
 from .extraction_tools import load_probe_file, save_to_probe_file, read_binary, write_to_binary_dat_format,\
     write_to_h5_dataset_format, get_sub_extractors_by_property, load_extractor_from_json, load_extractor_from_dict, \
     load_extractor_from_pickle
 
-from distutils.version import StrictVersion
+from .version import version as __version__
 
-try:
-    import h5py
-    if StrictVersion(h5py.__version__) > '2.10.0':
-        print("h5py version > 2.10.0. Some extractors might not work properly. It is recommended to "
-              "downgrade to version 2.10.0: \n>>> pip install h5py==2.10.0")
-except ImportError:
-    pass
+__all__ = ['RecordingExtractor', 'SortingExtractor', 'CacheRecordingExtractor', 'CacheSortingExtractor',
+           'SubSortingExtractor', 'SubRecordingExtractor', 'concatenate_recordings_by_channel',
+           'MultiRecordingChannelExtractor', 'concatenate_recordings_by_time', 'MultiRecordingTimeExtractor',
+           'concatenate_sortings', 'MultiSortingExtractor', 'example_datasets', 'load_probe_file',
+           'save_to_probe_file', 'read_binary', 'write_to_binary_dat_format', 'write_to_h5_dataset_format',
+           'get_sub_extractors_by_property', 'load_extractor_from_json', 'load_extractor_from_dict',
+           'load_extractor_from_pickle'] + extractorlist.__all__
 
-from .version import version as __version__
+
+def __getattr__(name):
+    # extractor classes and lists are resolved lazily by the extractor registry
+    if name in extractorlist.__all__:
+        return getattr(extractorlist, name)
+    raise AttributeError("module " + repr(__name__) + " has no attribute " + repr(name))
+
+
+def __dir__():
+    return sorted(set(globals().keys()) | set(extractorlist.__all__))
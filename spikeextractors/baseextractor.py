@@ -7,8 +7,26 @@ from copy import deepcopy
 import tempfile
 import pickle
 import shutil
+import os
+import weakref
+from collections import OrderedDict
 
 from .exceptions import NotDumpableExtractorError
+from .propertytable import PropertyTable
+
+# out-of-band buffers need pickle protocol 5 (python >= 3.8, or the pickle5 backport)
+if pickle.HIGHEST_PROTOCOL >= 5:
+    pickle5 = pickle
+    HAVE_PICKLE5 = True
+else:
+    try:
+        import pickle5
+        HAVE_PICKLE5 = True
+    except ImportError:
+        HAVE_PICKLE5 = False
+
+# alignment (in bytes) of the out-of-band buffers in the buffers file
+_BUFFER_ALIGNMENT = 64
 
 
 class BaseExtractor:
@@ -22,7 +40,7 @@ class BaseExtractor:
         self._kwargs = {}
         self._tmp_folder = None
         self._key_properties = {}
-        self._properties = {}
+        self._properties = PropertyTable()
         self._annotations = {}
         self._memmap_files = []
         self._features = {}
@@ -168,10 +186,10 @@ class BaseExtractor:
                 encoding='utf8'
             )
 
-    def dump_to_pickle(self, file_path=None, include_properties=True, include_features=True):
+    def dump_to_pickle(self, file_path=None, include_properties=True, include_features=True, out_of_band=False):
         """
         Dumps recording extractor to a pickle file.
-        The extractor can be re-loaded with spikeextractors.load_extractor_from_json(json_file)
+        The extractor can be re-loaded with spikeextractors.load_extractor_from_pickle(pkl_file)
 
         Parameters
         ----------
@@ -181,19 +199,40 @@ class BaseExtractor:
             If True, all properties are dumped
         include_features: bool
             If True, all features are dumped
+        out_of_band: bool
+            If True, the numpy arrays (e.g. kwargs, properties, and features) are not embedded in the pickle file,
+            but saved in a '<file_name>_buffers.bin' file next to it (pickle protocol 5, requires python >= 3.8 or
+            the pickle5 package). When loading, the arrays are memory-mapped (copy-on-write) instead of read in memory
         """
         file_path = self._get_file_path(file_path, ['.pkl', '.pickle'])
 
         # Dump all
         dump_dict = {'serialized_dict': self.make_serialized_dict()}
         if include_properties:
-            if len(self._properties.keys()) > 0:
-                dump_dict['properties'] = self._properties
+            if len(self._properties) > 0:
+                dump_dict['properties'] = self._properties.to_dict()
         if include_features:
             if len(self._features.keys()) > 0:
                 dump_dict['features'] = self._features
         # include times
-        dump_dict["times"] = self._times
+        dump_dict["times"] = self._get_times()
+
+        if out_of_band:
+            if not HAVE_PICKLE5:
+                raise ImportError("Dumping with 'out_of_band=True' requires python >= 3.8 or the pickle5 package: "
+                                  ">>> pip install pickle5")
+            buffers = []
+            data = pickle5.dumps(dump_dict, protocol=5, buffer_callback=buffers.append)
+            buffers_file = file_path.parent / (file_path.stem + '_buffers.bin')
+            buffer_offsets = []
+            with buffers_file.open('wb') as f:
+                for buffer in buffers:
+                    raw = buffer.raw()
+                    f.write(b'\0' * (-f.tell() % _BUFFER_ALIGNMENT))
+                    buffer_offsets.append((f.tell(), raw.nbytes))
+                    f.write(raw)
+            dump_dict = {'out_of_band_pickle': data, 'buffers_file': buffers_file.name,
+                         'buffer_offsets': buffer_offsets}
 
         file_path.write_bytes(pickle.dumps(dump_dict))
 
@@ -430,6 +469,11 @@ class BaseExtractor:
             epoch_info = extractor.get_epoch_info(epoch_name)
             self.add_epoch(epoch_name, epoch_info["start_frame"], epoch_info["end_frame"])
 
+    def _get_times(self):
+        # times (in seconds) of each frame, or None if not set. Extractors that compute their times on the fly
+        # (overriding frame_to_time) override this, so that their times are kept by copy_times and when dumping
+        return self._times
+
     def _cast_start_end_frame(self, start_frame, end_frame):
         from .extraction_tools import cast_start_end_frame
         return cast_start_end_frame(start_frame, end_frame)
@@ -473,9 +517,20 @@ class BaseExtractor:
         pkl_file = Path(pkl_file)
         with open(str(pkl_file), 'rb') as f:
             d = pickle.load(f)
+        if 'out_of_band_pickle' in d.keys():
+            if not HAVE_PICKLE5:
+                raise ImportError(f"{pkl_file} was dumped with 'out_of_band=True': loading it requires python >= 3.8 "
+                                  f"or the pickle5 package: >>> pip install pickle5")
+            buffers_file = pkl_file.parent / d['buffers_file']
+            if buffers_file.stat().st_size > 0:
+                buffers_data = np.memmap(buffers_file, dtype='uint8', mode='c')
+            else:
+                buffers_data = np.zeros(0, dtype='uint8')
+            buffers = [buffers_data[offset:offset + nbytes] for offset, nbytes in d['buffer_offsets']]
+            d = pickle5.loads(d['out_of_band_pickle'], buffers=buffers)
         extractor = _load_extractor_from_dict(d['serialized_dict'])
         if 'properties' in d.keys():
-            extractor._properties = d['properties']
+            extractor._properties = PropertyTable.from_dict(d['properties'])
         if 'features' in d.keys():
             extractor._features = d['features']
         if 'times' in d.keys():
@@ -483,7 +538,7 @@ class BaseExtractor:
         return extractor
 
     @staticmethod
-    def load_extractor_from_dict(d):
+    def load_extractor_from_dict(d, use_cache=False):
         """
         Instantiates extractor from dictionary
 
@@ -491,12 +546,18 @@ class BaseExtractor:
         ----------
         d: dictionary
             Python dictionary
+        use_cache: bool
+            If True, the extractor is memoized in a per-process cache keyed by the serialized dictionary, and
+            repeated loads of the same dictionary return the same (already instantiated) extractor object.
+            The cached object is shared, so it should not be modified (e.g. by setting properties)
 
         Returns
         -------
         extractor: RecordingExtractor or SortingExtractor
             The loaded extractor object
         """
+        if use_cache:
+            return _extractor_cache.load(d)
         extractor = _load_extractor_from_dict(d)
         return extractor
 
@@ -504,6 +565,67 @@ class BaseExtractor:
         return _check_if_dumpable(self.make_serialized_dict())
 
 
+class _ExtractorCache:
+    """Per-process cache of the extractors loaded by load_extractor_from_dict(d, use_cache=True).
+
+    The last max_size extractors loaded are kept alive; older ones are only weakly referenced, so they are reused
+    as long as they are referenced elsewhere. The cache is emptied when used from a forked child process, so that
+    file handles opened by the parent are not shared.
+    """
+
+    def __init__(self, max_size=16):
+        self.max_size = max_size
+        self._pid = os.getpid()
+        self._recent = OrderedDict()
+        self._alive = weakref.WeakValueDictionary()
+
+    def load(self, d):
+        key = _get_cache_key(d)
+        if key is None:
+            return _load_extractor_from_dict(d)
+        if self._pid != os.getpid():
+            self.clear()
+            self._pid = os.getpid()
+        extractor = self._alive.get(key)
+        if extractor is None:
+            extractor = _load_extractor_from_dict(d)
+            self._alive[key] = extractor
+        self._recent[key] = extractor
+        self._recent.move_to_end(key)
+        while len(self._recent) > self.max_size:
+            self._recent.popitem(last=False)
+        return extractor
+
+    def clear(self):
+        self._recent.clear()
+        self._alive.clear()
+
+    def __len__(self):
+        return len(self._alive)
+
+
+def _get_cache_key(d):
+    # canonical json representation of the dictionary (None if it cannot be represented)
+    def _default(v):
+        if isinstance(v, np.ndarray):
+            return v.tolist()
+        if isinstance(v, np.generic):
+            return v.item()
+        if isinstance(v, Path):
+            return str(v.absolute())
+        if isinstance(v, datetime.datetime):
+            return v.isoformat()
+        raise TypeError
+
+    try:
+        return json.dumps(d, sort_keys=True, default=_default)
+    except (TypeError, ValueError):
+        return None
+
+
+_extractor_cache = _ExtractorCache()
+
+
 def _load_extractor_from_dict(dic):
     cls = None
     class_name = None
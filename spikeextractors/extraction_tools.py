@@ -1,5 +1,6 @@
 import numpy as np
 import csv
+import importlib.util
 import os
 import sys
 from pathlib import Path
@@ -10,11 +11,8 @@ from spikeextractors.baseextractor import BaseExtractor
 from tqdm import tqdm
 from joblib import Parallel, delayed
 
-try:
-    import h5py
-    HAVE_H5 = True
-except ImportError:
-    HAVE_H5 = False
+# h5py is only imported when writing to h5, to keep 'import spikeextractors' light
+HAVE_H5 = importlib.util.find_spec('h5py') is not None
 
 
 def read_python(path):
@@ -271,7 +269,7 @@ def read_binary(file, numchan, dtype, time_axis=0, offset=0):
 
 def write_to_binary_dat_format(recording, save_path=None, file_handle=None,
                                time_axis=0, dtype=None, chunk_size=None, chunk_mb=500, n_jobs=1, joblib_backend='loky',
-                               return_scaled=True, verbose=False):
+                               return_scaled=True, use_cache=False, verbose=False):
     """Saves the traces of a recording extractor in binary .dat format.
 
     Parameters
@@ -299,6 +297,10 @@ def write_to_binary_dat_format(recording, save_path=None, file_handle=None,
         Joblib backend for parallel processing ('loky', 'threading', 'multiprocessing')
     return_scaled: bool
         If True, traces are written after scaling (using gain/offset). If False, the raw traces are written
+    use_cache: bool
+        If True and n_jobs > 1, the recording loaded by each worker is kept in the worker's extractor cache and
+        shared by the chunks it processes, instead of being re-loaded for each chunk. The cached recording stays
+        loaded (with its files open) in the worker processes after writing
     verbose: bool
         If True, output is verbose (when chunks are used)
     """
@@ -381,7 +383,7 @@ def write_to_binary_dat_format(recording, save_path=None, file_handle=None,
                 rec_memmap = np.memmap(str(save_path), dtype=dtype, mode='w+', shape=shape)
                 for i in chunks_loop:
                     _write_dat_one_chunk(i, rec_arg, chunks, rec_memmap, dtype, time_axis, return_scaled,
-                                         verbose=False)
+                                         use_cache, verbose=False)
             else:
                 if time_axis == 0:
                     shape = (num_frames, num_channels)
@@ -391,7 +393,7 @@ def write_to_binary_dat_format(recording, save_path=None, file_handle=None,
 
                 Parallel(n_jobs=n_jobs, backend=joblib_backend)(
                     delayed(_write_dat_one_chunk)(i, rec_arg, chunks, rec_memmap, dtype, time_axis, return_scaled,
-                                                  verbose,)
+                                                  use_cache, verbose,)
                     for i in chunks_loop)
         else:
             for i in chunks_loop:
@@ -438,6 +440,8 @@ def write_to_h5_dataset_format(recording, dataset_path, save_path=None, file_han
         If True, output is verbose (when chunks are used)
     """
     assert HAVE_H5, "To write to h5 you need to install h5py: pip install h5py"
+    import h5py
+
     assert save_path is not None or file_handle is not None, "Provide 'save_path' or 'file handle'"
 
     if save_path is not None:
@@ -532,40 +536,33 @@ def get_sub_extractors_by_property(extractor, property_name, return_property_lis
     if isinstance(extractor, RecordingExtractor):
         if property_name not in extractor.get_shared_channel_property_names():
             raise ValueError("'property_name' must be must be a property of the recording channels")
-        else:
-            sub_list = []
-            recording = extractor
-            properties = np.array([recording.get_channel_property(chan, property_name)
-                                   for chan in recording.get_channel_ids()])
-            prop_list = np.unique(properties)
-            for prop in prop_list:
-                prop_idx = np.where(prop == properties)
-                chan_idx = list(np.array(recording.get_channel_ids())[prop_idx])
-                sub_list.append(SubRecordingExtractor(recording, channel_ids=chan_idx))
-            if return_property_list:
-                return sub_list, prop_list
-            else:
-                return sub_list
+        ids = extractor.get_channel_ids()
+        properties = np.array(extractor.get_channels_property(channel_ids=ids, property_name=property_name))
     elif isinstance(extractor, SortingExtractor):
         if property_name not in extractor.get_shared_unit_property_names():
             raise ValueError("'property_name' must be must be a property of the units")
-        else:
-            sub_list = []
-            sorting = extractor
-            properties = np.array([sorting.get_unit_property(unit, property_name)
-                                   for unit in sorting.get_unit_ids()])
-            prop_list = np.unique(properties)
-            for prop in prop_list:
-                prop_idx = np.where(prop == properties)
-                unit_idx = list(np.array(sorting.get_unit_ids())[prop_idx])
-                sub_list.append(SubSortingExtractor(sorting, unit_ids=unit_idx))
-            if return_property_list:
-                return sub_list, prop_list
-            else:
-                return sub_list
+        ids = extractor.get_unit_ids()
+        properties = np.array(extractor.get_units_property(unit_ids=ids, property_name=property_name))
     else:
         raise ValueError("'extractor' must be a RecordingExtractor or a SortingExtractor")
 
+    # group all the ids at once: ids sharing a property value are contiguous once sorted by the inverse index
+    if properties.ndim > 1:
+        prop_list, prop_inverse = np.unique(properties, return_inverse=True, axis=0)
+    else:
+        prop_list, prop_inverse = np.unique(properties, return_inverse=True)
+    prop_inverse = prop_inverse.ravel()
+    order = np.argsort(prop_inverse, kind='stable')
+    group_ids = np.split(np.array(ids)[order], np.cumsum(np.bincount(prop_inverse, minlength=len(prop_list)))[:-1])
+    if isinstance(extractor, RecordingExtractor):
+        sub_list = [SubRecordingExtractor(extractor, channel_ids=list(ids_i)) for ids_i in group_ids]
+    else:
+        sub_list = [SubSortingExtractor(extractor, unit_ids=list(ids_i)) for ids_i in group_ids]
+    if return_property_list:
+        return sub_list, prop_list
+    else:
+        return sub_list
+
 
 def _export_prb_file(recording, file_name, grouping_property=None, graph=True, geometry=True,
                      radius=None, adjacency_distance=100, verbose=False):
@@ -715,7 +712,7 @@ def load_extractor_from_json(json_file):
     return BaseExtractor.load_extractor_from_json(json_file)
 
 
-def load_extractor_from_dict(d):
+def load_extractor_from_dict(d, use_cache=False):
     """
     Instantiates extractor from dictionary
 
@@ -723,13 +720,17 @@ def load_extractor_from_dict(d):
     ----------
     d: dictionary
         Python dictionary
+    use_cache: bool
+        If True, the extractor is memoized in a per-process cache keyed by the serialized dictionary, and
+        repeated loads of the same dictionary return the same (already instantiated) extractor object.
+        The cached object is shared, so it should not be modified (e.g. by setting properties)
 
     Returns
     -------
     extractor: RecordingExtractor or SortingExtractor
         The loaded extractor object
     """
-    return BaseExtractor.load_extractor_from_dict(d)
+    return BaseExtractor.load_extractor_from_dict(d, use_cache=use_cache)
 
 
 def load_extractor_from_pickle(pkl_file):
@@ -862,6 +863,232 @@ def cast_start_end_frame(start_frame, end_frame):
     return start_frame, end_frame
 
 
+def make_spike_train_info(unit_ids, num_spikes, first_frames, last_frames):
+    """
+    Builds the spike train info dictionary (number of spikes, first and last spike frame) for a list of units.
+
+    Parameters
+    ----------
+    unit_ids: array_like
+        The unit ids
+    num_spikes: array_like
+        The number of spikes of each unit
+    first_frames: array_like
+        The first spike frame of each unit (ignored for units without spikes)
+    last_frames: array_like
+        The last spike frame of each unit (ignored for units without spikes)
+
+    Returns
+    -------
+    spike_train_info: dict
+        Dictionary with unit ids as keys and dictionaries with 'num_spikes', 'first_frame', and 'last_frame'
+        fields as values. 'first_frame' and 'last_frame' are None for units without spikes
+    """
+    spike_train_info = {}
+    for unit_id, n_spikes, first_frame, last_frame in zip(unit_ids, num_spikes, first_frames, last_frames):
+        if n_spikes > 0:
+            spike_train_info[unit_id] = {'num_spikes': int(n_spikes), 'first_frame': int(first_frame),
+                                         'last_frame': int(last_frame)}
+        else:
+            spike_train_info[unit_id] = {'num_spikes': 0, 'first_frame': None, 'last_frame': None}
+    return spike_train_info
+
+
+def get_spike_train_info_from_labels(unit_ids, spike_frames, spike_labels):
+    """
+    Computes the spike train info of the given units from a flat array of spike frames and spike labels
+    with a single sort, without extracting the individual spike trains.
+
+    Parameters
+    ----------
+    unit_ids: array_like
+        The unit ids
+    spike_frames: np.array
+        The spike frames of all units
+    spike_labels: np.array
+        The unit label of each spike
+
+    Returns
+    -------
+    spike_train_info: dict
+        Dictionary with unit ids as keys and dictionaries with 'num_spikes', 'first_frame', and 'last_frame'
+        fields as values
+    """
+    spike_frames = np.asarray(spike_frames)
+    spike_labels = np.asarray(spike_labels)
+    order = np.lexsort((spike_frames, spike_labels))
+    sorted_labels = spike_labels[order]
+    starts = np.searchsorted(sorted_labels, unit_ids, side='left')
+    ends = np.searchsorted(sorted_labels, unit_ids, side='right')
+    num_spikes = ends - starts
+    first_frames = np.zeros(len(starts), dtype='int64')
+    last_frames = np.zeros(len(starts), dtype='int64')
+    non_empty = num_spikes > 0
+    first_frames[non_empty] = np.rint(spike_frames[order[starts[non_empty]]])
+    last_frames[non_empty] = np.rint(spike_frames[order[ends[non_empty] - 1]])
+    return make_spike_train_info(unit_ids, num_spikes, first_frames, last_frames)
+
+
+def get_spike_indices_in_range(spike_frames, start_frame, end_frame, is_sorted=None):
+    """
+    Returns the indices of the spike frames within [start_frame, end_frame). If the spike frames are sorted,
+    the range is found with a binary search and a slice is returned, so that indexing an array with it
+    returns a view (or a memmap slice) instead of a copy.
+
+    Parameters
+    ----------
+    spike_frames: np.array
+        The spike frames
+    start_frame: int
+        The start frame (inclusive)
+    end_frame: int or np.inf
+        The end frame (exclusive)
+    is_sorted: bool or None
+        Whether the spike frames are sorted. If None (default), it is checked
+
+    Returns
+    -------
+    spike_indices: slice or np.array
+        A slice if the spike frames are sorted, an array of indices otherwise
+    """
+    spike_frames = np.asarray(spike_frames)
+    if is_sorted is None:
+        is_sorted = len(spike_frames) < 2 or bool(np.all(spike_frames[1:] >= spike_frames[:-1]))
+    if is_sorted:
+        start_idx, end_idx = np.searchsorted(spike_frames, [start_frame, end_frame], side='left')
+        return slice(int(start_idx), int(end_idx))
+    else:
+        return np.nonzero((spike_frames >= start_frame) & (spike_frames < end_frame))[0]
+
+
+def open_h5_dataset_with_chunk_cache(h5_group, dataset_name, time_axis=0, num_time_chunks=4, max_cache_mb=512):
+    """
+    Opens an h5 dataset of traces with a raw data chunk cache sized on its chunk shape. The cache holds
+    'num_time_chunks' chunks along the time axis for all the channels, so that consecutive reads of a few frames
+    do not decompress the same chunks again (the default h5py cache is 1Mb per dataset). The dataset should not
+    be already open (e.g. by another h5py.Dataset object of the same file): HDF5 would return the open dataset,
+    with its cache. In that case a warning is raised and the dataset is used with its current cache.
+
+    Parameters
+    ----------
+    h5_group: h5py.Group or h5py.File
+        The group containing the dataset
+    dataset_name: str
+        The name of the dataset in the group
+    time_axis: 0 or 1
+        The axis of the dataset corresponding to time
+    num_time_chunks: int
+        Number of chunks along the time axis kept in the cache (default 4)
+    max_cache_mb: float
+        Maximum size of the cache in Mb (default 512)
+
+    Returns
+    -------
+    dataset: h5py.Dataset
+        The dataset (opened with the default cache if it is not chunked)
+    """
+    import h5py
+
+    dataset = h5_group[dataset_name]
+    if dataset.chunks is None:
+        return dataset
+    chunks, shape, itemsize = dataset.chunks, dataset.shape, dataset.dtype.itemsize
+    # the dataset must be closed to be reopened with its own cache (an open dataset is shared, with its cache)
+    del dataset
+    channel_axis = 1 - time_axis
+    chunk_bytes = int(np.prod(chunks)) * itemsize
+    num_chunks = int(np.ceil(shape[channel_axis] / chunks[channel_axis])) * num_time_chunks
+    cache_bytes = int(min(num_chunks * chunk_bytes, max_cache_mb * 1e6))
+    cache_bytes = max(cache_bytes, 2 ** 20)
+    # the hash table should have about 100 times as many (ideally prime) slots as the chunks in the cache
+    num_slots = _next_prime(100 * max(cache_bytes // chunk_bytes, 1))
+    dapl = h5py.h5p.create(h5py.h5p.DATASET_ACCESS)
+    dapl.set_chunk_cache(num_slots, cache_bytes, 0.75)
+    dataset = h5py.Dataset(h5py.h5d.open(h5_group.id, dataset_name.encode(), dapl=dapl))
+    if dataset.id.get_access_plist().get_chunk_cache()[1] != cache_bytes:
+        warnings.warn(f"The chunk cache of the h5 dataset '{dataset_name}' could not be set, because the dataset "
+                      f"is already open: reads might be slower")
+    return dataset
+
+
+def _next_prime(n):
+    n = max(int(n), 2)
+    while any(n % i == 0 for i in range(2, int(np.sqrt(n)) + 1)):
+        n += 1
+    return n
+
+
+class H5TracesReader:
+    """
+    Reads traces from an h5 dataset for any order of channels. Channels are read with a single (sorted)
+    selection and reordered in memory.
+
+    In read-ahead mode (for sequential scans, e.g. when writing a recording in chunks), blocks of at least
+    'read_ahead_frames' frames of all the channels are read at once (up to the end of the last HDF5 chunk they
+    touch) and following reads falling in the block are served from memory.
+
+    Parameters
+    ----------
+    dataset: h5py.Dataset
+        The dataset of the traces
+    time_axis: 0 or 1
+        The axis of the dataset corresponding to time
+    read_ahead_frames: int or None
+        Minimum number of frames read at once. If None (default), only the requested frames are read
+    """
+
+    def __init__(self, dataset, time_axis=0, read_ahead_frames=None):
+        self._dataset = dataset
+        self._time_axis = time_axis
+        self._num_channels = dataset.shape[1 - time_axis]
+        self._num_frames = dataset.shape[time_axis]
+        self._read_ahead_frames = read_ahead_frames
+        # (start_frame, (num_channels, num_frames) block) of the read-ahead mode, replaced as a whole so that
+        # concurrent reads (e.g. threads) always see a consistent block
+        self._block = None
+
+    def read(self, channel_idxs, start_frame, end_frame):
+        """
+        Returns the traces of the channels (indexes along the channel axis of the dataset) as a
+        (num_channels, num_frames) array
+        """
+        channel_idxs = np.asarray(channel_idxs, dtype='int64')
+        if self._read_ahead_frames is not None:
+            return self._read_from_block(channel_idxs, start_frame, end_frame)
+        if len(channel_idxs) == 0:
+            return self._read(slice(0, 0), start_frame, end_frame)
+        unique_idxs, inverse = np.unique(channel_idxs, return_inverse=True)
+        channel_span = int(unique_idxs[-1] - unique_idxs[0]) + 1
+        if channel_span <= 2 * len(unique_idxs):
+            # the span of the channels is read with a slice, which is much faster than a list selection in h5py
+            traces = self._read(slice(int(unique_idxs[0]), int(unique_idxs[-1]) + 1), start_frame, end_frame)
+            if channel_span > len(unique_idxs):
+                traces = traces[unique_idxs - unique_idxs[0]]
+        else:
+            traces = self._read(unique_idxs, start_frame, end_frame)
+        if len(unique_idxs) == len(channel_idxs) and np.all(inverse == np.arange(len(inverse))):
+            return traces
+        return traces[inverse]
+
+    def _read(self, channel_selection, start_frame, end_frame):
+        if self._time_axis == 0:
+            return self._dataset[start_frame:end_frame, channel_selection].T
+        else:
+            return self._dataset[channel_selection, start_frame:end_frame]
+
+    def _read_from_block(self, channel_idxs, start_frame, end_frame):
+        block = self._block
+        if block is None or start_frame < block[0] or end_frame > block[0] + block[1].shape[1]:
+            block_end = min(max(end_frame, start_frame + self._read_ahead_frames), self._num_frames)
+            if self._dataset.chunks is not None:
+                chunk_frames = self._dataset.chunks[self._time_axis]
+                block_end = min(int(np.ceil(block_end / chunk_frames)) * chunk_frames, self._num_frames)
+            block = (start_frame, self._read(slice(None), start_frame, block_end))
+            self._block = block
+        block_start, block_traces = block
+        return block_traces[channel_idxs, start_frame - block_start:end_frame - block_start]
+
+
 def divide_recording_into_time_chunks(num_frames, chunk_size, padding_size):
     chunks = []
     ii = 0
@@ -877,13 +1104,14 @@ def divide_recording_into_time_chunks(num_frames, chunk_size, padding_size):
     return chunks
 
 
-def _write_dat_one_chunk(i, rec_arg, chunks, rec_memmap, dtype, time_axis, return_scaled, verbose):
+def _write_dat_one_chunk(i, rec_arg, chunks, rec_memmap, dtype, time_axis, return_scaled, use_cache, verbose):
     chunk = chunks[i]
 
     if verbose:
         print(f"Writing chunk {i + 1} / {len(chunks)}")
     if isinstance(rec_arg, dict):
-        recording = load_extractor_from_dict(rec_arg)
+        # with use_cache, chunks processed by the same worker share the loaded recording
+        recording = load_extractor_from_dict(rec_arg, use_cache=use_cache)
     else:
         recording = rec_arg
 
@@ -1,113 +1,170 @@
-from .extractors.mdaextractors.mdaextractors import MdaRecordingExtractor, MdaSortingExtractor
-from .extractors.mearecextractors.mearecextractors import MEArecRecordingExtractor, MEArecSortingExtractor
-from .extractors.biocamrecordingextractor.biocamrecordingextractor import BiocamRecordingExtractor
-from .extractors.exdirextractors.exdirextractors import ExdirRecordingExtractor, ExdirSortingExtractor
-from .extractors.intanrecordingextractor.intanrecordingextractor import IntanRecordingExtractor
-from .extractors.hdsortsortingextractor.hdsortsortingextractor import HDSortSortingExtractor
-from .extractors.hs2sortingextractor.hs2sortingextractor import HS2SortingExtractor
-from .extractors.klustaextractors.klustaextractors import KlustaSortingExtractor, KlustaRecordingExtractor
-from .extractors.kilosortextractors.kilosortextractors import KiloSortSortingExtractor, KiloSortRecordingExtractor
-from .extractors.numpyextractors.numpyextractors import NumpyRecordingExtractor, NumpySortingExtractor
-from .extractors.nwbextractors.nwbextractors import NwbRecordingExtractor, NwbSortingExtractor
-from .extractors.openephysextractors.openephysextractors import OpenEphysRecordingExtractor, \
-    OpenEphysSortingExtractor, OpenEphysNPIXRecordingExtractor
-from .extractors.maxwellextractors import MaxOneRecordingExtractor, MaxOneSortingExtractor, MaxTwoRecordingExtractor, \
-    MaxTwoSortingExtractor
-from .extractors.phyextractors.phyextractors import PhyRecordingExtractor, PhySortingExtractor
-from .extractors.bindatrecordingextractor.bindatrecordingextractor import BinDatRecordingExtractor
-from .extractors.spykingcircusextractors.spykingcircusextractors import SpykingCircusSortingExtractor, \
-    SpykingCircusRecordingExtractor
-from .extractors.spikeglxrecordingextractor.spikeglxrecordingextractor import SpikeGLXRecordingExtractor
-from .extractors.tridescloussortingextractor.tridescloussortingextractor import TridesclousSortingExtractor
-from .extractors.npzsortingextractor.npzsortingextractor import NpzSortingExtractor
-from .extractors.mcsh5recordingextractor.mcsh5recordingextractor import MCSH5RecordingExtractor
-from .extractors.shybridextractors import SHYBRIDRecordingExtractor, SHYBRIDSortingExtractor
-from .extractors.nixioextractors.nixioextractors import NIXIORecordingExtractor, NIXIOSortingExtractor
-from .extractors.neoextractors import (PlexonRecordingExtractor, PlexonSortingExtractor,
-                                       NeuralynxRecordingExtractor, NeuralynxSortingExtractor,
-                                       BlackrockRecordingExtractor, BlackrockSortingExtractor,
-                                       MCSRawRecordingExtractor, SpikeGadgetsRecordingExtractor)
-from .extractors.neuroscopeextractors import NeuroscopeRecordingExtractor, NeuroscopeMultiRecordingTimeExtractor, \
-    NeuroscopeSortingExtractor, NeuroscopeMultiSortingExtractor
-from .extractors.waveclussortingextractor import WaveClusSortingExtractor
-from .extractors.yassextractors import YassSortingExtractor
-from .extractors.combinatosortingextractor import CombinatoSortingExtractor
-from .extractors.alfsortingextractor import ALFSortingExtractor
-from .extractors.cedextractors import CEDRecordingExtractor
-from .extractors.cellexplorersortingextractor import CellExplorerSortingExtractor
-from .extractors.neuropixelsdatrecordingextractor import NeuropixelsDatRecordingExtractor
-
-recording_extractor_full_list = [
-    MdaRecordingExtractor,
-    MEArecRecordingExtractor,
-    BiocamRecordingExtractor,
-    ExdirRecordingExtractor,
-    OpenEphysRecordingExtractor,
-    OpenEphysNPIXRecordingExtractor,
-    IntanRecordingExtractor,
-    BinDatRecordingExtractor,
-    KlustaRecordingExtractor,
-    KiloSortRecordingExtractor,
-    SpykingCircusRecordingExtractor,
-    SpikeGLXRecordingExtractor,
-    PhyRecordingExtractor,
-    MaxOneRecordingExtractor,
-    MaxTwoRecordingExtractor,
-    MCSH5RecordingExtractor,
-    SHYBRIDRecordingExtractor,
-    NIXIORecordingExtractor,
-    NwbRecordingExtractor,
-    NeuroscopeRecordingExtractor,
-    NeuroscopeMultiRecordingTimeExtractor,
-    CEDRecordingExtractor,
-    NeuropixelsDatRecordingExtractor,
+import importlib
+import sys
+
+# Extractor classes are registered by name with the module (relative to spikeextractors.extractors) defining them.
+# Modules outside spikeextractors.extractors are given as explicit relative imports (e.g. '..module').
+# Modules are only imported when a class is first accessed, so that importing spikeextractors does not import every
+# file format and its optional dependencies.
+_recording_extractor_modules = {
+    'MdaRecordingExtractor': 'mdaextractors.mdaextractors',
+    'MEArecRecordingExtractor': 'mearecextractors.mearecextractors',
+    'BiocamRecordingExtractor': 'biocamrecordingextractor.biocamrecordingextractor',
+    'ExdirRecordingExtractor': 'exdirextractors.exdirextractors',
+    'OpenEphysRecordingExtractor': 'openephysextractors.openephysextractors',
+    'OpenEphysNPIXRecordingExtractor': 'openephysextractors.openephysextractors',
+    'IntanRecordingExtractor': 'intanrecordingextractor.intanrecordingextractor',
+    'BinDatRecordingExtractor': 'bindatrecordingextractor.bindatrecordingextractor',
+    'KlustaRecordingExtractor': 'klustaextractors.klustaextractors',
+    'KiloSortRecordingExtractor': 'kilosortextractors.kilosortextractors',
+    'SpykingCircusRecordingExtractor': 'spykingcircusextractors.spykingcircusextractors',
+    'SpikeGLXRecordingExtractor': 'spikeglxrecordingextractor.spikeglxrecordingextractor',
+    'SpikeGLXMultiRecordingExtractor': 'spikeglxrecordingextractor.spikeglxrecordingextractor',
+    'PhyRecordingExtractor': 'phyextractors.phyextractors',
+    'MaxOneRecordingExtractor': 'maxwellextractors',
+    'MaxTwoRecordingExtractor': 'maxwellextractors',
+    'MCSH5RecordingExtractor': 'mcsh5recordingextractor.mcsh5recordingextractor',
+    'SHYBRIDRecordingExtractor': 'shybridextractors',
+    'NIXIORecordingExtractor': 'nixioextractors.nixioextractors',
+    'NwbRecordingExtractor': 'nwbextractors.nwbextractors',
+    'NeuroscopeRecordingExtractor': 'neuroscopeextractors',
+    'NeuroscopeMultiRecordingTimeExtractor': 'neuroscopeextractors',
+    'CEDRecordingExtractor': 'cedextractors',
+    'NeuropixelsDatRecordingExtractor': 'neuropixelsdatrecordingextractor',
 
     # neo based
-    PlexonRecordingExtractor,
-    NeuralynxRecordingExtractor,
-    BlackrockRecordingExtractor,
-    MCSRawRecordingExtractor,
-    SpikeGadgetsRecordingExtractor,
-]
-
-recording_extractor_dict = {recording_class.extractor_name: recording_class
-                            for recording_class in recording_extractor_full_list}
-installed_recording_extractor_list = [rx for rx in recording_extractor_full_list if rx.installed]
-
-sorting_extractor_full_list = [
-    MdaSortingExtractor,
-    MEArecSortingExtractor,
-    ExdirSortingExtractor,
-    HDSortSortingExtractor,
-    HS2SortingExtractor,
-    KlustaSortingExtractor,
-    KiloSortSortingExtractor,
-    OpenEphysSortingExtractor,
-    PhySortingExtractor,
-    SpykingCircusSortingExtractor,
-    TridesclousSortingExtractor,
-    MaxTwoSortingExtractor,
-    MaxOneSortingExtractor,
-    NpzSortingExtractor,
-    SHYBRIDSortingExtractor,
-    NIXIOSortingExtractor,
-    NeuroscopeSortingExtractor,
-    NeuroscopeMultiSortingExtractor,
-    NwbSortingExtractor,
-    WaveClusSortingExtractor,
-    YassSortingExtractor,
-    CombinatoSortingExtractor,
-    ALFSortingExtractor,
+    'PlexonRecordingExtractor': 'neoextractors',
+    'NeuralynxRecordingExtractor': 'neoextractors',
+    'BlackrockRecordingExtractor': 'neoextractors',
+    'MCSRawRecordingExtractor': 'neoextractors',
+    'SpikeGadgetsRecordingExtractor': 'neoextractors',
+}
+
+_sorting_extractor_modules = {
+    'MdaSortingExtractor': 'mdaextractors.mdaextractors',
+    'MEArecSortingExtractor': 'mearecextractors.mearecextractors',
+    'ExdirSortingExtractor': 'exdirextractors.exdirextractors',
+    'HDSortSortingExtractor': 'hdsortsortingextractor.hdsortsortingextractor',
+    'HS2SortingExtractor': 'hs2sortingextractor.hs2sortingextractor',
+    'KlustaSortingExtractor': 'klustaextractors.klustaextractors',
+    'KiloSortSortingExtractor': 'kilosortextractors.kilosortextractors',
+    'OpenEphysSortingExtractor': 'openephysextractors.openephysextractors',
+    'PhySortingExtractor': 'phyextractors.phyextractors',
+    'SpykingCircusSortingExtractor': 'spykingcircusextractors.spykingcircusextractors',
+    'TridesclousSortingExtractor': 'tridescloussortingextractor.tridescloussortingextractor',
+    'MaxTwoSortingExtractor': 'maxwellextractors',
+    'MaxOneSortingExtractor': 'maxwellextractors',
+    'NpzSortingExtractor': 'npzsortingextractor.npzsortingextractor',
+    'SHYBRIDSortingExtractor': 'shybridextractors',
+    'NIXIOSortingExtractor': 'nixioextractors.nixioextractors',
+    'NeuroscopeSortingExtractor': 'neuroscopeextractors',
+    'NeuroscopeMultiSortingExtractor': 'neuroscopeextractors',
+    'NwbSortingExtractor': 'nwbextractors.nwbextractors',
+    'WaveClusSortingExtractor': 'waveclussortingextractor',
+    'YassSortingExtractor': 'yassextractors',
+    'CombinatoSortingExtractor': 'combinatosortingextractor',
+    'ALFSortingExtractor': 'alfsortingextractor',
+
     # neo based
-    PlexonSortingExtractor,
-    NeuralynxSortingExtractor,
-    BlackrockSortingExtractor,
-    CellExplorerSortingExtractor
-]
-
-installed_sorting_extractor_list = [sx for sx in sorting_extractor_full_list if sx.installed]
-sorting_extractor_dict = {sorting_class.extractor_name: sorting_class for sorting_class in sorting_extractor_full_list}
-
-writable_sorting_extractor_list = [sx for sx in installed_sorting_extractor_list if sx.is_writable]
-writable_sorting_extractor_dict = {sorting_class.extractor_name: sorting_class
-                                   for sorting_class in writable_sorting_extractor_list}
+    'PlexonSortingExtractor': 'neoextractors',
+    'NeuralynxSortingExtractor': 'neoextractors',
+    'BlackrockSortingExtractor': 'neoextractors',
+    'CellExplorerSortingExtractor': 'cellexplorersortingextractor',
+}
+
+_other_extractor_modules = {
+    'NumpyRecordingExtractor': 'numpyextractors.numpyextractors',
+    'NumpySortingExtractor': 'numpyextractors.numpyextractors',
+    'SharedMemoryRecordingExtractor': '..sharedmemoryextractors',
+}
+
+_extractor_modules = {**_recording_extractor_modules, **_sorting_extractor_modules, **_other_extractor_modules}
+
+
+def _get_recording_extractor_full_list():
+    return [_get_extractor_class(name) for name in _recording_extractor_modules.keys()]
+
+
+def _get_recording_extractor_dict():
+    return {recording_class.extractor_name: recording_class
+            for recording_class in __getattr__('recording_extractor_full_list')}
+
+
+def _get_installed_recording_extractor_list():
+    return [rx for rx in __getattr__('recording_extractor_full_list') if rx.installed]
+
+
+def _get_sorting_extractor_full_list():
+    return [_get_extractor_class(name) for name in _sorting_extractor_modules.keys()]
+
+
+def _get_installed_sorting_extractor_list():
+    return [sx for sx in __getattr__('sorting_extractor_full_list') if sx.installed]
+
+
+def _get_sorting_extractor_dict():
+    return {sorting_class.extractor_name: sorting_class
+            for sorting_class in __getattr__('sorting_extractor_full_list')}
+
+
+def _get_writable_sorting_extractor_list():
+    return [sx for sx in __getattr__('installed_sorting_extractor_list') if sx.is_writable]
+
+
+def _get_writable_sorting_extractor_dict():
+    return {sorting_class.extractor_name: sorting_class
+            for sorting_class in __getattr__('writable_sorting_extractor_list')}
+
+
+_extractor_lists = {
+    'recording_extractor_full_list': _get_recording_extractor_full_list,
+    'recording_extractor_dict': _get_recording_extractor_dict,
+    'installed_recording_extractor_list': _get_installed_recording_extractor_list,
+    'sorting_extractor_full_list': _get_sorting_extractor_full_list,
+    'installed_sorting_extractor_list': _get_installed_sorting_extractor_list,
+    'sorting_extractor_dict': _get_sorting_extractor_dict,
+    'writable_sorting_extractor_list': _get_writable_sorting_extractor_list,
+    'writable_sorting_extractor_dict': _get_writable_sorting_extractor_dict,
+}
+
+__all__ = list(_extractor_modules.keys()) + list(_extractor_lists.keys())
+
+_h5py_version_checked = False
+
+
+def _get_extractor_class(name):
+    extractor_class = globals().get(name)
+    if extractor_class is None:
+        module_name = _extractor_modules[name]
+        if not module_name.startswith('.'):
+            module_name = '.' + module_name
+        module = importlib.import_module(module_name, 'spikeextractors.extractors')
+        extractor_class = getattr(module, name)
+        globals()[name] = extractor_class
+        _check_h5py_version()
+    return extractor_class
+
+
+def _check_h5py_version():
+    # warn once, when a format module has actually imported h5py
+    global _h5py_version_checked
+    if not _h5py_version_checked and 'h5py' in sys.modules:
+        _h5py_version_checked = True
+        from distutils.version import StrictVersion
+
+        if StrictVersion(sys.modules['h5py'].__version__) > '2.10.0':
+            print("h5py version > 2.10.0. Some extractors might not work properly. It is recommended to "
+                  "downgrade to version 2.10.0: \n>>> pip install h5py==2.10.0")
+
+
+def __getattr__(name):
+    if name in _extractor_modules:
+        return _get_extractor_class(name)
+    if name in _extractor_lists:
+        value = _extractor_lists[name]()
+        globals()[name] = value
+        return value
+    raise AttributeError("module " + repr(__name__) + " has no attribute " + repr(name))
+
+
+def __dir__():
+    return sorted(set(globals().keys()) | set(__all__))
@@ -3,6 +3,8 @@ from spikeextractors.extraction_tools import check_get_traces_args
 import numpy as np
 from pathlib import Path
 import ctypes
+import math
+from tqdm import tqdm
 
 try:
     import h5py
@@ -25,7 +27,7 @@ class BiocamRecordingExtractor(RecordingExtractor):
         self._mea_pitch = mea_pitch
         self._recording_file = file_path
         self._rf, self._nFrames, self._samplingRate, self._nRecCh, self._chIndices, \
-        self._file_format, self._signalInv, self._positions, self._read_function = openBiocamFile(
+        self._file_format, self._signalInv, self._positions = openBiocamFile(
             self._recording_file, self._mea_pitch, verbose)
         RecordingExtractor.__init__(self)
         self.set_channel_locations(self._positions)
@@ -47,14 +49,59 @@ class BiocamRecordingExtractor(RecordingExtractor):
 
     @check_get_traces_args
     def get_traces(self, channel_ids=None, start_frame=None, end_frame=None, return_scaled=True):
-        data = self._read_function(self._rf, start_frame, end_frame, self.get_num_channels())
-        # transform to slice if possible
-        if sorted(channel_ids) == channel_ids and np.all(np.diff(channel_ids) == 1):
-            channel_ids = slice(channel_ids[0], channel_ids[0]+len(channel_ids))
-        return data[:, channel_ids].T
+        raw = self._rf['3BData/Raw']
+        channel_idxs = np.asarray(channel_ids, dtype='int64')
+        traces = np.empty((len(channel_idxs), end_frame - start_frame), dtype=raw.dtype)
+        if len(channel_idxs) == 0 or end_frame == start_frame:
+            return traces
+        # only the span of the requested channels is kept from each block
+        first_channel = int(np.min(channel_idxs))
+        channel_span = slice(first_channel, int(np.max(channel_idxs)) + 1)
+        span_idxs = channel_idxs - first_channel
+        if np.array_equal(span_idxs, np.arange(len(span_idxs))):
+            span_idxs = slice(None)
+        nch = self.get_num_channels()
+        for block_start, block_end in _get_read_blocks(raw, nch, self._file_format, start_frame, end_frame):
+            if self._file_format == 100:
+                block = raw[block_start:block_end, channel_span]
+            else:
+                block = raw[nch * block_start:nch * block_end].reshape((block_end - block_start, nch))[:, channel_span]
+            out = traces[:, block_start - start_frame:block_end - start_frame]
+            # gather the channels (and invert the signal) directly in the output
+            out[:] = block[:, span_idxs].T
+            if self._signalInv == -1:
+                np.subtract(4096, out, out=out)
+        return traces
 
     @staticmethod
-    def write_recording(recording, save_path):
+    def write_recording(recording, save_path, dtype=None, chunk_size=None, chunk_mb=500, compression=None,
+                        compression_opts=None, dataset_chunk_frames=None, verbose=False):
+        """
+        Writes a recording to a Biocam (brw version 101) file.
+
+        Parameters
+        ----------
+        recording: RecordingExtractor
+            The recording extractor to be saved
+        save_path: str or Path
+            The path to the brw file
+        dtype: dtype
+            Type of the saved data. If None (default), the dtype of the recording is used
+        chunk_size: None or int
+            Number of frames written at a time. If None (default) and 'chunk_mb' is given, chunks of 'chunk_mb' Mb
+            (default 500Mb) are written
+        chunk_mb: None or int
+            Chunk size in Mb (default 500Mb)
+        compression: str or None
+            h5py compression filter of the raw dataset (e.g. 'gzip' or 'lzf'). Default None
+        compression_opts: int or None
+            Options of the compression filter (e.g. the gzip level)
+        dataset_chunk_frames: int or None
+            Number of frames per HDF5 chunk of the raw dataset. If None, the dataset is contiguous when not
+            compressed, otherwise chunks of about 1Mb are used
+        verbose: bool
+            If True, output is verbose (when chunks are used)
+        """
         # Convert to uV:
         # AnalogValue = MVOffset + DigitalValue * ADCCountsToMV
         # Where ADCCountsToMV is defined as:
@@ -68,13 +115,33 @@ class BiocamRecordingExtractor(RecordingExtractor):
         assert HAVE_BIOCAM, BiocamRecordingExtractor.installation_mesg
         M = recording.get_num_channels()
         N = recording.get_num_frames()
+        dtype = np.dtype(recording.get_dtype() if dtype is None else dtype)
+        if dataset_chunk_frames is None and compression is not None:
+            dataset_chunk_frames = max(2 ** 20 // (M * dtype.itemsize), 1)
+        if dataset_chunk_frames is not None:
+            dataset_chunk_frames = int(min(dataset_chunk_frames, max(N, 1)))
+            chunks = (M * dataset_chunk_frames,)
+        else:
+            chunks = None
         rf = h5py.File(save_path, 'w')
         g = rf.create_group('3BData')
-        dr = rf.create_dataset('3BData/Raw', (M * N,), dtype=int)
-        dt = 50000
-        for i in range(N // dt):
-            dr[M * i * dt:M * (i + 1) * dt] = recording.get_traces(range(M), i * dt, (i + 1) * dt).T.flatten()
-        dr[M * (N // dt) * dt:] = recording.get_traces(range(M), (N // dt) * dt, N).T.flatten()
+        dr = rf.create_dataset('3BData/Raw', (M * N,), dtype=dtype, chunks=chunks, compression=compression,
+                               compression_opts=compression_opts)
+        if chunk_size is None and chunk_mb is not None:
+            chunk_size = max(int(chunk_mb * 1e6) // (M * dtype.itemsize), 1)
+        if chunk_size is None:
+            chunk_size = max(N, 1)
+        chunk_size = int(chunk_size)
+        if dataset_chunk_frames is not None:
+            # whole HDF5 chunks are written at once
+            chunk_size = max(chunk_size // dataset_chunk_frames, 1) * dataset_chunk_frames
+        chunk_starts = range(0, N, chunk_size)
+        if verbose:
+            chunk_starts = tqdm(chunk_starts, ascii=True, desc="Writing to Biocam file")
+        channel_ids = recording.get_channel_ids()
+        for i in chunk_starts:
+            traces = recording.get_traces(channel_ids, i, min(i + chunk_size, N))
+            dr[M * i:M * (i + traces.shape[1])] = traces.T.astype(dtype, copy=False).ravel()
         g.attrs['Version'] = 101
         rf.create_dataset('3BRecInfo/3BRecVars/MinVolt', data=[0])
         rf.create_dataset('3BRecInfo/3BRecVars/MaxVolt', data=[1])
@@ -92,7 +159,7 @@ class BiocamRecordingExtractor(RecordingExtractor):
 
 
 def openBiocamFile(filename, mea_pitch, verbose=False):
-    """Open a Biocam hdf5 file, read and return the recording info, pick te correct method to access raw data, and return this to the caller."""
+    """Open a Biocam hdf5 file, read and return the recording info to the caller."""
     rf = h5py.File(filename, 'r')
     # Read recording variables
     recVars = rf.require_group('3BRecInfo/3BRecVars/')
@@ -126,50 +193,25 @@ def openBiocamFile(filename, mea_pitch, verbose=False):
     rawIndices = np.vstack((r, c)).T
     # assign channel numbers
     chIndices = np.array([(x - 1) + (y - 1) * nCols for (y, x) in rawIndices])
-    # determine correct function to read data
     if verbose:
         print("# Signal inversion is " + str(signalInv) + ".")
         print("# If your spike sorting results look wrong, invert the signal.")
-    if (file_format == 100) & (signalInv == 1):
-        read_function = readHDF5t_100
-    elif (file_format == 100) & (signalInv == -1):
-        read_function = readHDF5t_100_i
-    if ((file_format == 101) | (file_format == 102)) & (signalInv == 1):
-        read_function = readHDF5t_101
-    elif ((file_format == 101) | (file_format == 102)) & (signalInv == -1):
-        read_function = readHDF5t_101_i
+    if signalInv not in (1, -1):
+        raise RuntimeError(f"Unknown signal inversion: {signalInv}")
+    return rf, nFrames, samplingRate, nRecCh, chIndices, file_format, signalInv, rawIndices
+
+
+def _get_read_blocks(raw, nch, file_format, start_frame, end_frame, block_mb=100):
+    """Splits a frame range in blocks of about 'block_mb' Mb, with boundaries on the HDF5 chunks of the dataset"""
+    # number of frames after which the chunk grid and the frame grid are aligned
+    if raw.chunks is None:
+        align_frames = 1
+    elif file_format == 100:
+        align_frames = raw.chunks[0]
     else:
-        raise RuntimeError("File format unknown.")
-    return rf, nFrames, samplingRate, nRecCh, chIndices, file_format, signalInv, rawIndices, read_function
-
-
-def readHDF5t_100(rf, t0, t1, nch):
-    if t0 <= t1:
-        return rf['3BData/Raw'][t0:t1]
-    else:  # Reversed read
-        raise Exception('Reading backwards? Not sure about this.')
-        return rf['3BData/Raw'][t1:t0]
-
-
-def readHDF5t_100_i(rf, t0, t1, nch):
-    if t0 <= t1:
-        return 4096 - rf['3BData/Raw'][t0:t1]
-    else:  # Reversed read
-        raise Exception('Reading backwards? Not sure about this.')
-        return 4096 - rf['3BData/Raw'][t1:t0]
-
-
-def readHDF5t_101(rf, t0, t1, nch):
-    if t0 <= t1:
-        return rf['3BData/Raw'][nch * t0:nch * t1].reshape((t1 - t0, nch), order='C')
-    else:  # Reversed read
-        raise Exception('Reading backwards? Not sure about this.')
-        return rf['3BData/Raw'][nch * t1:nch * t0].reshape((t1 - t0, nch), order='C')
-
-
-def readHDF5t_101_i(rf, t0, t1, nch):
-    if t0 <= t1:
-        return 4096 - rf['3BData/Raw'][nch * t0:nch * t1].reshape((t1 - t0, nch), order='C')
-    else:  # Reversed read
-        raise Exception('Reading backwards? Not sure about this.')
-        return 4096 - rf['3BData/Raw'][nch * t1:nch * t0].reshape((t1 - t0, nch), order='C')
+        align_frames = raw.chunks[0] // math.gcd(raw.chunks[0], nch)
+    block_frames = max(int(block_mb * 1e6) // (nch * raw.dtype.itemsize) // align_frames, 1) * align_frames
+    block_starts = np.arange(start_frame // block_frames * block_frames, end_frame, block_frames)
+    block_starts[0] = start_frame
+    block_ends = np.append(block_starts[1:], end_frame)
+    return zip(block_starts.tolist(), block_ends.tolist())
@@ -290,7 +290,7 @@ class ExdirSortingExtractor(SortingExtractor):
                 pass
             unittimes = ch_group.require_group('UnitTimes')
             unit_stop_time = np.max(
-                [(np.max(sorting.get_unit_spike_train(u).astype(float) / sampling_frequency).rescale('s'))
+                [(float(sorting.get_unit_spike_train_info(u)['last_frame']) / sampling_frequency).rescale('s')
                  for u in sorting.get_unit_ids()]) * pq.s
             recording_stop_time = None
             if recording is not None:
@@ -326,7 +326,7 @@ class ExdirSortingExtractor(SortingExtractor):
 
                 timestamps = np.concatenate((timestamps, (sorting.get_unit_spike_train(unit).astype(float)
                                                           / sampling_frequency).rescale('s')))
-                nums = np.concatenate((nums, [unit] * len(sorting.get_unit_spike_train(unit))))
+                nums = np.concatenate((nums, [unit] * sorting.get_unit_spike_train_info(unit)['num_spikes']))
 
                 if 'waveforms' in sorting.get_unit_spike_feature_names(unit):
                     if len(waveforms) == 0:
@@ -389,7 +389,7 @@ class ExdirSortingExtractor(SortingExtractor):
                 ch_group = ephys.require_group('channel_group_' + str(chan))
                 unittimes = ch_group.require_group('UnitTimes')
                 unit_stop_time = np.max(
-                    [(np.max(sorting.get_unit_spike_train(u).astype(float) / sampling_frequency).rescale('s'))
+                    [(float(sorting.get_unit_spike_train_info(u)['last_frame']) / sampling_frequency).rescale('s')
                      for u in sorting.get_unit_ids()]) * pq.s
                 recording_stop_time = None
                 if recording is not None:
@@ -433,7 +433,7 @@ class ExdirSortingExtractor(SortingExtractor):
 
                         timestamps = np.concatenate((timestamps, (sorting.get_unit_spike_train(unit).astype(float)
                                                                   / sampling_frequency).rescale('s')))
-                        nums = np.concatenate((nums, [unit] * len(sorting.get_unit_spike_train(unit))))
+                        nums = np.concatenate((nums, [unit] * sorting.get_unit_spike_train_info(unit)['num_spikes']))
 
                         if 'waveforms' in sorting.get_unit_spike_feature_names(unit):
                             if len(waveforms) == 0:
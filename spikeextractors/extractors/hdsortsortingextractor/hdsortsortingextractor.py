@@ -149,7 +149,7 @@ class HDSortSortingExtractor(MATSortingExtractor):
 
             unit = {"ID": uid,
                     "spikeTrain": sorting.get_unit_spike_train(uid)}
-            num_spikes = len(sorting.get_unit_spike_train(uid))
+            num_spikes = sorting.get_unit_spike_train_info(uid)['num_spikes']
 
             if "amplitudes" in sorting.get_unit_spike_feature_names(uid):
                 unit["spikeAmplitudes"] = sorting.get_unit_spike_features(uid, "amplitudes")
@@ -21,7 +21,7 @@ class MaxOneRecordingExtractor(RecordingExtractor):
     mode = 'file'
     installation_mesg = installation_mesg
 
-    def __init__(self, file_path, load_spikes=True, rec_name='rec0000'):
+    def __init__(self, file_path, load_spikes=True, rec_name='rec0000', time_map=None):
         assert self.installed, self.installation_mesg
         RecordingExtractor.__init__(self)
         self._file_path = file_path
@@ -32,9 +32,13 @@ class MaxOneRecordingExtractor(RecordingExtractor):
         self._load_spikes = load_spikes
         self._mapping = None
         self._rec_name = rec_name
+        self._time_map = None
         self._initialize()
         self._kwargs = {'file_path': str(Path(file_path).absolute()),
                         'load_spikes': load_spikes}
+        if time_map is not None:
+            # set by correct_for_missing_frames (e.g. when loading a dumped extractor)
+            self._set_time_map(time_map[0], time_map[1])
 
     def __del__(self):
         self._filehandle.close()
@@ -90,9 +94,10 @@ class MaxOneRecordingExtractor(RecordingExtractor):
         else:
             find_max_frame = False
 
-        for i_ch, ch, el in zip(routed_idxs, self._channel_ids, self._electrode_ids):
-            self.set_channel_locations([self._mapping['x'][i_ch], self._mapping['y'][i_ch]], ch)
-            self.set_channel_property(ch, 'electrode', el)
+        locations = np.column_stack((np.array(self._mapping['x'])[routed_idxs],
+                                     np.array(self._mapping['y'])[routed_idxs]))
+        self.set_channel_locations(locations, self._channel_ids)
+        self.set_channel_properties('electrode', electrodes[routed_idxs], self._channel_ids)
 
         # set gains
         self.set_channel_gains(self._lsb)
@@ -101,30 +106,7 @@ class MaxOneRecordingExtractor(RecordingExtractor):
             if 'proc0' in self._filehandle:
                 if 'spikeTimes' in self._filehandle['proc0']:
                     spikes = self._filehandle['proc0']['spikeTimes']
-
-                    spike_mask = [True] * len(spikes)
-                    for i, ch in enumerate(spikes['channel']):
-                        if ch not in self._channel_ids:
-                            spike_mask[i] = False
-                    spikes_channels = np.array(spikes['channel'])[spike_mask]
-
-                    if find_max_frame:
-                        self._num_frames = np.ptp(spikes['frameno'])
-
-                    # load activity as property
-                    activity_channels, counts = np.unique(spikes_channels, return_counts=True)
-                    # transform to spike rate
-                    duration = float(self._num_frames) / self._fs
-                    counts = counts.astype(float) / duration
-                    activity_channels = list(activity_channels)
-                    for ch in self.get_channel_ids():
-                        if ch in activity_channels:
-                            self.set_channel_property(ch, 'spike_rate', counts[activity_channels.index(ch)])
-                            spike_amplitudes = spikes[np.where(spikes['channel'] == ch)]['amplitude']
-                            self.set_channel_property(ch, 'spike_amplitude', np.median(spike_amplitudes))
-                        else:
-                            self.set_channel_property(ch, 'spike_rate', 0)
-                            self.set_channel_property(ch, 'spike_amplitude', 0)
+                    _set_spike_properties(self, spikes, find_max_frame)
 
     def get_channel_ids(self):
         return list(self._channel_ids)
@@ -138,7 +120,7 @@ class MaxOneRecordingExtractor(RecordingExtractor):
     def get_sampling_frequency(self):
         return self._fs
 
-    def correct_for_missing_frames(self, verbose=False):
+    def correct_for_missing_frames(self, verbose=False, chunk_size=1000000):
         """
         Corrects for missing frames. The correct times can be retrieved with the frame_to_time and time_to_frame
         functions.
@@ -146,35 +128,81 @@ class MaxOneRecordingExtractor(RecordingExtractor):
         ----------
         verbose: bool
             If True, output is verbose
+        chunk_size: int
+            Number of frames whose frame numbers are read at a time (default 1000000)
         """
         frame_idxs_span = self._get_frame_number(self.get_num_frames() - 1) - self._get_frame_number(0)
-        if frame_idxs_span > self.get_num_frames():
+        if frame_idxs_span > self.get_num_frames() - 1:
             if verbose:
-                print(f"Found missing frames! Correcting for it (this might take a while)")
-
-            framenos = self._get_frame_numbers()
-            # find missing frames
-            diff_frames = np.diff(framenos)
-            missing_frames_idxs = np.where(diff_frames > 1)[0]
+                print(f"Found missing frames! Correcting for it")
 
+            # find missing frames, reading the frame numbers in chunks
+            missing_frames_idxs = []
             delays_in_frames = []
-            for mf_idx in missing_frames_idxs:
-                delays_in_frames.append(diff_frames[mf_idx])
+            last_frameno = None
+            for start_frame in range(0, self.get_num_frames(), chunk_size):
+                end_frame = min(start_frame + chunk_size, self.get_num_frames())
+                framenos = self._get_frame_numbers(start_frame, end_frame)
+                offset = start_frame
+                if last_frameno is not None:
+                    # include the last frame number of the previous chunk to detect gaps across chunks
+                    framenos = np.concatenate(([last_frameno], framenos))
+                    offset -= 1
+                last_frameno = framenos[-1]
+                diff_frames = np.diff(framenos)
+                gap_idxs = np.nonzero(diff_frames > 1)[0]
+                # index of the first frame after each gap and number of missing frames
+                missing_frames_idxs.append(gap_idxs + offset + 1)
+                delays_in_frames.append(diff_frames[gap_idxs] - 1)
+            missing_frames_idxs = np.concatenate(missing_frames_idxs).astype('int64')
+            delays_in_frames = np.concatenate(delays_in_frames)
 
             if verbose:
                 print(f"Found {len(delays_in_frames)} missing intervals")
 
-            times = np.round(np.arange(self.get_num_frames()) / self.get_sampling_frequency(), 6)
-
-            for mf_idx, duration in zip(missing_frames_idxs, delays_in_frames):
-                times[mf_idx:] += np.round(duration / self.get_sampling_frequency(), 6)
-            self.set_times(times)
+            # the times of all frames from a gap onwards are delayed by the cumulative duration of the gaps
+            time_offsets = np.cumsum(np.round(delays_in_frames / self.get_sampling_frequency(), 6))
+            self._set_time_map(missing_frames_idxs, time_offsets)
         else:
             if verbose:
                 print("No missing frames found")
 
-    def _get_frame_numbers(self):
-        bitvals = self._signals[-2:, :]
+    def frame_to_time(self, frames):
+        if self._time_map is None:
+            return RecordingExtractor.frame_to_time(self, frames)
+        frames = np.asarray(frames)
+        map_frames, map_offsets, _ = self._time_map
+        segments = np.clip(np.searchsorted(map_frames, frames, side='right') - 1, 0, None)
+        return np.round(frames / self.get_sampling_frequency(), 6) + map_offsets[segments]
+
+    def time_to_frame(self, times):
+        if self._time_map is None:
+            return RecordingExtractor.time_to_frame(self, times)
+        times = np.asarray(times)
+        map_frames, map_offsets, map_times = self._time_map
+        segments = np.clip(np.searchsorted(map_times, times, side='right') - 1, 0, None)
+        # first frame at or after each time
+        frames = np.ceil(np.round((times - map_offsets[segments]) * self.get_sampling_frequency(), 6)).astype('int64')
+        # times falling in a gap are mapped to the first frame after the gap
+        next_frames = np.append(map_frames[1:], self.get_num_frames())[segments]
+        return np.clip(frames, map_frames[segments], next_frames).astype('int64')
+
+    def _get_times(self):
+        if self._time_map is None:
+            return RecordingExtractor._get_times(self)
+        return self.frame_to_time(np.arange(self.get_num_frames()))
+
+    def _set_time_map(self, missing_frames_idxs, time_offsets):
+        # piecewise time map: the frames from map_frames[i] to map_frames[i + 1] are delayed by map_offsets[i]
+        map_frames = np.append(0, missing_frames_idxs).astype('int64')
+        map_offsets = np.append(0., time_offsets).astype('float64')
+        map_times = np.round(map_frames / self.get_sampling_frequency(), 6) + map_offsets
+        self._time_map = (map_frames, map_offsets, map_times)
+        self._kwargs['time_map'] = [map_frames[1:].tolist(), map_offsets[1:].tolist()]
+
+    def _get_frame_numbers(self, start_frame=None, end_frame=None):
+        num_rows = self._signals.shape[0]
+        bitvals = self._signals[num_rows - 2:, start_frame:end_frame]
         frame_nos = np.bitwise_or(np.left_shift(bitvals[-1].astype('int64'), 16), bitvals[0])
         return frame_nos
 
@@ -248,14 +276,7 @@ class MaxOneSortingExtractor(SortingExtractor):
 
         try:
             spikes = self._filehandle['proc0']['spikeTimes']
-            for u in self._channel_ids:
-                spiketrain_idx = np.where(spikes['channel'] == u)[0]
-                if len(spiketrain_idx) > 0:
-                    self._unit_ids.append(u)
-                    spiketrain = spikes['frameno'][spiketrain_idx] - self._first_frame
-                    idxs_greater_0 = np.where(spiketrain >= 0)[0]
-                    self._spiketrains.append(spiketrain[idxs_greater_0])
-                    self.set_unit_spike_features(u, 'amplitude', spikes['amplitude'][spiketrain_idx][idxs_greater_0])
+            _load_spike_trains(self, spikes, self._first_frame)
         except:
             raise AttributeError("Spike times information are missing from the .h5 file")
 
@@ -325,39 +346,17 @@ class MaxTwoRecordingExtractor(RecordingExtractor):
         else:
             find_max_frame = False
 
-        for i_ch, ch, el in zip(routed_idxs, self._channel_ids, self._electrode_ids):
-            self.set_channel_locations([self._mapping['x'][i_ch], self._mapping['y'][i_ch]], ch)
-            self.set_channel_property(ch, 'electrode', el)
+        locations = np.column_stack((np.array(self._mapping['x'])[routed_idxs],
+                                     np.array(self._mapping['y'])[routed_idxs]))
+        self.set_channel_locations(locations, self._channel_ids)
+        self.set_channel_properties('electrode', electrodes[routed_idxs], self._channel_ids)
         # set gains
         self.set_channel_gains(self._lsb)
 
         if self._load_spikes:
             if "spikes" in self._filehandle["wells"][self._well_name][self._rec_name].keys():
                 spikes = self._filehandle["wells"][self._well_name][self._rec_name]["spikes"]
-
-                spike_mask = [True] * len(spikes)
-                for i, ch in enumerate(spikes['channel']):
-                    if ch not in self._channel_ids:
-                        spike_mask[i] = False
-                spikes_channels = np.array(spikes['channel'])[spike_mask]
-
-                if find_max_frame:
-                    self._num_frames = np.ptp(spikes['frameno'])
-
-                # load activity as property
-                activity_channels, counts = np.unique(spikes_channels, return_counts=True)
-                # transform to spike rate
-                duration = float(self._num_frames) / self._fs
-                counts = counts.astype(float) / duration
-                activity_channels = list(activity_channels)
-                for ch in self.get_channel_ids():
-                    if ch in activity_channels:
-                        self.set_channel_property(ch, 'spike_rate', counts[activity_channels.index(ch)])
-                        spike_amplitudes = spikes[np.where(spikes['channel'] == ch)]['amplitude']
-                        self.set_channel_property(ch, 'spike_amplitude', np.median(spike_amplitudes))
-                    else:
-                        self.set_channel_property(ch, 'spike_rate', 0)
-                        self.set_channel_property(ch, 'spike_amplitude', 0)
+                _set_spike_properties(self, spikes, find_max_frame)
 
     def get_channel_ids(self):
         return list(self._channel_ids)
@@ -439,14 +438,7 @@ class MaxTwoSortingExtractor(SortingExtractor):
         self._unit_ids = []
         try:
             spikes = self._filehandle["wells"][self._well_name][self._rec_name]["spikes"]
-            for u in self._channel_ids:
-                spiketrain_idx = np.where(spikes['channel'] == u)[0]
-                if len(spiketrain_idx) > 0:
-                    self._unit_ids.append(u)
-                    spiketrain = spikes['frameno'][spiketrain_idx] - self._first_frame
-                    idxs_greater_0 = np.where(spiketrain >= 0)[0]
-                    self._spiketrains.append(spiketrain[idxs_greater_0])
-                    self.set_unit_spike_features(u, 'amplitude', spikes['amplitude'][spiketrain_idx][idxs_greater_0])
+            _load_spike_trains(self, spikes, self._first_frame)
         except:
             raise AttributeError("Spike times information are missing from the .h5 file")
 
@@ -465,3 +457,55 @@ class MaxTwoSortingExtractor(SortingExtractor):
         inds = np.where((start_frame <= spiketrain) & (spiketrain < end_frame))
         return spiketrain[inds]
 
+
+def _group_spikes_by_channel(spike_channels, channel_ids):
+    # returns the indexes of the spikes of the given channels, grouped by channel in the order of channel_ids
+    # (spikes of a channel keep their order in the file), and the number of spikes of each channel
+    channel_ids = np.asarray(channel_ids)
+    sorter = np.argsort(channel_ids, kind='stable')
+    positions = np.clip(np.searchsorted(channel_ids, spike_channels, sorter=sorter), 0, len(channel_ids) - 1)
+    channel_idxs = sorter[positions]
+    spike_idxs = np.nonzero(channel_ids[channel_idxs] == spike_channels)[0]
+    channel_idxs = channel_idxs[spike_idxs]
+    order = np.argsort(channel_idxs, kind='stable')
+    return spike_idxs[order], np.bincount(channel_idxs, minlength=len(channel_ids))
+
+
+def _set_spike_properties(recording, spikes, find_max_frame):
+    # sets the 'spike_rate' and 'spike_amplitude' (median) channel properties from the detected spikes
+    spike_channels = np.array(spikes['channel'])
+    spike_idxs, counts = _group_spikes_by_channel(spike_channels, recording._channel_ids)
+
+    if find_max_frame:
+        recording._num_frames = np.ptp(spikes['frameno'])
+
+    # load activity as property (spike rate)
+    duration = float(recording._num_frames) / recording._fs
+    recording.set_channel_properties('spike_rate', counts.astype(float) / duration, recording._channel_ids)
+
+    # medians of all channels at once: amplitudes are sorted within each channel
+    amplitudes = np.array(spikes['amplitude'])[spike_idxs]
+    group_idxs = np.repeat(np.arange(len(counts)), counts)
+    amplitudes = amplitudes[np.lexsort((amplitudes, group_idxs))]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    has_spikes = counts > 0
+    spike_amplitudes = np.zeros(len(counts), dtype=amplitudes.dtype)
+    low = amplitudes[(starts + (counts - 1) // 2)[has_spikes]]
+    high = amplitudes[(starts + counts // 2)[has_spikes]]
+    spike_amplitudes[has_spikes] = (low + high) / 2
+    recording.set_channel_properties('spike_amplitude', spike_amplitudes, recording._channel_ids)
+
+
+def _load_spike_trains(sorting, spikes, first_frame):
+    # units are the channels with spikes; spikes before the first frame of the recording are discarded
+    spike_channels = np.array(spikes['channel'])
+    spike_idxs, counts = _group_spikes_by_channel(spike_channels, sorting._channel_ids)
+    spike_frames = np.array(spikes['frameno'])[spike_idxs] - first_frame
+    amplitudes = np.array(spikes['amplitude'])[spike_idxs]
+    valid = spike_frames >= 0
+    ends = np.cumsum(counts)
+    valid_ends = np.cumsum(valid)[ends - 1] if len(spike_frames) > 0 else np.zeros(len(counts), dtype='int64')
+    has_spikes = counts > 0
+    sorting._unit_ids = list(np.asarray(sorting._channel_ids)[has_spikes])
+    sorting._spiketrains = np.split(spike_frames[valid], valid_ends[has_spikes][:-1]) if np.any(has_spikes) else []
+    sorting.set_units_spike_features('amplitude', amplitudes[valid], sorting._unit_ids)
@@ -1,7 +1,7 @@
 from spikeextractors import RecordingExtractor
 import numpy as np
 from pathlib import Path
-from spikeextractors.extraction_tools import check_get_traces_args
+from spikeextractors.extraction_tools import check_get_traces_args, open_h5_dataset_with_chunk_cache, H5TracesReader
 
 try:
     import h5py
@@ -12,6 +12,21 @@ except ImportError:
 
 
 class MCSH5RecordingExtractor(RecordingExtractor):
+    """
+    RecordingExtractor from a Multi Channel Systems h5 file
+
+    Parameters
+    ----------
+    file_path: str or Path
+        Path to the h5 file
+    stream_id: int
+        The analog stream to load (default 0)
+    verbose: bool
+        If True, information about the file is printed
+    read_ahead_frames: int or None
+        If given, traces are read in blocks of at least 'read_ahead_frames' frames, which speeds up sequential
+        scans of the file in small chunks
+    """
     extractor_name = 'MCSH5Recording'
     has_default_locations = False
     has_unscaled = False
@@ -20,16 +35,17 @@ class MCSH5RecordingExtractor(RecordingExtractor):
     mode = 'file'
     installation_mesg = "To use the MCSH5RecordingExtractor install h5py: \n\n pip install h5py\n\n"  # error message when not installed
 
-    def __init__(self, file_path, stream_id=0, verbose=False):
+    def __init__(self, file_path, stream_id=0, verbose=False, read_ahead_frames=None):
         assert self.installed, self.installation_mesg
         self._recording_file = file_path
         self._verbose = verbose
+        self._read_ahead_frames = read_ahead_frames
         self._available_stream_ids = self.get_available_stream_ids()
         self.set_stream_id(stream_id)
 
         RecordingExtractor.__init__(self)
         self._kwargs = {'file_path': str(Path(file_path).absolute()), 'stream_id': stream_id,
-                        'verbose': verbose}
+                        'verbose': verbose, 'read_ahead_frames': read_ahead_frames}
 
     def __del__(self):
         self._rf.close()
@@ -53,6 +69,10 @@ class MCSH5RecordingExtractor(RecordingExtractor):
         self._rf, self._nFrames, self._samplingRate, self._nRecCh, \
         self._channel_ids, self._electrodeLabels, self._exponent, self._convFact \
             = openMCSH5File(self._recording_file, stream_id, self._verbose)
+        self._channel_idxs = {ch: i for i, ch in enumerate(self._channel_ids)}
+        stream = self._rf.require_group('/Data/Recording_0/AnalogStream/Stream_' + str(self._stream_id))
+        self._reader = H5TracesReader(open_h5_dataset_with_chunk_cache(stream, 'ChannelData', time_axis=1),
+                                      time_axis=1, read_ahead_frames=self._read_ahead_frames)
 
     def get_stream_id(self):
         assert hasattr(self, '_stream_id'), "Stream ID has not been set yet."
@@ -62,29 +82,19 @@ class MCSH5RecordingExtractor(RecordingExtractor):
         if hasattr(self, '_available_stream_ids'):
             return self._available_stream_ids
         else:
-            rf = h5py.File(self._recording_file, 'r')
-            analog_stream_names = list(rf.require_group('/Data/Recording_0/AnalogStream').keys())
+            with h5py.File(self._recording_file, 'r') as rf:
+                analog_stream_names = list(rf.require_group('/Data/Recording_0/AnalogStream').keys())
             return list(range(len(analog_stream_names)))
 
     @check_get_traces_args
     def get_traces(self, channel_ids=None, start_frame=None, end_frame=None, return_scaled=True):
         channel_idxs = []
         for m in channel_ids:
-            assert m in self._channel_ids, 'channel_id {} not found'.format(m)
-            channel_idxs.append(np.where(np.array(self._channel_ids) == m)[0][0])
+            assert m in self._channel_idxs, 'channel_id {} not found'.format(m)
+            channel_idxs.append(self._channel_idxs[m])
 
-        stream = self._rf.require_group('/Data/Recording_0/AnalogStream/Stream_' + str(self._stream_id))
         conv = self._convFact.astype(float) * (10.0 ** self._exponent)
-
-        if np.array(channel_idxs).size > 1:
-            if np.any(np.diff(channel_idxs) < 0):
-                sorted_channel_ids = np.sort(channel_idxs)
-                sorted_idx = np.array([list(sorted_channel_ids).index(ch) for ch in channel_idxs])
-                signals = stream.get('ChannelData')[sorted_channel_ids, start_frame:end_frame][sorted_idx]
-            else:
-                signals =  stream.get('ChannelData')[np.sort(channel_idxs), start_frame:end_frame]
-        else:
-            signals = stream.get('ChannelData')[np.array(channel_idxs), start_frame:end_frame]
+        signals = self._reader.read(channel_idxs, start_frame, end_frame)
         if return_scaled:
             return signals * conv
         else:
@@ -100,7 +110,7 @@ def openMCSH5File(filename, stream_id, verbose=False):
     assert stream_name in analog_stream_names, "Specified stream does not exist."
 
     stream = rf.require_group('/Data/Recording_0/AnalogStream/' + stream_name)
-    data = np.array(stream.get('ChannelData'), dtype=np.int)
+    data = stream.get('ChannelData')
     timestamps = np.array(stream.get('ChannelDataTimeStamps'))
     info = np.array(stream.get('InfoChannel'))
 
@@ -118,7 +128,6 @@ def openMCSH5File(filename, stream_id, verbose=False):
     TimeVals = np.arange(timestamps[0][0], timestamps[0][2] + 1, 1) * Tick
 
     assert Unit == b'V', 'Unexpected units found, expected volts, found {}'.format(Unit.decode('UTF-8'))
-    data_V = data * convFact.astype(float) * (10.0 ** (exponent))
 
     timestep_avg = np.mean(TimeVals[1:] - TimeVals[0:-1])
     timestep_std = np.std(TimeVals[1:] - TimeVals[0:-1])
@@ -137,6 +146,7 @@ def openMCSH5File(filename, stream_id, verbose=False):
         for key in rf.attrs.keys():
             print('# {}: {}'.format(key, rf.attrs[key]))
         print('#')
+        data_V = np.array(data) * convFact.astype(float) * (10.0 ** (exponent))
         print('# Signal range: {:.2f} to {:.2f} µV'.format(np.amin(data_V) * 1e6, np.amax(data_V) * 1e6))
         print('# Number of channels: {}'.format(nRecCh))
         print('# Number of frames: {}'.format(nFrames))
@@ -1,7 +1,7 @@
 from spikeextractors import RecordingExtractor
 from spikeextractors import SortingExtractor
 from spikeextractors.extraction_tools import write_to_binary_dat_format, check_get_traces_args, \
-    check_get_unit_spike_train
+    check_get_unit_spike_train, get_spike_train_info_from_labels
 
 import json
 import numpy as np
@@ -29,7 +29,9 @@ class MdaRecordingExtractor(RecordingExtractor):
         geom0 = dataset_directory / geom_fname
         self._geom_fname = geom0
         self._geom = np.loadtxt(self._geom_fname, delimiter=',', ndmin=2)
+        # the timeseries (raw.mda or raw.npy) is memory-mapped once: reads are slices of the memmap
         X = DiskReadMda(self._timeseries_path)
+        self._timeseries = X.memmap()
         if self._geom.shape[0] != X.N1():
             raise Exception(
                 'Incompatible dimensions between geom.csv and timeseries file {} <> {}'.format(self._geom.shape[0],
@@ -38,7 +40,8 @@ class MdaRecordingExtractor(RecordingExtractor):
         self._num_timepoints = X.N2()
         RecordingExtractor.__init__(self)
         self.set_channel_locations(self._geom)
-        self._kwargs = {'folder_path': str(Path(folder_path).absolute())}
+        self._kwargs = {'folder_path': str(Path(folder_path).absolute()), 'raw_fname': raw_fname,
+                        'params_fname': params_fname, 'geom_fname': geom_fname}
 
     def get_channel_ids(self):
         return list(range(self._num_channels))
@@ -51,13 +54,14 @@ class MdaRecordingExtractor(RecordingExtractor):
 
     @check_get_traces_args
     def get_traces(self, channel_ids=None, start_frame=None, end_frame=None, return_scaled=True):
-        X = DiskReadMda(self._timeseries_path)
-        recordings = X.readChunk(i1=0, i2=start_frame, N1=X.N1(), N2=end_frame - start_frame)
-        recordings = recordings[channel_ids, :]
-        return recordings
+        channel_idxs = np.asarray(channel_ids)
+        if len(channel_idxs) > 0 and np.all(np.diff(channel_idxs) == 1):
+            # contiguous channels: view on the memmap
+            return self._timeseries[channel_idxs[0]:channel_idxs[-1] + 1, start_frame:end_frame]
+        return self._timeseries[channel_idxs, start_frame:end_frame]
 
     def write_to_binary_dat_format(self, save_path, time_axis=0, dtype=None, chunk_size=None, chunk_mb=500,
-                                   n_jobs=1, joblib_backend='loky', verbose=False):
+                                   n_jobs=1, joblib_backend='loky', use_cache=False, verbose=False):
         """Saves the traces of this recording extractor into binary .dat format.
 
         Parameters
@@ -78,12 +82,17 @@ class MdaRecordingExtractor(RecordingExtractor):
             Number of jobs to use (Default 1)
         joblib_backend: str
             Joblib backend for parallel processing ('loky', 'threading', 'multiprocessing')
+        use_cache: bool
+            If True and n_jobs > 1, each worker loads the recording once and shares it between the chunks it
+            processes (the recording then stays loaded in the worker processes)
         verbose: bool
             If True, output is verbose
         """
-        X = DiskReadMda(self._timeseries_path)
-        header_size = X._header.header_size
-        if dtype is None or dtype == self.get_dtype():
+        # the data of an mda file (and of a Fortran-ordered npy file) is stored frame by frame, as in a .dat file
+        # with time_axis=0, so it can be copied directly
+        is_frame_major = self._timeseries.flags['F_CONTIGUOUS']
+        header_size = self._timeseries.offset
+        if (dtype is None or np.dtype(dtype) == self.get_dtype()) and time_axis == 0 and is_frame_major:
             try:
                 with open(self._timeseries_path, 'rb') as src, open(save_path, 'wb') as dst:
                     src.seek(header_size)
@@ -93,11 +102,11 @@ class MdaRecordingExtractor(RecordingExtractor):
                 print('Writing to binary')
                 write_to_binary_dat_format(self, save_path=save_path, time_axis=time_axis, dtype=dtype,
                                            chunk_size=chunk_size, chunk_mb=chunk_mb, n_jobs=n_jobs,
-                                           joblib_backend=joblib_backend, verbose=verbose)
+                                           joblib_backend=joblib_backend, use_cache=use_cache, verbose=verbose)
         else:
             write_to_binary_dat_format(self, save_path=save_path, time_axis=time_axis, dtype=dtype,
                                        chunk_size=chunk_size, chunk_mb=chunk_mb, n_jobs=n_jobs,
-                                       joblib_backend=joblib_backend, verbose=verbose)
+                                       joblib_backend=joblib_backend, use_cache=use_cache, verbose=verbose)
 
     @staticmethod
     def write_recording(recording, save_path, params=dict(), raw_fname='raw.mda', params_fname='params.json',
@@ -114,7 +123,7 @@ class MdaRecordingExtractor(RecordingExtractor):
         params: dictionary
             Dictionary with optional parameters to save metadata. Sampling frequency is appended to this dictionary.
         raw_fname: str
-            File name of raw file (default raw.mda)
+            File name of raw file (default raw.mda). If the extension is '.npy', the traces are saved in npy format
         params_fname: str
             File name of params file (default params.json)
         geom_fname: str
@@ -150,8 +159,13 @@ class MdaRecordingExtractor(RecordingExtractor):
             dtype = 'int16'
 
         with save_file_path.open('wb') as f:
-            header = MdaHeader(dt0=dtype, dims0=(num_chan, num_frames))
-            header.write(f)
+            if save_file_path.suffix == '.npy':
+                # same (frame by frame) data layout as mda files
+                np.lib.format.write_array_header_1_0(f, {'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)),
+                                                         'fortran_order': True, 'shape': (num_chan, num_frames)})
+            else:
+                header = MdaHeader(dt0=dtype, dims0=(num_chan, num_frames))
+                header.write(f)
             # takes care of the chunking
             write_to_binary_dat_format(recording, file_handle=f, dtype=dtype, n_jobs=n_jobs, chunk_size=chunk_size,
                                        chunk_mb=chunk_mb, verbose=verbose)
@@ -191,6 +205,9 @@ class MdaSortingExtractor(SortingExtractor):
             (self._labels == unit_id) & (start_frame <= self._spike_times) & (self._spike_times < end_frame))
         return np.rint(self._spike_times[inds]).astype(int)
 
+    def _compute_unit_spike_train_info(self, unit_ids):
+        return get_spike_train_info_from_labels(unit_ids, self._spike_times, self._labels)
+
     @staticmethod
     def write_sorting(sorting, save_path, write_primary_channels=False):
         unit_ids = sorting.get_unit_ids()
@@ -54,21 +54,22 @@ class DiskReadMda:
     def __init__(self, path, header=None):
         self._npy_mode = False
         self._path = path
+        self._memmap = None
         if file_extension(path) == '.npy':
-            raise Exception('DiskReadMda implementation has not been tested for npy files')
             self._npy_mode = True
             if header:
                 raise Exception('header not allowed in npy mode for DiskReadMda')
+            # the array is memory-mapped once and shared by all reads
+            self._memmap = np.load(self._path, mmap_mode='r')
         if header:
             self._header = header
             self._header.header_size = 0
-        else:
+        elif not self._npy_mode:
             self._header = _read_header(self._path)
 
     def dims(self):
         if self._npy_mode:
-            A = np.load(self._path, mmap_mode='r')
-            return A.shape
+            return self._memmap.shape
         return self._header.dims
 
     def N1(self):
@@ -82,34 +83,41 @@ class DiskReadMda:
 
     def dt(self):
         if self._npy_mode:
-            A = np.load(self._path, mmap_mode='r')
-            return npy_dtype_to_string(A.dtype)
+            return npy_dtype_to_string(self._memmap.dtype)
         return self._header.dt
 
     def numBytesPerEntry(self):
         if self._npy_mode:
-            A = np.load(self._path, mmap_mode='r')
-            return A.itemsize
+            return self._memmap.itemsize
         return self._header.num_bytes_per_entry
 
+    def memmap(self):
+        """Returns the array memory-mapped (read-only) from the file. The memmap is created once and reused"""
+        if self._memmap is None:
+            if is_url(self._path):
+                raise Exception('Unable to memory-map a remote file: ' + self._path)
+            self._memmap = np.memmap(self._path, dtype=self._header.dt, mode='r', offset=self._header.header_size,
+                                     shape=tuple(self._header.dims), order='F')
+        return self._memmap
+
     def readChunk(self, i1=-1, i2=-1, i3=-1, N1=1, N2=1, N3=1):
         # print("Reading chunk {} {} {} {} {} {}".format(i1,i2,i3,N1,N2,N3))
         if i2 < 0:
             if self._npy_mode:
-                A = np.load(self._path, mmap_mode='r')
-                return A[:, :, i1:i1 + N1]
+                if self._memmap.ndim == 1:
+                    return np.array(self._memmap[i1:i1 + N1])
+                return np.array(self._memmap.ravel(order='F')[i1:i1 + N1])
             return self._read_chunk_1d(i1, N1)
         elif i3 < 0:
             if N1 != self.N1():
                 print("Unable to support N1 {} != {}".format(N1, self.N1()))
                 return None
+            if self._npy_mode:
+                return np.array(self._memmap[:, i2:i2 + N2])
             X = self._read_chunk_1d(i1 + N1 * i2, N1 * N2)
             if X is None:
                 print('Problem reading chunk from file: ' + self._path)
                 return None
-            if self._npy_mode:
-                A = np.load(self._path, mmap_mode='r')
-                return A[:, i2:i2 + N2]
             return np.reshape(X, (N1, N2), order='F')
         else:
             if N1 != self.N1():
@@ -119,8 +127,7 @@ class DiskReadMda:
                 print("Unable to support N2 {} != {}".format(N2, self.N2()))
                 return None
             if self._npy_mode:
-                A = np.load(self._path, mmap_mode='r')
-                return A[:, :, i3:i3 + N3]
+                return np.array(self._memmap[:, :, i3:i3 + N3])
             X = self._read_chunk_1d(i1 + N1 * i2 + N1 * N2 * i3, N1 * N2 * N3)
             return np.reshape(X, (N1, N2, N3), order='F')
 
@@ -1,6 +1,7 @@
 from spikeextractors import RecordingExtractor
 from spikeextractors import SortingExtractor
-from spikeextractors.extraction_tools import check_get_traces_args, check_get_unit_spike_train
+from spikeextractors.extraction_tools import check_get_traces_args, check_get_unit_spike_train, \
+    open_h5_dataset_with_chunk_cache, H5TracesReader
 
 import numpy as np
 from pathlib import Path
@@ -28,9 +29,10 @@ class MEArecRecordingExtractor(RecordingExtractor):
     mode = 'file'
     installation_mesg = "To use the MEArec extractors, install MEArec: \n\n pip install MEArec\n\n"  # error message when not installed
 
-    def __init__(self, file_path, locs_2d=True):
+    def __init__(self, file_path, locs_2d=True, read_ahead_frames=None):
         assert self.installed, self.installed
         self._recording_path = file_path
+        self._read_ahead_frames = read_ahead_frames
         self._fs = None
         self._positions = None
         self._recordings = None
@@ -43,14 +45,20 @@ class MEArecRecordingExtractor(RecordingExtractor):
         if self._locations is not None:
             self.set_channel_locations(self._locations)
 
-        self._kwargs = {'file_path': str(Path(file_path).absolute()), 'locs_2d': locs_2d}
+        self._kwargs = {'file_path': str(Path(file_path).absolute()), 'locs_2d': locs_2d,
+                        'read_ahead_frames': read_ahead_frames}
 
     def _initialize(self):
         self._recgen = mr.load_recordings(recordings=self._recording_path, return_h5_objects=True, check_suffix=False,
                                           load=['recordings', 'channel_positions'])
         self._fs = self._recgen.info['recordings']['fs']
-        self._recordings = self._recgen.recordings
-        self._num_frames, self._num_channels = self._recordings.shape
+        self._num_frames, self._num_channels = self._recgen.recordings.shape
+        # the recordings dataset is closed and reopened with a chunk cache fitting its chunks
+        h5_file, dataset_name = self._recgen.recordings.file, self._recgen.recordings.name
+        self._recgen.recordings = None
+        self._recordings = open_h5_dataset_with_chunk_cache(h5_file, dataset_name, time_axis=0)
+        self._recgen.recordings = self._recordings
+        self._reader = H5TracesReader(self._recordings, time_axis=0, read_ahead_frames=self._read_ahead_frames)
         if len(np.array(self._recgen.channel_positions)) == self._num_channels:
             self._locations = np.array(self._recgen.channel_positions)
             if self._locs_2d:
@@ -77,15 +85,7 @@ class MEArecRecordingExtractor(RecordingExtractor):
 
     @check_get_traces_args
     def get_traces(self, channel_ids=None, start_frame=None, end_frame=None, return_scaled=True):
-        if np.any(np.diff(channel_ids) < 0):
-            sorted_channel_ids = np.sort(channel_ids)
-            sorted_idx = np.array([list(sorted_channel_ids).index(ch) for ch in channel_ids])
-            recordings = self._recordings[start_frame:end_frame, sorted_channel_ids]
-            return np.array(recordings[:, sorted_idx]).T
-        else:
-            if sorted(channel_ids) == channel_ids and np.all(np.diff(channel_ids) == 1):
-                channel_ids = slice(channel_ids[0], channel_ids[0] + len(channel_ids))
-            return np.array(self._recordings[start_frame:end_frame, channel_ids]).T
+        return self._reader.read(channel_ids, start_frame, end_frame)
         
     @staticmethod
     def write_recording(recording, save_path, check_suffix=True):
@@ -191,9 +191,10 @@ class MEArecSortingExtractor(SortingExtractor):
             # create neo spike trains
             spiketrains = []
             for u in sorting.get_unit_ids():
+                spike_train_info = sorting.get_unit_spike_train_info(u)
                 st = neo.SpikeTrain(times=sorting.get_unit_spike_train(u) / float(sampling_frequency) * pq.s,
-                                    t_start=np.min(sorting.get_unit_spike_train(u) / float(sampling_frequency)) * pq.s,
-                                    t_stop=np.max(sorting.get_unit_spike_train(u) / float(sampling_frequency)) * pq.s)
+                                    t_start=spike_train_info['first_frame'] / float(sampling_frequency) * pq.s,
+                                    t_stop=spike_train_info['last_frame'] / float(sampling_frequency) * pq.s)
                 st.annotate(unit_id=u)
                 spiketrains.append(st)
 
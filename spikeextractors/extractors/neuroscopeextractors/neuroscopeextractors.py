@@ -2,7 +2,8 @@ from spikeextractors import RecordingExtractor, MultiRecordingTimeExtractor, Sor
 from spikeextractors.extractors.bindatrecordingextractor import BinDatRecordingExtractor
 import numpy as np
 from pathlib import Path
-from spikeextractors.extraction_tools import check_get_unit_spike_train, get_sub_extractors_by_property
+from spikeextractors.extraction_tools import check_get_unit_spike_train, get_sub_extractors_by_property, \
+    make_spike_train_info, get_spike_indices_in_range
 from typing import Union, Optional
 import re
 import warnings
@@ -34,6 +35,55 @@ def get_shank_files(folder_path: Path, suffix: str):
     ]
 
 
+def read_int_text_file(file_path: PathType, cache_binary: bool = False):
+    """
+    Reads a text file with one integer per line (e.g. .res and .clu files) with a single bulk parse.
+    A ValueError is raised if a line does not hold an integer.
+
+    Parameters
+    ----------
+    file_path : PathType
+        Path to the text file.
+    cache_binary : bool
+        If True, the parsed values are saved in a binary .npz sidecar file next to the text file ('file_name.npz'),
+        which is loaded instead of parsing the text file as long as the size and modification time of the text
+        file are unchanged.
+
+    Returns
+    -------
+    values : np.array
+        The int64 values of the file.
+    """
+    file_path = Path(file_path)
+    cache_path = file_path.parent / (file_path.name + '.npz')
+    if cache_binary:
+        values = _load_int_text_cache(cache_path, file_path)
+        if values is not None:
+            return values
+    values = np.loadtxt(str(file_path), dtype='int64', ndmin=1)
+    if cache_binary:
+        try:
+            np.savez(cache_path, values=values, text_file_size=file_path.stat().st_size,
+                     text_file_mtime=file_path.stat().st_mtime_ns)
+        except OSError as e:
+            warnings.warn(f"Unable to save the binary cache of {file_path}: {e}")
+    return values
+
+
+def _load_int_text_cache(cache_path: Path, file_path: Path):
+    # returns None if the cache is missing, unreadable, or was written for a different version of the text file
+    if not cache_path.is_file():
+        return None
+    try:
+        with np.load(cache_path) as cache:
+            if cache['text_file_size'] != file_path.stat().st_size or \
+                    cache['text_file_mtime'] != file_path.stat().st_mtime_ns:
+                return None
+            return cache['values']
+    except Exception:
+        return None
+
+
 class NeuroscopeRecordingExtractor(BinDatRecordingExtractor):
     """
     Extracts raw neural recordings from binary .dat files in the neuroscope format.
@@ -324,6 +374,9 @@ class NeuroscopeSortingExtractor(SortingExtractor):
         Optional. Path to a particular .spk binary file containing waveform snippets added to the extractor as features.
     gain : float
         Optional. If passing a spkfile_path, this value converts the data type of the waveforms to units of microvolts.
+    cache_binary : bool
+        Optional. If True, the parsed .res and .clu files are cached in binary .npz files next to them, so that
+        later instantiations skip the text parsing. Defaults to False.
     """
 
     extractor_name = "NeuroscopeSortingExtractor"
@@ -339,7 +392,8 @@ class NeuroscopeSortingExtractor(SortingExtractor):
         folder_path: OptionalPathType = None,
         keep_mua_units: bool = True,
         spkfile_path: OptionalPathType = None,
-        gain: Optional[float] = None
+        gain: Optional[float] = None,
+        cache_binary: bool = False
     ):
         assert self.installed, self.installation_mesg
         assert not (folder_path is None and resfile_path is None and clufile_path is None), \
@@ -390,48 +444,52 @@ class NeuroscopeSortingExtractor(SortingExtractor):
         xml_root = et.parse(str(xml_filepath)).getroot()
         self._sampling_frequency = float(xml_root.find('acquisitionSystem').find('samplingRate').text)
 
-        with open(resfile_path) as f:
-            res = np.array([int(line) for line in f], np.int64)
-        with open(clufile_path) as f:
-            clu = np.array([int(line) for line in f], np.int64)
+        res = read_int_text_file(resfile_path, cache_binary=cache_binary)
+        clu = read_int_text_file(clufile_path, cache_binary=cache_binary)
 
         n_spikes = len(res)
+        self._unit_ids = []
+        self._spiketrains = []
+        self._spike_indexes = []
+        self._waveforms = None
         if n_spikes > 0:
             # Extract the number of unique IDs from the first line of the clufile then remove it from the list
             n_clu = clu[0]
-            clu = np.delete(clu, 0)
-            unique_ids = np.unique(clu)
+            clu = clu[1:]
+            # group spikes by cluster with a single stable sort (spike times stay sorted within each cluster)
+            spike_order = np.argsort(clu, kind='stable')
+            sorted_clu = clu[spike_order]
+            unique_ids = np.unique(sorted_clu)
             if 0 not in unique_ids:  # missing unsorted IDs
                 n_clu += 1
             if 1 not in unique_ids:  # missing mua IDs
                 n_clu += 1
 
-            self._spiketrains = []
             if keep_mua_units:
                 n_clu -= 1
                 self._unit_ids = [x + 1 for x in range(n_clu)]  # from 1,...,clu[0]-1
-                for s_id in self._unit_ids:
-                    self._spiketrains.append(res[(clu == s_id).nonzero()])
+                clu_ids = np.array(self._unit_ids)
             else:
                 n_clu -= 2
                 self._unit_ids = [x + 1 for x in range(n_clu)]  # from 1,...,clu[0]-2
-                for s_id in self._unit_ids:
-                    self._spiketrains.append(res[(clu == s_id + 1).nonzero()])  # from 2,...,clu[0]-1
+                clu_ids = np.array(self._unit_ids) + 1  # from 2,...,clu[0]-1
+            clu_starts = np.searchsorted(sorted_clu, clu_ids, side='left')
+            clu_ends = np.searchsorted(sorted_clu, clu_ids, side='right')
+            for start, end in zip(clu_starts, clu_ends):
+                self._spike_indexes.append(spike_order[start:end])
+                self._spiketrains.append(res[spike_order[start:end]])
 
         if spkfile_path is not None and Path(spkfile_path).is_file():
             n_bits = int(xml_root.find('acquisitionSystem').find('nBits').text)
             dtype = f"int{n_bits}"
             n_samples = int(xml_root.find('neuroscope').find('spikes').find('nSamples').text)
-            wf = np.moveaxis(np.memmap(spkfile_path, dtype=dtype).reshape(n_spikes, n_samples, -1), 1, -1)
+            # waveforms are gathered from the memmap when accessed
+            self._waveforms = np.moveaxis(np.memmap(spkfile_path, dtype=dtype, mode='r').reshape(n_spikes,
+                                                                                                n_samples, -1), 1, -1)
 
-            for unit_id in self.get_unit_ids():
-                if gain is not None:
+            if gain is not None:
+                for unit_id in self.get_unit_ids():
                     self.set_unit_property(unit_id=unit_id, property_name='gain', value=gain)
-                self.set_unit_spike_features(
-                    unit_id=unit_id,
-                    feature_name='waveforms',
-                    value=wf[clu == unit_id + 1 - int(keep_mua_units), :, :]
-                )
 
         if folder_path_passed:
             self._kwargs = dict(
@@ -453,6 +511,7 @@ class NeuroscopeSortingExtractor(SortingExtractor):
             self._kwargs.update(spkfile_path=str(spkfile_path.absolute()))
         else:
             self._kwargs.update(spkfile_path=spkfile_path)
+        self._kwargs.update(cache_binary=cache_binary)
 
     def get_unit_ids(self):
         return list(self._unit_ids)
@@ -462,6 +521,7 @@ class NeuroscopeSortingExtractor(SortingExtractor):
 
     def shift_unit_ids(self, shift):
         self._unit_ids = [x + shift for x in self._unit_ids]
+        self.clear_unit_spike_train_info()
 
     def add_unit(self, unit_id, spike_times):
         """This function adds a new unit with the given spike times.
@@ -473,6 +533,8 @@ class NeuroscopeSortingExtractor(SortingExtractor):
         """
         self._unit_ids.append(unit_id)
         self._spiketrains.append(spike_times)
+        self._spike_indexes.append(None)
+        self.clear_unit_spike_train_info(unit_id)
 
     @check_get_unit_spike_train
     def get_unit_spike_train(self, unit_id, start_frame=None, end_frame=None):
@@ -481,6 +543,38 @@ class NeuroscopeSortingExtractor(SortingExtractor):
         inds = np.where((start_frame <= times) & (times < end_frame))
         return times[inds]
 
+    def get_unit_spike_features(self, unit_id, feature_name, start_frame=None, end_frame=None):
+        if feature_name != 'waveforms' or self._waveforms is None or unit_id not in self.get_unit_ids() or \
+                self._spike_indexes[self.get_unit_ids().index(unit_id)] is None or \
+                feature_name in self._features.get(unit_id, {}).keys():
+            return super().get_unit_spike_features(unit_id, feature_name, start_frame=start_frame,
+                                                    end_frame=end_frame)
+        start_frame, end_frame = self._cast_start_end_frame(start_frame, end_frame)
+        if start_frame is None:
+            start_frame = 0
+        if end_frame is None:
+            end_frame = np.inf
+        unit_index = self.get_unit_ids().index(unit_id)
+        spike_indexes = self._spike_indexes[unit_index]
+        if start_frame > 0 or end_frame < np.inf:
+            spike_indexes = spike_indexes[get_spike_indices_in_range(self._spiketrains[unit_index],
+                                                                     start_frame, end_frame)]
+        return np.asarray(self._waveforms[spike_indexes])
+
+    def get_unit_spike_feature_names(self, unit_id):
+        feature_names = super().get_unit_spike_feature_names(unit_id)
+        if self._waveforms is not None and self._spike_indexes[self.get_unit_ids().index(unit_id)] is not None:
+            feature_names = sorted(set(feature_names) | {'waveforms'})
+        return feature_names
+
+    def _compute_unit_spike_train_info(self, unit_ids):
+        # .res spike times are sorted
+        spike_trains = [self._spiketrains[self.get_unit_ids().index(unit_id)] for unit_id in unit_ids]
+        num_spikes = [len(st) for st in spike_trains]
+        first_frames = [st[0] if len(st) > 0 else 0 for st in spike_trains]
+        last_frames = [st[-1] if len(st) > 0 else 0 for st in spike_trains]
+        return make_spike_train_info(unit_ids, num_spikes, first_frames, last_frames)
+
     @staticmethod
     def write_sorting(sorting: SortingExtractor, save_path: PathType):
         # if multiple groups, use the NeuroscopeMultiSortingExtactor write function
@@ -549,6 +643,9 @@ class NeuroscopeMultiSortingExtractor(MultiSortingExtractor):
         the .res.%i and .clue.%i files and sets these as unit spike features. Defaults to False.
     gain : float
         Optional. If passing a spkfile_path, this value converts the data type of the waveforms to units of microvolts.
+    cache_binary : bool
+        Optional. If True, the parsed .res.%i and .clu.%i files are cached in binary .npz files next to them, so that
+        later instantiations skip the text parsing. Defaults to False.
     """
 
     extractor_name = "NeuroscopeMultiSortingExtractor"
@@ -563,7 +660,8 @@ class NeuroscopeMultiSortingExtractor(MultiSortingExtractor):
         keep_mua_units: bool = True,
         exclude_shanks: Optional[list] = None,
         load_waveforms: bool = False,
-        gain: Optional[float] = None
+        gain: Optional[float] = None,
+        cache_binary: bool = False
     ):
         assert self.installed, self.installation_mesg
 
@@ -602,26 +700,28 @@ class NeuroscopeMultiSortingExtractor(MultiSortingExtractor):
             "Some of the .res.%i and .clu.%i files do not share the same name!"
         sorting_name = resfile_names[0]
 
+        if load_waveforms:
+            spk_files = get_shank_files(folder_path=folder_path, suffix=".spk")
+            assert len(spk_files) > 0, "No .spk files found in the folder_path, but 'write_waveforms' is True!"
+            assert len(spk_files) == len(res_files), "Mismatched number of .spk and .res files!"
+
+            spk_ids = [int(x.suffix[1:]) for x in spk_files]
+            assert sorted(spk_ids) == sorted(res_ids), "Unmatched .spk.%i and .res.%i files detected!"
+
+            spkfile_names = [x.name[:x.name.find('.spk')] for x in spk_files]
+            assert np.all(s == r for (s, r) in zip(spkfile_names, resfile_names)), \
+                "Some of the .spk.%i and .res.%i files do not share the same name!"
+
         all_shanks_list_se = []
         for shank_id in list(set(res_ids) - set(exclude_shanks)):
             nse_args = dict(
                 resfile_path=folder_path / f"{sorting_name}.res.{shank_id}",
                 clufile_path=folder_path / f"{sorting_name}.clu.{shank_id}",
-                keep_mua_units=keep_mua_units
+                keep_mua_units=keep_mua_units,
+                cache_binary=cache_binary
             )
 
             if load_waveforms:
-                spk_files = get_shank_files(folder_path=folder_path, suffix=".spk")
-                assert len(spk_files) > 0, "No .spk files found in the folder_path, but 'write_waveforms' is True!"
-                assert len(spk_files) == len(res_files), "Mismatched number of .spk and .res files!"
-
-                spk_ids = [int(x.suffix[1:]) for x in spk_files]
-                assert sorted(spk_ids) == sorted(res_ids), "Unmatched .spk.%i and .res.%i files detected!"
-
-                spkfile_names = [x.name[:x.name.find('.spk')] for x in spk_files]
-                assert np.all(s == r for (s, r) in zip(spkfile_names, resfile_names)), \
-                    "Some of the .spk.%i and .res.%i files do not share the same name!"
-
                 nse_args.update(spkfile_path=folder_path / f"{sorting_name}.spk.{shank_id}", gain=gain)
 
             all_shanks_list_se.append(NeuroscopeSortingExtractor(**nse_args))
@@ -634,7 +734,8 @@ class NeuroscopeMultiSortingExtractor(MultiSortingExtractor):
                 keep_mua_units=keep_mua_units,
                 exclude_shanks=exclude_shanks,
                 load_waveforms=load_waveforms,
-                gain=gain
+                gain=gain,
+                cache_binary=cache_binary
             )
         else:
             self._kwargs = dict(
@@ -642,7 +743,8 @@ class NeuroscopeMultiSortingExtractor(MultiSortingExtractor):
                 keep_mua_units=keep_mua_units,
                 exclude_shanks=None,
                 load_waveforms=load_waveforms,
-                gain=gain
+                gain=gain,
+                cache_binary=cache_binary
             )
 
     @staticmethod
@@ -1,6 +1,6 @@
 from spikeextractors import SortingExtractor
 from pathlib import Path
-from spikeextractors.extraction_tools import check_get_unit_spike_train
+from spikeextractors.extraction_tools import check_get_unit_spike_train, get_spike_train_info_from_labels
 import numpy as np
 
 
@@ -48,6 +48,9 @@ class NpzSortingExtractor(SortingExtractor):
             spike_times = spike_times[spike_times < end_frame]
         return spike_times.astype('int64')
 
+    def _compute_unit_spike_train_info(self, unit_ids):
+        return get_spike_train_info_from_labels(unit_ids, self.spike_indexes, self.spike_labels)
+
     @staticmethod
     def write_sorting(sorting, save_path):
         d = {}
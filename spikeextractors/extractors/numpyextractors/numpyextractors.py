@@ -2,7 +2,8 @@ from spikeextractors import RecordingExtractor
 from spikeextractors import SortingExtractor
 from pathlib import Path
 import numpy as np
-from spikeextractors.extraction_tools import check_get_traces_args, check_get_unit_spike_train, check_get_ttl_args
+from spikeextractors.extraction_tools import check_get_traces_args, check_get_unit_spike_train, check_get_ttl_args, \
+    make_spike_train_info
 
 """
 The NumpyExtractors can be constructed and used to encapsulate custom file formats and data structures which
@@ -139,6 +140,7 @@ class NumpySortingExtractor(SortingExtractor):
             An array of spike times (in frames).
         """
         self._units[unit_id] = dict(times=times)
+        self.clear_unit_spike_train_info(unit_id)
 
     def get_unit_ids(self):
         return list(self._units.keys())
@@ -148,3 +150,27 @@ class NumpySortingExtractor(SortingExtractor):
         times = self._units[unit_id]['times']
         inds = np.where((start_frame <= times) & (times < end_frame))[0]
         return np.rint(times[inds]).astype(int)
+
+    def _compute_unit_spike_train_info(self, unit_ids):
+        num_spikes = [len(self._units[unit_id]['times']) for unit_id in unit_ids]
+        first_frames = [np.rint(np.min(self._units[u]['times'])) if n > 0 else 0 for u, n in zip(unit_ids, num_spikes)]
+        last_frames = [np.rint(np.max(self._units[u]['times'])) if n > 0 else 0 for u, n in zip(unit_ids, num_spikes)]
+        return make_spike_train_info(unit_ids, num_spikes, first_frames, last_frames)
+
+    def _get_unit_spike_indices_in_range(self, unit_id, start_frame, end_frame):
+        times = self._units[unit_id]['times']
+        if unit_id not in self._unit_spike_train_sorted.keys():
+            self._unit_spike_train_sorted[unit_id] = bool(np.all(times[1:] >= times[:-1]))
+        if not self._unit_spike_train_sorted[unit_id]:
+            return SortingExtractor._get_unit_spike_indices_in_range(self, unit_id, start_frame, end_frame)
+        # binary search on the stored times, for the spikes whose rounded frame is in the range
+        return slice(_first_rounded_index(times, start_frame), _first_rounded_index(times, end_frame))
+
+
+def _first_rounded_index(times, frame):
+    # index of the first of the sorted times whose rounded value is greater or equal than frame
+    idx = int(np.searchsorted(times, frame - 0.5, side='left'))
+    if idx < len(times) and np.rint(times[idx]) < frame:
+        # times equal to frame - 0.5 rounded down (to even)
+        idx = int(np.searchsorted(times, frame - 0.5, side='right'))
+    return idx
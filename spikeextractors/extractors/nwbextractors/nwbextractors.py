@@ -1,3 +1,4 @@
+import os
 import uuid
 from datetime import datetime
 from collections import abc
@@ -6,9 +7,10 @@ import numpy as np
 import distutils.version
 from typing import Union, List, Optional
 import warnings
+import weakref
 
 import spikeextractors as se
-from spikeextractors.extraction_tools import check_get_traces_args, check_get_unit_spike_train
+from spikeextractors.extraction_tools import check_get_traces_args, check_get_unit_spike_train, make_spike_train_info
 
 try:
     import pandas as pd
@@ -17,8 +19,11 @@ try:
     from pynwb import NWBFile
     from pynwb.ecephys import ElectricalSeries, FilteredEphys, LFP
     from pynwb.ecephys import ElectrodeGroup
+    from pynwb.misc import Units
+    from hdmf.common import VectorData, VectorIndex
     from hdmf.data_utils import DataChunkIterator
     from hdmf.backends.hdf5.h5_utils import H5DataIO
+    import h5py
 
     HAVE_NWB = True
 except ModuleNotFoundError:
@@ -74,6 +79,13 @@ def set_dynamic_table_property(dynamic_table, row_ids, property_name, values, in
             )
 
 
+def _data_io(data, compression=None):
+    # wraps the data of a column to be chunked and compressed in the HDF5 file
+    if compression is None or len(data) == 0:
+        return data
+    return H5DataIO(data, compression=compression, chunks=True)
+
+
 def get_dynamic_table_property(dynamic_table, *, row_ids=None, property_name):
     all_row_ids = list(dynamic_table.id[:])
     if row_ids is None:
@@ -159,6 +171,59 @@ def check_module(nwbfile, name: str, description: str = None):
         return nwbfile.create_processing_module(name, description)
 
 
+# handles open in this process, closed before writing to their file
+_open_file_handles = weakref.WeakSet()
+
+
+class _NwbFileHandle:
+    """Read-only h5py handle of an NWB file, opened on first use and kept open.
+
+    pynwb is only used to parse the metadata when an extractor is instantiated: traces and spike trains are read
+    directly from the HDF5 datasets. The handle is re-opened in forked child processes and after unpickling.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._file = None
+        self._datasets = {}
+        self._pid = None
+
+    def get_dataset(self, dataset_path):
+        if self._file is None or self._pid != os.getpid():
+            # handles inherited from a parent process are dropped without closing them
+            self._file = h5py.File(self.file_path, 'r')
+            self._datasets = {}
+            self._pid = os.getpid()
+            _open_file_handles.add(self)
+        if dataset_path not in self._datasets:
+            self._datasets[dataset_path] = self._file[dataset_path]
+        return self._datasets[dataset_path]
+
+    def close(self):
+        if self._file is not None and self._pid == os.getpid():
+            self._file.close()
+        self._file = None
+        self._datasets = {}
+        _open_file_handles.discard(self)
+
+    def __del__(self):
+        self.close()
+
+    def __getstate__(self):
+        return {'file_path': self.file_path}
+
+    def __setstate__(self, state):
+        self.__init__(state['file_path'])
+
+
+def _close_file_handles(file_path):
+    # extractors reading the file re-open it on their next read
+    file_path = Path(file_path).absolute()
+    for file_handle in list(_open_file_handles):
+        if Path(file_handle.file_path).absolute() == file_path:
+            file_handle.close()
+
+
 class NwbRecordingExtractor(se.RecordingExtractor):
     """Primary class for interfacing between NWBFiles and RecordingExtractors."""
 
@@ -219,6 +284,11 @@ class NwbRecordingExtractor(se.RecordingExtractor):
             # Fill channel properties dictionary from electrodes table
             self.channel_ids = [es.electrodes.table.id[x] for x in es.electrodes.data]
 
+            # traces are read directly from the HDF5 dataset (which can be in an external file)
+            self._file_handle = _NwbFileHandle(es.data.file.filename)
+            self._es_data_path = es.data.name
+            self._channel_inds_map = {channel_id: i for i, channel_id in enumerate(self.channel_ids)}
+
             # If gains are not 1, set has_scaled to True
             if np.any(gains != 1):
                 self.set_channel_gains(gains)
@@ -311,24 +381,15 @@ class NwbRecordingExtractor(se.RecordingExtractor):
         end_frame: int = None,
         return_scaled: bool = True
     ):
-        with NWBHDF5IO(self._path, 'r') as io:
-            nwbfile = io.read()
-            es = nwbfile.acquisition[self._electrical_series_name]
-            es_channel_ids = np.array(es.electrodes.table.id[:])[es.electrodes.data[:]].tolist()
-            channel_inds = [es_channel_ids.index(id) for id in channel_ids]
-            if np.array(channel_ids).size > 1 and np.any(np.diff(channel_ids) < 0):
-                # get around h5py constraint that it does not allow datasets
-                # to be indexed out of order
-                sorted_channel_ids = np.sort(channel_ids)
-                sorted_idx = np.array([list(sorted_channel_ids).index(ch) for ch in channel_ids])
-                recordings = es.data[start_frame:end_frame, sorted_channel_ids].T
-                traces = recordings[sorted_idx, :]
-            else:
-                traces = es.data[start_frame:end_frame, channel_inds].T
-            # This DatasetView and lazy operations will only work within context
-            # We're keeping the non-lazy version for now
-            # es_view = DatasetView(es.data)  # es is an instantiated h5py dataset
-            # traces = es_view.lazy_slice[start_frame:end_frame, channel_ids].lazy_transpose()
+        es_data = self._file_handle.get_dataset(self._es_data_path)
+        channel_inds = np.array([self._channel_inds_map[ch] for ch in channel_ids], dtype='int64')
+        if len(channel_inds) > 0 and np.array_equal(channel_inds, np.arange(channel_inds[0],
+                                                                             channel_inds[0] + len(channel_inds))):
+            traces = es_data[start_frame:end_frame, channel_inds[0]:channel_inds[0] + len(channel_inds)].T
+        else:
+            # h5py only allows reading increasing indexes
+            unique_inds, inverse = np.unique(channel_inds, return_inverse=True)
+            traces = es_data[start_frame:end_frame, unique_inds].T[inverse]
         return traces
 
     def get_sampling_frequency(self):
@@ -1046,6 +1107,7 @@ class NwbRecordingExtractor(se.RecordingExtractor):
             else:
                 read_mode = 'w'
 
+            _close_file_handles(save_path)
             with NWBHDF5IO(str(save_path), mode=read_mode) as io:
                 if read_mode == 'r+':
                     nwbfile = io.read()
@@ -1160,6 +1222,13 @@ class NwbSortingExtractor(se.SortingExtractor):
             # get all units ids
             units_ids = nwbfile.units.id[:]
 
+            # spike trains are read directly from the HDF5 datasets, using the spike_times_index offsets
+            spike_times_index = nwbfile.units['spike_times_index']
+            self._file_handle = _NwbFileHandle(spike_times_index.target.data.file.filename)
+            self._spike_times_path = spike_times_index.target.data.name
+            self._unit_inds = {int(u_id): i for i, u_id in enumerate(units_ids)}
+            self._end_offsets = np.array(spike_times_index.data[:], dtype='int64')
+
             # store units properties and spike features to dictionaries
             all_pr_ft = list(nwbfile.units.colnames)
             all_names = [i.name for i in nwbfile.units.columns]
@@ -1204,22 +1273,35 @@ class NwbSortingExtractor(se.SortingExtractor):
             A list of the unit ids in the sorted result (ints).
         """
         check_nwb_install()
-        with NWBHDF5IO(self._path, 'r') as io:
-            nwbfile = io.read()
-            unit_ids = [int(i) for i in nwbfile.units.id[:]]
-        return unit_ids
+        return list(self._unit_inds.keys())
 
     @check_get_unit_spike_train
     def get_unit_spike_train(self, unit_id, start_frame=None, end_frame=None):
 
         check_nwb_install()
-        with NWBHDF5IO(self._path, 'r') as io:
-            nwbfile = io.read()
-            # chosen unit and interval
-            times = nwbfile.units['spike_times'][list(nwbfile.units.id[:]).index(unit_id)][:]
-            # spike times are measured in samples
-            frames = self.time_to_frame(times)
-        return frames[(frames > start_frame) & (frames < end_frame)]
+        ind = self._unit_inds[unit_id]
+        start = self._end_offsets[ind - 1] if ind > 0 else 0
+        # spike times are measured in samples
+        frames = self.time_to_frame(self._file_handle.get_dataset(self._spike_times_path)[start:self._end_offsets[ind]])
+        # start_frame is inclusive, as in the other sorting extractors
+        return frames[(frames >= start_frame) & (frames < end_frame)]
+
+    def _compute_unit_spike_train_info(self, unit_ids):
+        check_nwb_install()
+        # the spike_times_index stores the end offset of each unit in the spike_times column
+        end_offsets = self._end_offsets
+        start_offsets = np.concatenate(([0], end_offsets[:-1])).astype('int64')
+        num_spikes = end_offsets - start_offsets
+        first_frames = np.zeros(len(end_offsets), dtype='int64')
+        last_frames = np.zeros(len(end_offsets), dtype='int64')
+        non_empty = np.nonzero(num_spikes > 0)[0]
+        if len(non_empty) > 0:
+            # spike times are not necessarily sorted: reduce the spike times of all units in one read
+            frames = self.time_to_frame(self._file_handle.get_dataset(self._spike_times_path)[:end_offsets[-1]])
+            first_frames[non_empty] = np.minimum.reduceat(frames, start_offsets[non_empty])
+            last_frames[non_empty] = np.maximum.reduceat(frames, start_offsets[non_empty])
+        inds = [self._unit_inds[unit_id] for unit_id in unit_ids]
+        return make_spike_train_info(unit_ids, num_spikes[inds], first_frames[inds], last_frames[inds])
 
     @staticmethod
     def write_units(
@@ -1228,18 +1310,22 @@ class NwbSortingExtractor(se.SortingExtractor):
             property_descriptions: Optional[dict] = None,
             skip_properties: Optional[List[str]] = None,
             skip_features: Optional[List[str]] = None,
-            use_times: bool = True
+            use_times: bool = True,
+            compression: Optional[str] = None
     ):
-        """Auxilliary function for write_sorting."""
-        unit_ids = sorting.get_unit_ids()
+        """Auxilliary function for write_sorting.
+
+        Unit properties missing for some units are filled with NaN: numerical properties (including integer and
+        boolean ones) missing for some units are therefore written as float64.
+        """
+        unit_ids = list(sorting.get_unit_ids())
         fs = sorting.get_sampling_frequency()
         if fs is None:
             raise ValueError("Writing a SortingExtractor to an NWBFile requires a known sampling frequency!")
 
-        all_properties = set()
+        all_properties = set(sorting._get_units_property_names(unit_ids))
         all_features = set()
         for unit_id in unit_ids:
-            all_properties.update(sorting.get_unit_property_names(unit_id))
             all_features.update(sorting.get_unit_spike_feature_names(unit_id))
 
         default_descriptions = dict(
@@ -1262,61 +1348,71 @@ class NwbSortingExtractor(se.SortingExtractor):
             skip_features = []
 
         if nwbfile.units is None:
-            # Check that array properties have the same shape across units
-            property_shapes = dict()
-            for pr in all_properties:
-                shapes = []
-                for unit_id in unit_ids:
-                    if pr in sorting.get_unit_property_names(unit_id):
-                        prop_value = sorting.get_unit_property(unit_id, pr)
-                        if isinstance(prop_value, (int, np.integer, float, np.float, str, bool)):
-                            shapes.append(1)
-                        elif isinstance(prop_value, (list, np.ndarray)):
-                            if np.array(prop_value).ndim == 1:
-                                shapes.append(len(prop_value))
-                            else:
-                                shapes.append(np.array(prop_value).shape)
-                        elif isinstance(prop_value, dict):
-                            print(f"Skipping property '{pr}' because dictionaries are not supported.")
-                            skip_properties.append(pr)
-                            break
-                    else:
-                        shapes.append(np.nan)
-                property_shapes[pr] = shapes
-
-            for pr in property_shapes.keys():
-                elems = [elem for elem in property_shapes[pr] if not np.any(np.isnan(elem))]
-                if not np.all([elem == elems[0] for elem in elems]):
-                    print(f"Skipping property '{pr}' because it has variable size across units.")
-                    skip_properties.append(pr)
+            # Build the property columns, with NaN for units missing a property
+            property_columns = dict()
+            for pr in sorted(all_properties - set(skip_properties)):
+                values, mask = sorting._get_units_property_column(pr, unit_ids)
+                present_values = values[mask]
+                if values.dtype.kind == 'O':
+                    if any(isinstance(value, dict) for value in present_values):
+                        print(f"Skipping property '{pr}' because dictionaries are not supported.")
+                        skip_properties.append(pr)
+                        continue
+                    if len(set(np.shape(value) for value in present_values)) > 1:
+                        print(f"Skipping property '{pr}' because it has variable size across units.")
+                        skip_properties.append(pr)
+                        continue
+                    present_values = np.array(list(present_values))
+                if np.all(mask):
+                    property_columns[pr] = present_values
+                elif present_values.dtype.kind in 'biuf':
+                    column = np.full((len(unit_ids),) + present_values.shape[1:], np.nan)
+                    column[mask] = present_values
+                    property_columns[pr] = column
+                else:
+                    column = np.full(len(unit_ids), np.nan, dtype='object')
+                    column[np.nonzero(mask)[0]] = list(present_values)
+                    property_columns[pr] = column
 
-            write_properties = set(all_properties) - set(skip_properties)
+            write_properties = list(property_columns.keys())
             for pr in write_properties:
                 if pr not in property_descriptions:
                     warnings.warn(
                         f"Description for property {pr} not found in property_descriptions. "
                         "Setting description to 'no description'"
                     )
+
+            # Build the spike_times column and its index for all units at once
+            spike_trains = sorting.get_units_spike_train(unit_ids=unit_ids)
+            if len(spike_trains) > 0:
+                frames = np.concatenate(spike_trains)
+            else:
+                frames = np.array([], dtype='int64')
+            if use_times:
+                spike_times = sorting.frame_to_time(frames)
+            else:
+                spike_times = frames / sorting.get_sampling_frequency()
+            end_offsets = np.cumsum([len(spike_train) for spike_train in spike_trains], dtype='int64')
+            spike_times_column = VectorData(
+                name='spike_times',
+                description='the spike times for each unit',
+                data=_data_io(np.asarray(spike_times, dtype='float64'), compression)
+            )
+            spike_times_index = VectorIndex(name='spike_times_index', data=end_offsets, target=spike_times_column)
+            nwbfile.units = Units(
+                name='units',
+                description='Autogenerated by NWBFile',
+                id=[int(unit_id) for unit_id in unit_ids],
+                columns=[spike_times_column, spike_times_index]
+            )
+
             for pr in write_properties:
-                unit_col_args = dict(name=pr, description=property_descriptions.get(pr, "No description."))
+                unit_col_args = dict(name=pr, description=property_descriptions.get(pr, "No description."),
+                                     data=property_columns[pr])
                 if pr in ['max_channel', 'max_electrode'] and nwbfile.electrodes is not None:
                     unit_col_args.update(table=nwbfile.electrodes)
                 nwbfile.add_unit_column(**unit_col_args)
 
-            for unit_id in unit_ids:
-                unit_kwargs = dict()
-                if use_times:
-                    spkt = sorting.frame_to_time(sorting.get_unit_spike_train(unit_id=unit_id))
-                else:
-                    spkt = sorting.get_unit_spike_train(unit_id=unit_id) / sorting.get_sampling_frequency()
-                for pr in write_properties:
-                    if pr in sorting.get_unit_property_names(unit_id):
-                        prop_value = sorting.get_unit_property(unit_id, pr)
-                        unit_kwargs.update({pr: prop_value})
-                    else:  # Case of missing data for this unit and this property
-                        unit_kwargs.update({pr: np.nan})
-                nwbfile.add_unit(id=int(unit_id), spike_times=spkt, **unit_kwargs)
-
             # TODO
             # # Stores average and std of spike traces
             # This will soon be updated to the current NWB standard
@@ -1335,67 +1431,38 @@ class NwbSortingExtractor(se.SortingExtractor):
             #         waveform_sd=traces_std
             #     )
 
-            # Check that multidimensional features have the same shape across units
-            feature_shapes = dict()
-            for ft in all_features:
-                shapes = []
-                for unit_id in unit_ids:
-                    if ft in sorting.get_unit_spike_feature_names(unit_id):
-                        feat_value = sorting.get_unit_spike_features(unit_id, ft)
-                        if isinstance(feat_value[0], (int, np.integer, float, np.float, str, bool)):
-                            break
-                        elif isinstance(feat_value[0], (list, np.ndarray)):  # multidimensional features
-                            if np.array(feat_value).ndim > 1:
-                                shapes.append(np.array(feat_value).shape)
-                                feature_shapes[ft] = shapes
-                        elif isinstance(feat_value[0], dict):
-                            print(f"Skipping feature '{ft}' because dictionaries are not supported.")
-                            skip_features.append(ft)
-                            break
-                    else:
-                        print(f"Skipping feature '{ft}' because not share across all units.")
-                        skip_features.append(ft)
-                        break
-
-            nspikes = {k: get_nspikes(nwbfile.units, int(k)) for k in unit_ids}
-
-            for ft in feature_shapes.keys():
-                # skip first dimension (num_spikes) when comparing feature shape
-                if not np.all([elem[1:] == feature_shapes[ft][0][1:] for elem in feature_shapes[ft]]):
-                    print(f"Skipping feature '{ft}' because it has variable size across units.")
+            # features of all units are exported as a single flat array with the spike index
+            unit_feature_names = [set(sorting.get_unit_spike_feature_names(unit_id)) for unit_id in unit_ids]
+            for ft in sorted(set(all_features) - set(skip_features)):
+                if ft.endswith('_idxs'):
+                    continue
+                if not all(ft in feature_names for feature_names in unit_feature_names):
+                    print(f"Skipping feature '{ft}' because not share across all units.")
                     skip_features.append(ft)
-
-            for ft in set(all_features) - set(skip_features):
-                values = []
-                if not ft.endswith('_idxs'):
-                    for unit_id in sorting.get_unit_ids():
-                        feat_vals = sorting.get_unit_spike_features(unit_id, ft)
-
-                        if len(feat_vals) < nspikes[unit_id]:
-                            skip_features.append(ft)
-                            print(f"Skipping feature '{ft}' because it is not defined for all spikes.")
-                            break
-                            # this means features are available for a subset of spikes
-                            # all_feat_vals = np.array([np.nan] * nspikes[unit_id])
-                            # feature_idxs = sorting.get_unit_spike_features(unit_id, feat_name + '_idxs')
-                            # all_feat_vals[feature_idxs] = feat_vals
-                        else:
-                            all_feat_vals = feat_vals
-                        values.append(all_feat_vals)
-
-                    flatten_vals = [item for sublist in values for item in sublist]
-                    nspks_list = [sp for sp in nspikes.values()]
-                    spikes_index = np.cumsum(nspks_list).astype('int64')
-                    if ft in nwbfile.units:  # If property already exists, skip it
-                        warnings.warn(f'Feature {ft} already present in units table, skipping it')
-                        continue
-                    set_dynamic_table_property(
-                        dynamic_table=nwbfile.units,
-                        row_ids=[int(k) for k in unit_ids],
-                        property_name=ft,
-                        values=flatten_vals,
-                        index=spikes_index,
-                    )
+                    continue
+                try:
+                    flatten_vals, offsets = sorting.get_units_spike_features_array(ft, unit_ids=unit_ids)
+                except ValueError:
+                    # the features of some spikes are missing, or multidimensional features have a different
+                    # shape across units (they cannot be concatenated)
+                    print(f"Skipping feature '{ft}' because it is not defined for all spikes or it has variable "
+                          f"size across units.")
+                    skip_features.append(ft)
+                    continue
+                if flatten_vals.dtype.kind == 'O' and len(flatten_vals) > 0 and isinstance(flatten_vals[0], dict):
+                    print(f"Skipping feature '{ft}' because dictionaries are not supported.")
+                    skip_features.append(ft)
+                    continue
+                if ft in nwbfile.units:  # If property already exists, skip it
+                    warnings.warn(f'Feature {ft} already present in units table, skipping it')
+                    continue
+                set_dynamic_table_property(
+                    dynamic_table=nwbfile.units,
+                    row_ids=[int(k) for k in unit_ids],
+                    property_name=ft,
+                    values=_data_io(flatten_vals, compression),
+                    index=offsets[1:],
+                )
         else:
             warnings.warn("The nwbfile already contains units. These units will not be over-written.")
 
@@ -1409,6 +1476,7 @@ class NwbSortingExtractor(se.SortingExtractor):
             skip_properties: Optional[List[str]] = None,
             skip_features: Optional[List[str]] = None,
             use_times: bool = True,
+            compression: Optional[str] = None,
             **nwbfile_kwargs
     ):
         """
@@ -1439,6 +1507,9 @@ class NwbSortingExtractor(se.SortingExtractor):
         use_times: bool (optional, defaults to False)
             If True, the times are saved to the nwb file using sorting.frame_to_time(). If False (defualut),
             the sampling rate is used.
+        compression: str or None
+            HDF5 compression filter (e.g. 'gzip') of the spike times and spike features. If not None, the
+            datasets are also chunked. Default is None (no compression)
         nwbfile_kwargs: dict
             Information for constructing the nwb file (optional).
             Only used if no nwbfile exists at the save_path, and no nwbfile
@@ -1456,6 +1527,7 @@ class NwbSortingExtractor(se.SortingExtractor):
             else:
                 read_mode = 'w'
 
+            _close_file_handles(save_path)
             with NWBHDF5IO(str(save_path), mode=read_mode) as io:
                 if read_mode == 'r+':
                     nwbfile = io.read()
@@ -1473,7 +1545,8 @@ class NwbSortingExtractor(se.SortingExtractor):
                     property_descriptions=property_descriptions,
                     skip_properties=skip_properties,
                     skip_features=skip_features,
-                    use_times=use_times
+                    use_times=use_times,
+                    compression=compression
                 )
                 io.write(nwbfile)
         else:
@@ -1483,5 +1556,6 @@ class NwbSortingExtractor(se.SortingExtractor):
                 property_descriptions=property_descriptions,
                 skip_properties=skip_properties,
                 skip_features=skip_features,
-                use_times=use_times
+                use_times=use_times,
+                compression=compression
             )
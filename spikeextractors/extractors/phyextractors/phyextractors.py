@@ -5,7 +5,8 @@ from typing import Union, Optional
 
 from spikeextractors import SortingExtractor, RecordingExtractor
 from spikeextractors.extractors.bindatrecordingextractor import BinDatRecordingExtractor
-from spikeextractors.extraction_tools import read_python, check_get_unit_spike_train
+from spikeextractors.extraction_tools import read_python, check_get_unit_spike_train, make_spike_train_info, \
+    get_spike_indices_in_range
 
 PathType = Union[str, Path]
 
@@ -81,27 +82,32 @@ class PhySortingExtractor(SortingExtractor):
         SortingExtractor.__init__(self)
         phy_folder = Path(folder_path)
 
-        spike_times = np.load(phy_folder / 'spike_times.npy')
-        spike_templates = np.load(phy_folder / 'spike_templates.npy')
+        # large arrays are memory-mapped: features are only read when accessed
+        spike_times = np.load(phy_folder / 'spike_times.npy', mmap_mode='r')
 
         if (phy_folder / 'spike_clusters.npy').is_file():
             spike_clusters = np.load(phy_folder / 'spike_clusters.npy')
         else:
-            spike_clusters = spike_templates
+            spike_clusters = np.load(phy_folder / 'spike_templates.npy')
+        spike_clusters = spike_clusters.ravel()
 
+        self._spike_features = {}
         if (phy_folder / 'amplitudes.npy').is_file():
-            amplitudes = np.squeeze(np.load(phy_folder / 'amplitudes.npy'))
+            self._spike_features['amplitudes'] = np.squeeze(np.load(phy_folder / 'amplitudes.npy', mmap_mode='r'))
         else:
-            amplitudes = np.ones(len(spike_times))
+            self._spike_features['amplitudes'] = None
 
         if (phy_folder / 'pc_features.npy').is_file():
-            pc_features = np.squeeze(np.load(phy_folder / 'pc_features.npy'))
-        else:
-            pc_features = None
-
-        clust_id = np.unique(spike_clusters)
+            self._spike_features['pc_features'] = np.squeeze(np.load(phy_folder / 'pc_features.npy',
+                                                                     mmap_mode='r'))
+
+        # group spikes by cluster with a single stable sort (spikes keep their file order within each cluster)
+        spike_order = np.argsort(spike_clusters, kind='stable')
+        sorted_clusters = spike_clusters[spike_order]
+        clust_id = np.unique(sorted_clusters)
+        cluster_starts = np.searchsorted(sorted_clusters, clust_id, side='left')
+        cluster_ends = np.searchsorted(sorted_clusters, clust_id, side='right')
         self._unit_ids = list(clust_id)
-        spike_times.astype(int)
         self.params = read_python(str(phy_folder / 'params.py'))
         self._sampling_frequency = self.params['sample_rate']
 
@@ -161,16 +167,15 @@ class PhySortingExtractor(SortingExtractor):
         else:
             included_units = self._unit_ids
 
-        original_units = self._unit_ids
         self._unit_ids = included_units
-        # set features
+        # spike trains of all units are read at once, while features are gathered from the memmaps on access
+        sorted_spike_times = np.asarray(spike_times[spike_order]).ravel()
         self._spiketrains = []
+        self._spike_indexes = []
         for clust in self._unit_ids:
-            idx = np.where(spike_clusters == clust)[0]
-            self._spiketrains.append(spike_times[idx])
-            self.set_unit_spike_features(clust, 'amplitudes', amplitudes[idx])
-            if pc_features is not None:
-                self.set_unit_spike_features(clust, 'pc_features', pc_features[idx])
+            i = np.searchsorted(clust_id, clust)
+            self._spiketrains.append(sorted_spike_times[cluster_starts[i]:cluster_ends[i]])
+            self._spike_indexes.append(spike_order[cluster_starts[i]:cluster_ends[i]])
 
         self._kwargs = {'folder_path': str(Path(folder_path).absolute()),
                         'exclude_cluster_groups': exclude_cluster_groups}
@@ -183,3 +188,41 @@ class PhySortingExtractor(SortingExtractor):
         times = self._spiketrains[self.get_unit_ids().index(unit_id)]
         inds = np.where((start_frame <= times) & (times < end_frame))
         return times[inds]
+
+    def get_unit_spike_features(self, unit_id, feature_name, start_frame=None, end_frame=None):
+        if feature_name not in self._spike_features.keys() or unit_id not in self.get_unit_ids() or \
+                feature_name in self._features.get(unit_id, {}).keys():
+            return super().get_unit_spike_features(unit_id, feature_name, start_frame=start_frame,
+                                                    end_frame=end_frame)
+        start_frame, end_frame = self._cast_start_end_frame(start_frame, end_frame)
+        if start_frame is None:
+            start_frame = 0
+        if end_frame is None:
+            end_frame = np.inf
+        unit_index = self.get_unit_ids().index(unit_id)
+        spike_indexes = self._spike_indexes[unit_index]
+        if start_frame > 0 or end_frame < np.inf:
+            spike_indexes = spike_indexes[self._get_unit_spike_indices_in_range(unit_id, start_frame, end_frame)]
+        if self._spike_features[feature_name] is None:
+            return np.ones(len(spike_indexes))
+        else:
+            return np.asarray(self._spike_features[feature_name][spike_indexes])
+
+    def get_unit_spike_feature_names(self, unit_id):
+        feature_names = super().get_unit_spike_feature_names(unit_id)
+        return sorted(set(feature_names) | set(self._spike_features.keys()))
+
+    def _get_unit_spike_indices_in_range(self, unit_id, start_frame, end_frame):
+        times = self._spiketrains[self.get_unit_ids().index(unit_id)]
+        if unit_id not in self._unit_spike_train_sorted.keys():
+            self._unit_spike_train_sorted[unit_id] = bool(np.all(times[1:] >= times[:-1]))
+        return get_spike_indices_in_range(times, start_frame, end_frame,
+                                          is_sorted=self._unit_spike_train_sorted[unit_id])
+
+    def _compute_unit_spike_train_info(self, unit_ids):
+        spike_trains = [self._spiketrains[self.get_unit_ids().index(unit_id)] for unit_id in unit_ids]
+        num_spikes = [len(st) for st in spike_trains]
+        # spike_times.npy is not required to be sorted
+        first_frames = [np.min(st) if len(st) > 0 else 0 for st in spike_trains]
+        last_frames = [np.max(st) if len(st) > 0 else 0 for st in spike_trains]
+        return make_spike_train_info(unit_ids, num_spikes, first_frames, last_frames)
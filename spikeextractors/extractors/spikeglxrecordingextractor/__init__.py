@@ -1 +1 @@
-from .spikeglxrecordingextractor import SpikeGLXRecordingExtractor
+from .spikeglxrecordingextractor import SpikeGLXRecordingExtractor, SpikeGLXMultiRecordingExtractor
@@ -1,8 +1,9 @@
-from .readSGLX import readMeta, SampRate, makeMemMapRaw, GainCorrectIM, GainCorrectNI, ExtractDigital
+from .readSGLX import readMeta, SampRate, makeMemMapRaw, GainCorrectIM, GainCorrectNI, ChannelCountsIM, \
+    ChannelCountsNI
 import numpy as np
 from pathlib import Path
 
-from spikeextractors import RecordingExtractor
+from spikeextractors import RecordingExtractor, MultiRecordingTimeExtractor
 from spikeextractors.extraction_tools import check_get_traces_args, check_get_ttl_args
 import re
 
@@ -107,6 +108,7 @@ class SpikeGLXRecordingExtractor(RecordingExtractor):
 
         # set gains - convert from int16 to uVolt
         self.set_channel_gains(gains=gains*1e6, channel_ids=self._channels)
+        self._ttl_index = None
         self._kwargs = {'file_path': str(Path(file_path).absolute()),
                         'x_pitch': x_pitch, 'y_pitch': y_pitch}
 
@@ -135,20 +137,207 @@ class SpikeGLXRecordingExtractor(RecordingExtractor):
 
     @check_get_ttl_args
     def get_ttl_events(self, start_frame=None, end_frame=None, channel_id=0):
-        channel = [channel_id]
-        dw = 0
-        dig = ExtractDigital(self._raw, firstSamp=start_frame, lastSamp=end_frame, dwReq=dw, dLineList=channel,
-                             meta=self._meta)
-        dig = np.squeeze(dig)
-        diff_dig = np.diff(dig.astype(int))
-
-        rising = np.where(diff_dig > 0)[0] + start_frame
-        falling = np.where(diff_dig < 0)[0] + start_frame
-
-        ttl_frames = np.concatenate((rising, falling))
-        ttl_states = np.array([1] * len(rising) + [-1] * len(falling))
-        sort_idxs = np.argsort(ttl_frames)
-        return ttl_frames[sort_idxs], ttl_states[sort_idxs]
+        if channel_id >= _num_digital_lines:
+            raise ValueError("'channel_id' must be a digital line of the first digital word (0 to 15)")
+        ttl_frames, ttl_states = self._get_ttl_index()[channel_id]
+        # the frame of an edge is the last frame before the change, so the change must happen before end_frame
+        start_idx, end_idx = np.searchsorted(ttl_frames, [start_frame, end_frame - 1])
+        return ttl_frames[start_idx:end_idx], ttl_states[start_idx:end_idx]
+
+    def _get_ttl_index(self):
+        # the edges of all digital lines are extracted in one pass over the file and saved in a sidecar file
+        if self._ttl_index is None:
+            index_file = self._npxfile.parent / (self._npxfile.stem + '.ttl_index.npz')
+            self._ttl_index = _load_ttl_index(index_file, self._npxfile)
+            if self._ttl_index is None:
+                self._ttl_index = _compute_ttl_index(self._raw, _get_digital_channel(self._meta),
+                                                     self._raw.shape[1])
+                _save_ttl_index(index_file, self._npxfile, self._ttl_index)
+        return self._ttl_index
+
+
+class SpikeGLXMultiRecordingExtractor(MultiRecordingTimeExtractor):
+    """
+    RecordingExtractor from all the gates and triggers of a SpikeGLX run, concatenated in time
+
+    The files of the run are found from any one of them: files of the same run and stream (e.g. 'imec0.ap.bin')
+    in the run folder are sorted by gate and trigger. Each file is memory-mapped by a SpikeGLXRecordingExtractor and
+    the recordings are concatenated on a single frame axis. Gaps between triggers are kept in the time axis: the
+    start time of each file is computed from the 'firstSample' field of its meta file (if available).
+
+    The extractor is a MultiRecordingTimeExtractor with one section per file, so that epochs, times and dumping
+    behave as for any concatenation. Reads locate their sections with a binary search and fill a preallocated array,
+    so that a read within one file costs a single memmap slice.
+
+    Parameters
+    ----------
+    file_path: str or Path
+        Path to one ap.bin, lf.bin, or nidq.bin file of the run (e.g. 'run_g0_t0.imec0.ap.bin')
+    x_pitch: int
+        The x pitch of the probe (default 32)
+    y_pitch: int
+        The y pitch of the probe (default 20)
+    """
+    extractor_name = 'SpikeGLXMultiRecording'
+    has_default_locations = True
+    has_unscaled = True
+    installed = True
+    is_writable = False
+    mode = 'file'
+    installation_mesg = ""
+
+    def __init__(self, file_path: str, x_pitch: int = 32, y_pitch: int = 20):
+        # initialized first, so that the extractor can be released if the run files are invalid
+        RecordingExtractor.__init__(self)
+        file_paths, gates_triggers = _find_spikeglx_run_files(file_path)
+        recordings = [SpikeGLXRecordingExtractor(f, x_pitch=x_pitch, y_pitch=y_pitch) for f in file_paths]
+        epoch_names = [f'g{gate}_t{trigger}' for (gate, trigger) in gates_triggers]
+        MultiRecordingTimeExtractor.__init__(self, recordings=recordings, epoch_names=epoch_names)
+
+        # start times from the sample counter of the acquisition, so that gaps between files are kept
+        first_samples = [rec._meta.get('firstSample') for rec in recordings]
+        if all(first_sample is not None for first_sample in first_samples):
+            first_samples = np.array([int(first_sample) for first_sample in first_samples], dtype='int64')
+            for i in range(1, len(recordings)):
+                start_time = (first_samples[i] - first_samples[0]) / self._sampling_frequency
+                # files overlapping the previous one (e.g. inconsistent meta files) are appended contiguously
+                self._start_times[i] = max(start_time, self._end_times[i - 1])
+                self._end_times[i] = self._start_times[i] + (self._end_frames[i] - self._start_frames[i]) \
+                    / self._sampling_frequency
+            self._start_times_array = np.array(self._start_times, dtype='float64')
+
+        self._kwargs = {'file_path': str(Path(file_path).absolute()), 'x_pitch': x_pitch, 'y_pitch': y_pitch}
+
+    @property
+    def file_paths(self):
+        return [rec._npxfile for rec in self._recordings]
+
+    def time_to_frame(self, time):
+        # times in a gap between two files are mapped to the end frame of the previous file
+        frames = MultiRecordingTimeExtractor.time_to_frame(self, time)
+        end_frames = np.array(self._end_frames, dtype='int64')[self._find_sections_for_times(time)]
+        return np.minimum(frames, end_frames)
+
+
+def _find_spikeglx_run_files(file_path):
+    # returns the files of all gates and triggers of the run of 'file_path', sorted by gate and trigger
+    file_path = Path(file_path)
+    match = _spikeglx_run_regex.match(file_path.name)
+    if match is None:
+        raise ValueError("'file_path' should be named '<run>_g<gate>_t<trigger>.<stream>.bin' "
+                         "(e.g. 'run_g0_t0.imec0.ap.bin')")
+    run, gate, suffix = match.group('run'), match.group('gate'), match.group('suffix')
+    # gates are saved in sibling folders ('<run>_g<gate>', with probe sub-folders '<run>_g<gate>_imec<probe>'):
+    # only the folder of 'file_path' and the same folders of the other gates are searched
+    folders = [file_path.parent]
+    gate_folder_regex = re.compile(rf'^{re.escape(run)}_g\d+$')
+    probe_match = re.match(rf'^{re.escape(run)}_g{gate}_(?P<probe>imec\d+)$', file_path.parent.name)
+    if probe_match is not None and file_path.parent.parent.name == f'{run}_g{gate}':
+        run_folder = file_path.parent.parent.parent
+        probe = probe_match.group('probe')
+        folders += [f / f'{f.name}_{probe}' for f in sorted(run_folder.iterdir())
+                    if gate_folder_regex.match(f.name) and (f / f'{f.name}_{probe}').is_dir()]
+    elif file_path.parent.name == f'{run}_g{gate}':
+        run_folder = file_path.parent.parent
+        folders += [f for f in sorted(run_folder.iterdir()) if gate_folder_regex.match(f.name) and f.is_dir()]
+
+    files = {}
+    for folder in dict.fromkeys(folders):
+        for f in sorted(folder.iterdir()):
+            match_f = _spikeglx_run_regex.match(f.name)
+            if match_f is None or match_f.group('run') != run or match_f.group('suffix') != suffix:
+                continue
+            gate_trigger = (int(match_f.group('gate')), int(match_f.group('trigger')))
+            if gate_trigger in files:
+                raise ValueError(f"Found several files for gate {gate_trigger[0]} and trigger {gate_trigger[1]} "
+                                 f"of run '{run}': {files[gate_trigger]} and {f}")
+            files[gate_trigger] = f
+    gates_triggers = sorted(files.keys())
+    return [files[gate_trigger] for gate_trigger in gates_triggers], gates_triggers
+
+
+_spikeglx_run_regex = re.compile(r'^(?P<run>.+)_g(?P<gate>\d+)_t(?P<trigger>\d+)\.(?P<suffix>.+\.c?bin)$')
+
+
+_num_digital_lines = 16
+_ttl_chunk_size = 1000000
+
+
+def _get_digital_channel(meta):
+    # index of the first digital word in the saved channels (None if no digital word is saved)
+    if meta['typeThis'] == 'imec':
+        AP, LF, SY = ChannelCountsIM(meta)
+        if SY == 0:
+            print("No imec sync channel saved.")
+            return None
+        return AP + LF
+    else:
+        MN, MA, XA, DW = ChannelCountsNI(meta)
+        if DW == 0:
+            print("No digital word saved.")
+            return None
+        return MN + MA + XA
+
+
+def _compute_ttl_index(raw, digital_channel, num_frames, chunk_size=_ttl_chunk_size):
+    # returns the (frames, states) of the rising (1) and falling (-1) edges of each line of the digital word
+    line_frames = [[] for _ in range(_num_digital_lines)]
+    line_states = [[] for _ in range(_num_digital_lines)]
+    if digital_channel is not None:
+        lines = np.arange(_num_digital_lines, dtype='uint16')
+        last_word = None
+        for chunk_start in range(0, num_frames, chunk_size):
+            chunk_end = min(chunk_start + chunk_size, num_frames)
+            word = np.array(raw[digital_channel, chunk_start:chunk_end], dtype='int16').view('uint16')
+            offset = chunk_start
+            if last_word is not None:
+                # include the last sample of the previous chunk to detect edges across chunks
+                word = np.concatenate(([last_word], word))
+                offset -= 1
+            last_word = word[-1]
+            changes = np.nonzero(word[1:] != word[:-1])[0]
+            if len(changes) == 0:
+                continue
+            flipped = word[changes] ^ word[changes + 1]
+            new_word = word[changes + 1]
+            for line in np.nonzero((np.bitwise_or.reduce(flipped) >> lines) & 1)[0]:
+                mask = np.uint16(1 << line)
+                line_changes = np.nonzero(flipped & mask)[0]
+                line_frames[line].append(changes[line_changes] + offset)
+                line_states[line].append(np.where(new_word[line_changes] & mask, 1, -1))
+    ttl_index = []
+    for frames, states in zip(line_frames, line_states):
+        if len(frames) > 0:
+            ttl_index.append((np.concatenate(frames).astype('int64'), np.concatenate(states).astype('int64')))
+        else:
+            ttl_index.append((np.array([], dtype='int64'), np.array([], dtype='int64')))
+    return ttl_index
+
+
+def _load_ttl_index(index_file, bin_file):
+    # the sidecar file is used only if it was computed from the current version of the binary file
+    if not index_file.is_file():
+        return None
+    try:
+        with np.load(index_file) as index:
+            if index['bin_file_size'] != bin_file.stat().st_size or \
+                    index['bin_file_mtime'] != bin_file.stat().st_mtime_ns:
+                return None
+            return [(index[f'frames_{line}'], index[f'states_{line}']) for line in range(_num_digital_lines)]
+    except Exception:
+        return None
+
+
+def _save_ttl_index(index_file, bin_file, ttl_index):
+    arrays = {'bin_file_size': bin_file.stat().st_size, 'bin_file_mtime': bin_file.stat().st_mtime_ns}
+    for line, (frames, states) in enumerate(ttl_index):
+        arrays[f'frames_{line}'] = frames
+        arrays[f'states_{line}'] = states
+    try:
+        np.savez(index_file, **arrays)
+    except OSError:
+        # e.g. read-only folder: the index is kept in memory only
+        pass
 
 
 def _parse_spikeglx_metafile(metafile, x_pitch, y_pitch, rec_type):
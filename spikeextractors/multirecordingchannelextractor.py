@@ -2,12 +2,14 @@ from .recordingextractor import RecordingExtractor
 from .extraction_tools import check_get_traces_args
 import numpy as np
 import warnings
+from joblib import Parallel, delayed
 
 
 # Concatenates the given recordings by channel
 class MultiRecordingChannelExtractor(RecordingExtractor):
-    def __init__(self, recordings, groups=None):
+    def __init__(self, recordings, groups=None, n_jobs=1):
         self._recordings = recordings
+        self._n_jobs = n_jobs
         self._all_channel_ids = []
         self._channel_map = {}
 
@@ -17,15 +19,15 @@ class MultiRecordingChannelExtractor(RecordingExtractor):
         self._num_frames = self._first_recording.get_num_frames()
 
         use_times = True
-        if np.all([rec._times is not None for rec in self._recordings]):
-            times_0 = self._recordings[0]._times
-            for rec in self._recordings[1:]:
-                times_i = rec._times
+        recordings_times = [rec._get_times() for rec in self._recordings]
+        if np.all([times is not None for times in recordings_times]):
+            times_0 = recordings_times[0]
+            for times_i in recordings_times[1:]:
                 if not np.allclose(times_0, times_i):
                     use_times = False
                     warnings.warn("The recordings have different times! Reset times with the "
                                   "'set_times() function")
-        elif np.all([rec._times is not None for rec in self._recordings]):
+        elif np.all([times is not None for times in recordings_times]):
             warnings.warn("Not all the recordings have times! Reset times with the "
                           "'set_times() function")
         else:
@@ -87,7 +89,8 @@ class MultiRecordingChannelExtractor(RecordingExtractor):
         self.is_filtered = self._first_recording.is_filtered
         self.has_unscaled = self._first_recording.has_unscaled
 
-        self._kwargs = {'recordings': [rec.make_serialized_dict() for rec in recordings], 'groups': groups}
+        self._kwargs = {'recordings': [rec.make_serialized_dict() for rec in recordings], 'groups': groups,
+                        'n_jobs': n_jobs}
 
     @property
     def recordings(self):
@@ -95,20 +98,36 @@ class MultiRecordingChannelExtractor(RecordingExtractor):
 
     @check_get_traces_args
     def get_traces(self, channel_ids=None, start_frame=None, end_frame=None, return_scaled=True):
-        traces = []
-        if channel_ids is not None:
-            for channel_id in channel_ids:
-                recording = self._recordings[self._channel_map[channel_id]['recording']]
-                channel_id_recording = self._channel_map[channel_id]['channel_id']
-                traces_recording = recording.get_traces(channel_ids=[channel_id_recording], start_frame=start_frame,
-                                                        end_frame=end_frame, return_scaled=return_scaled)
-                traces.append(traces_recording)
+        # group the requested channels by recording, so that each recording is read only once
+        recording_channels = {}
+        for i, channel_id in enumerate(channel_ids):
+            r_i = self._channel_map[channel_id]['recording']
+            if r_i not in recording_channels:
+                recording_channels[r_i] = {'idxs': [], 'channel_ids': []}
+            recording_channels[r_i]['idxs'].append(i)
+            recording_channels[r_i]['channel_ids'].append(self._channel_map[channel_id]['channel_id'])
+        recording_idxs = list(recording_channels.keys())
+
+        if self._n_jobs is not None and self._n_jobs > 1 and len(recording_idxs) > 1:
+            traces_list = Parallel(n_jobs=min(self._n_jobs, len(recording_idxs)), backend='threading')(
+                delayed(self._recordings[r_i].get_traces)(channel_ids=recording_channels[r_i]['channel_ids'],
+                                                          start_frame=start_frame, end_frame=end_frame,
+                                                          return_scaled=return_scaled)
+                for r_i in recording_idxs)
         else:
-            for recording in self._recordings:
-                traces_all_recording = recording.get_traces(channel_ids=channel_ids, start_frame=start_frame,
-                                                            end_frame=end_frame, return_scaled=return_scaled)
-                traces.append(traces_all_recording)
-        return np.concatenate(traces, axis=0)
+            traces_list = [self._recordings[r_i].get_traces(channel_ids=recording_channels[r_i]['channel_ids'],
+                                                            start_frame=start_frame, end_frame=end_frame,
+                                                            return_scaled=return_scaled)
+                           for r_i in recording_idxs]
+
+        if len(traces_list) == 1:
+            return traces_list[0]
+        # scatter the traces of each recording into the requested channel order
+        traces = np.empty((len(channel_ids), end_frame - start_frame),
+                          dtype=np.result_type(*[traces_recording.dtype for traces_recording in traces_list]))
+        for r_i, traces_recording in zip(recording_idxs, traces_list):
+            traces[recording_channels[r_i]['idxs']] = traces_recording
+        return traces
 
     def get_channel_ids(self):
         return self._all_channel_ids
@@ -120,7 +139,7 @@ class MultiRecordingChannelExtractor(RecordingExtractor):
         return self._sampling_frequency
 
 
-def concatenate_recordings_by_channel(recordings, groups=None):
+def concatenate_recordings_by_channel(recordings, groups=None, n_jobs=1):
     """
     Concatenates recordings together by channel. The order of the recordings
     determines the order of the channels in the concatenated recording.
@@ -132,6 +151,8 @@ def concatenate_recordings_by_channel(recordings, groups=None):
     groups: list
         A list of ints corresponding to the group identity of each recording's
         channel ids.
+    n_jobs: int
+        Number of threads used to read the traces of the different recordings (default 1)
 
     Returns
     -------
@@ -142,4 +163,5 @@ def concatenate_recordings_by_channel(recordings, groups=None):
     return MultiRecordingChannelExtractor(
         recordings=recordings,
         groups=groups,
+        n_jobs=n_jobs
     )
@@ -1,12 +1,14 @@
 from .recordingextractor import RecordingExtractor
 from .extraction_tools import check_get_traces_args, check_get_ttl_args
 import numpy as np
+from joblib import Parallel, delayed
 
 
 # Concatenates the given recordings by time
 class MultiRecordingTimeExtractor(RecordingExtractor):
-    def __init__(self, recordings, epoch_names=None):
+    def __init__(self, recordings, epoch_names=None, n_jobs=1):
         self._recordings = recordings
+        self._n_jobs = n_jobs
 
         # Num channels and sampling frequency based off the initial extractor
         self._first_recording = recordings[0]
@@ -50,6 +52,9 @@ class MultiRecordingTimeExtractor(RecordingExtractor):
             self._end_frames.append(ff)
             self._end_times.append(tt)
         self._num_frames = ff
+        # boundary arrays used to find sections with a binary search
+        self._start_frames_array = np.array(self._start_frames, dtype='int64')
+        self._start_times_array = np.array(self._start_times, dtype='float64')
 
         # Set the channel properties based on the first recording extractor
         self.copy_channel_properties(self._first_recording)
@@ -61,32 +66,28 @@ class MultiRecordingTimeExtractor(RecordingExtractor):
         self.is_filtered = self._first_recording.is_filtered
         self.has_unscaled = self._first_recording.has_unscaled
 
-        self._kwargs = {'recordings': [rec.make_serialized_dict() for rec in recordings], 'epoch_names': epoch_names}
+        self._kwargs = {'recordings': [rec.make_serialized_dict() for rec in recordings], 'epoch_names': epoch_names,
+                        'n_jobs': n_jobs}
 
     @property
     def recordings(self):
         return self._recordings
 
+    def _find_sections_for_frames(self, frames):
+        # the last section starting before or at each frame (frames at the end go to the last section)
+        inds = np.searchsorted(self._start_frames_array, frames, side='right') - 1
+        return np.clip(inds, 0, len(self._recordings) - 1)
+
+    def _find_sections_for_times(self, times):
+        inds = np.searchsorted(self._start_times_array, times, side='right') - 1
+        return np.clip(inds, 0, len(self._recordings) - 1)
+
     def _find_section_for_frame(self, frame):
-        start_frames = np.array(self._start_frames)
-        end_frames = np.array(self._end_frames)
-        inds = np.where((frame >= start_frames) & (frame < end_frames))[0]
-        if len(inds) == 0:
-            # can only happen if frame == end_frame
-            ind = len(self._start_frames) - 1
-        else:
-            ind = inds[0]
+        ind = int(self._find_sections_for_frames(frame))
         return self._recordings[ind], ind, frame - self._start_frames[ind]
 
     def _find_section_for_time(self, time):
-        start_times = np.array(self._start_times)
-        end_times = np.array(self._end_times)
-        inds = np.where((time >= start_times) & (time < end_times))[0]
-        if len(inds) == 0:
-            # can only happen if frame == end_frame
-            ind = len(self._start_times) - 1
-        else:
-            ind = inds[0]
+        ind = int(self._find_sections_for_times(time))
         return self._recordings[ind], ind, time - self._start_times[ind]
 
     @check_get_traces_args
@@ -96,60 +97,64 @@ class MultiRecordingTimeExtractor(RecordingExtractor):
         if i_sec1 == i_sec2:
             return recording1.get_traces(channel_ids=channel_ids, start_frame=i_start_frame, end_frame=i_end_frame,
                                          return_scaled=return_scaled)
-        traces = []
-        traces.append(
-            self._recordings[i_sec1].get_traces(channel_ids=channel_ids, start_frame=i_start_frame,
-                                                end_frame=self._recordings[i_sec1].get_num_frames(),
-                                                return_scaled=return_scaled)
-        )
-        for i_sec in range(i_sec1 + 1, i_sec2):
-            traces.append(
-                self._recordings[i_sec].get_traces(channel_ids=channel_ids, return_scaled=return_scaled)
-            )
-        if i_end_frame != 0:
-            traces.append(
-                self._recordings[i_sec2].get_traces(channel_ids=channel_ids, start_frame=0, end_frame=i_end_frame,
-                                                    return_scaled=return_scaled)
-            )
-        return np.concatenate(traces, axis=1)
+        # sections spanned by the requested frames: (section, section start, section end, output start)
+        sections = []
+        for i_sec in range(i_sec1, i_sec2 + 1):
+            sec_start_frame = i_start_frame if i_sec == i_sec1 else 0
+            sec_end_frame = i_end_frame if i_sec == i_sec2 else self._recordings[i_sec].get_num_frames()
+            if sec_end_frame - sec_start_frame > 0:
+                sections.append((i_sec, sec_start_frame, sec_end_frame,
+                                 self._start_frames[i_sec] + sec_start_frame - start_frame))
+
+        def _read_section(i_sec, sec_start_frame, sec_end_frame):
+            return self._recordings[i_sec].get_traces(channel_ids=channel_ids, start_frame=sec_start_frame,
+                                                      end_frame=sec_end_frame, return_scaled=return_scaled)
+
+        # the first section determines the dtype of the preallocated output
+        i_sec, sec_start_frame, sec_end_frame, out_start = sections[0]
+        traces_section = _read_section(i_sec, sec_start_frame, sec_end_frame)
+        traces = np.empty((traces_section.shape[0], end_frame - start_frame), dtype=traces_section.dtype)
+        traces[:, out_start:out_start + traces_section.shape[1]] = traces_section
+        del traces_section
+
+        if self._n_jobs is not None and self._n_jobs > 1 and len(sections) > 2:
+            # sections are usually separate files: read them concurrently
+            traces_sections = Parallel(n_jobs=min(self._n_jobs, len(sections) - 1), backend='threading')(
+                delayed(_read_section)(i_sec, sec_start_frame, sec_end_frame)
+                for (i_sec, sec_start_frame, sec_end_frame, _) in sections[1:])
+            for (_, _, _, out_start), traces_section in zip(sections[1:], traces_sections):
+                traces[:, out_start:out_start + traces_section.shape[1]] = traces_section
+        else:
+            # each section is copied into the output and released before reading the next one
+            for (i_sec, sec_start_frame, sec_end_frame, out_start) in sections[1:]:
+                traces_section = _read_section(i_sec, sec_start_frame, sec_end_frame)
+                traces[:, out_start:out_start + traces_section.shape[1]] = traces_section
+                del traces_section
+        return traces
 
     @check_get_ttl_args
     def get_ttl_events(self, start_frame=None, end_frame=None, channel_id=0):
-        recording1, i_sec1, i_start_frame = self._find_section_for_frame(start_frame)
+        _, i_sec1, i_start_frame = self._find_section_for_frame(start_frame)
         _, i_sec2, i_end_frame = self._find_section_for_frame(end_frame)
 
-        if i_sec1 == i_sec2:
-            ttl_frames, ttl_states = recording1.get_ttl_events(start_frame=i_start_frame,
-                                                               end_frame=i_end_frame,
-                                                               channel_id=channel_id)
-            ttl_frames += self._start_frames[i_sec1]
+        ttl_frames, ttl_states = [], []
+        for i_sec in range(i_sec1, i_sec2 + 1):
+            sec_start_frame = i_start_frame if i_sec == i_sec1 else 0
+            sec_end_frame = i_end_frame if i_sec == i_sec2 else self._recordings[i_sec].get_num_frames()
+            if sec_end_frame - sec_start_frame <= 0:
+                continue
+            ttl_frames_i, ttl_states_i = self._recordings[i_sec].get_ttl_events(start_frame=sec_start_frame,
+                                                                                end_frame=sec_end_frame,
+                                                                                channel_id=channel_id)
+            ttl_frames.append(np.asarray(ttl_frames_i, dtype='int64') + self._start_frames[i_sec])
+            ttl_states.append(np.asarray(ttl_states_i))
+
+        if len(ttl_frames) > 0:
+            ttl_frames = np.concatenate(ttl_frames)
+            ttl_states = np.concatenate(ttl_states)
         else:
-            ttl_frames, ttl_states = [], []
-
-            ttl_frames_1, ttl_states_1 = self._recordings[i_sec1].get_ttl_events(
-                start_frame=i_start_frame,
-                end_frame=self._recordings[i_sec1].get_num_frames(),
-                channel_id=channel_id)
-            ttl_frames_1 = (ttl_frames_1 + self._start_frames[i_sec1]).astype('int64')
-            ttl_frames.append(ttl_frames_1)
-            ttl_states.append(ttl_states_1)
-
-            for i_sec in range(i_sec1 + 1, i_sec2):
-                ttl_frames_i, ttl_states_i = self._recordings[i_sec].get_ttl_events(channel_id=channel_id)
-                ttl_frames_i = (ttl_frames_i + self._start_frames[i_sec]).astype('int64')
-                ttl_frames.append(ttl_frames_i)
-                ttl_states.append(ttl_states_i)
-
-            ttl_frames_2, ttl_states_2 = self._recordings[i_sec2].get_ttl_events(start_frame=0,
-                                                                                 end_frame=i_end_frame,
-                                                                                 channel_id=channel_id)
-            ttl_frames_2 = (ttl_frames_2 + self._start_frames[i_sec2]).astype('int64')
-            ttl_frames.append(ttl_frames_2)
-            ttl_states.append(ttl_states_2)
-
-            ttl_frames = np.concatenate(np.array(ttl_frames))
-            ttl_states = np.concatenate(np.array(ttl_states))
-
+            ttl_frames = np.array([], dtype='int64')
+            ttl_states = np.array([])
         return ttl_frames, ttl_states
 
     def get_channel_ids(self):
@@ -162,15 +167,50 @@ class MultiRecordingTimeExtractor(RecordingExtractor):
         return self._sampling_frequency
 
     def frame_to_time(self, frame):
-        recording, i_epoch, rel_frame = self._find_section_for_frame(frame)
-        return np.round(recording.frame_to_time(rel_frame) + self._start_times[i_epoch], 6)
+        frames = np.asarray(frame)
+        if frames.ndim == 0:
+            recording, i_epoch, rel_frame = self._find_section_for_frame(frame)
+            return np.round(recording.frame_to_time(rel_frame) + self._start_times[i_epoch], 6)
+        frames_flat = frames.ravel()
+        times = np.zeros(len(frames_flat), dtype='float64')
+        for i_epoch, idxs in self._group_by_section(self._find_sections_for_frames(frames_flat)):
+            rel_frames = frames_flat[idxs] - self._start_frames[i_epoch]
+            times[idxs] = self._recordings[i_epoch].frame_to_time(rel_frames) + self._start_times[i_epoch]
+        return np.round(times, 6).reshape(frames.shape)
 
     def time_to_frame(self, time):
-        recording, i_epoch, rel_time = self._find_section_for_time(time)
-        return (recording.time_to_frame(rel_time) + self._start_frames[i_epoch]).astype('int64')
-
-
-def concatenate_recordings_by_time(recordings, epoch_names=None):
+        times = np.asarray(time)
+        if times.ndim == 0:
+            recording, i_epoch, rel_time = self._find_section_for_time(time)
+            return (recording.time_to_frame(rel_time) + self._start_frames[i_epoch]).astype('int64')
+        times_flat = times.ravel()
+        frames = np.zeros(len(times_flat), dtype='int64')
+        for i_epoch, idxs in self._group_by_section(self._find_sections_for_times(times_flat)):
+            rel_times = times_flat[idxs] - self._start_times[i_epoch]
+            frames[idxs] = self._recordings[i_epoch].time_to_frame(rel_times) + self._start_frames[i_epoch]
+        return frames.reshape(times.shape)
+
+    @staticmethod
+    def _group_by_section(section_inds):
+        # yields the section index and the positions of the elements in each section (slices if already sorted)
+        if len(section_inds) == 0:
+            return
+        if np.all(section_inds[1:] >= section_inds[:-1]):
+            order = None
+            sorted_inds = section_inds
+        else:
+            order = np.argsort(section_inds, kind='stable')
+            sorted_inds = section_inds[order]
+        sections, starts = np.unique(sorted_inds, return_index=True)
+        ends = np.append(starts[1:], len(sorted_inds))
+        for section, start, end in zip(sections, starts, ends):
+            if order is None:
+                yield int(section), slice(start, end)
+            else:
+                yield int(section), order[start:end]
+
+
+def concatenate_recordings_by_time(recordings, epoch_names=None, n_jobs=1):
     """
     Concatenates recordings together by time. The order of the recordings
     determines the order of the time series in the concatenated recording.
@@ -181,6 +221,8 @@ def concatenate_recordings_by_time(recordings, epoch_names=None):
         The list of RecordingExtractors to be concatenated by time
     epoch_names: list
         The list of strings corresponding to the names of recording time period.
+    n_jobs: int
+        Number of threads used to read traces spanning several recordings (default 1)
 
     Returns
     -------
@@ -191,4 +233,5 @@ def concatenate_recordings_by_time(recordings, epoch_names=None):
     return MultiRecordingTimeExtractor(
         recordings=recordings,
         epoch_names=epoch_names,
+        n_jobs=n_jobs
     )
@@ -33,6 +33,10 @@ class MultiSortingExtractor(SortingExtractor):
         unit_id_sorting = self._unit_map[unit_id]['unit_id']
         return self._sortings[sorting_id].get_unit_spike_train(unit_id_sorting, start_frame, end_frame)
 
+    def _compute_unit_spike_train_info(self, unit_ids):
+        return {unit_id: self._sortings[self._unit_map[unit_id]['sorting_id']].get_unit_spike_train_info(
+            self._unit_map[unit_id]['unit_id']) for unit_id in unit_ids}
+
     def set_sampling_frequency(self, sampling_frequency):
         for sorting in self._sortings:
             sorting.set_sampling_frequency(sampling_frequency)
@@ -54,6 +58,56 @@ class MultiSortingExtractor(SortingExtractor):
         unit_id_sorting = self._unit_map[unit_id]['unit_id']
         return self._sortings[sorting_id].get_unit_property(unit_id_sorting, property_name)
 
+    def set_unit_properties(self, property_name, values, unit_ids=None):
+        if unit_ids is None:
+            unit_ids = self.get_unit_ids()
+        if len(unit_ids) != len(values):
+            raise ValueError("unit_ids and values must have same length")
+        for sorting_id, (idxs, sorting_unit_ids) in self._group_units_by_sorting(unit_ids).items():
+            sorting_values = values[idxs] if isinstance(values, np.ndarray) else [values[i] for i in idxs]
+            self._sortings[sorting_id].set_unit_properties(property_name, sorting_values, unit_ids=sorting_unit_ids)
+
+    def _get_units_property_column(self, property_name, unit_ids):
+        columns = []
+        for sorting_id, (idxs, sorting_unit_ids) in self._group_units_by_sorting(unit_ids).items():
+            values, mask = self._sortings[sorting_id]._get_units_property_column(property_name, sorting_unit_ids)
+            columns.append((idxs, values, mask))
+        if len(columns) > 0 and all(values.dtype == columns[0][1].dtype and values.shape[1:] == columns[0][1].shape[1:]
+                                    for _, values, _ in columns):
+            all_values = np.empty((len(unit_ids),) + columns[0][1].shape[1:], dtype=columns[0][1].dtype)
+        else:
+            all_values = np.empty(len(unit_ids), dtype='object')
+        all_mask = np.zeros(len(unit_ids), dtype='bool')
+        for idxs, values, mask in columns:
+            if all_values.dtype.kind == 'O':
+                for i, value in zip(idxs, values):
+                    all_values[i] = value
+            else:
+                all_values[idxs] = values
+            all_mask[idxs] = mask
+        return all_values, all_mask
+
+    def _get_units_property_names(self, unit_ids):
+        property_names = set()
+        for sorting_id, (idxs, sorting_unit_ids) in self._group_units_by_sorting(unit_ids).items():
+            property_names.update(self._sortings[sorting_id]._get_units_property_names(sorting_unit_ids))
+        return sorted(property_names)
+
+    def _take_units_property_table(self, unit_ids, new_unit_ids, property_names):
+        # properties are held by the sortings, so they are copied column by column
+        return None
+
+    def _group_units_by_sorting(self, unit_ids):
+        # groups the given unit ids by sorting: {sorting_id: (positions in unit_ids, unit ids in the sorting)}
+        groups = {}
+        for i, unit_id in enumerate(unit_ids):
+            if unit_id not in self._unit_map.keys():
+                raise ValueError("Non-valid unit_id")
+            idxs, sorting_unit_ids = groups.setdefault(self._unit_map[unit_id]['sorting_id'], ([], []))
+            idxs.append(i)
+            sorting_unit_ids.append(self._unit_map[unit_id]['unit_id'])
+        return groups
+
     def get_unit_property_names(self, unit_id):
         sorting_id = self._unit_map[unit_id]['sorting_id']
         unit_id_sorting = self._unit_map[unit_id]['unit_id']
@@ -94,13 +148,23 @@ class MultiSortingExtractor(SortingExtractor):
             raise ValueError("Non-valid unit_id")
         sorting_id = self._unit_map[unit_id]['sorting_id']
         unit_id_sorting = self._unit_map[unit_id]['unit_id']
+        self._invalidate_feature_column(feature_name, [unit_id])
+        if indexes is not None:
+            self._invalidate_feature_column(feature_name + '_idxs', [unit_id])
         self._sortings[sorting_id].set_unit_spike_features(unit_id_sorting, feature_name, value, indexes)
 
+    def _set_units_spike_features(self, feature_name, unit_ids, unit_values):
+        self._invalidate_feature_column(feature_name, unit_ids)
+        for sorting_id, (idxs, sorting_unit_ids) in self._group_units_by_sorting(unit_ids).items():
+            self._sortings[sorting_id]._set_units_spike_features(feature_name, sorting_unit_ids,
+                                                                 [unit_values[i] for i in idxs])
+
     def clear_unit_spike_features(self, unit_id, feature_name):
         if unit_id not in self._unit_map.keys():
             raise ValueError("Non-valid unit_id")
         sorting_id = self._unit_map[unit_id]['sorting_id']
         unit_id_sorting = self._unit_map[unit_id]['unit_id']
+        self._invalidate_feature_column(feature_name, [unit_id])
         self._sortings[sorting_id].clear_unit_spike_features(unit_id_sorting, feature_name)
 
 
@@ -0,0 +1,301 @@
+import numpy as np
+
+
+class PropertyTable:
+    """Columnar store for the channel or unit properties of an extractor.
+
+    Each property is stored as one array with a row per id, together with a boolean mask marking the ids for
+    which the property has been set. Columns set in bulk from arrays (or from lists of scalars of one type) are
+    typed; columns set one value at a time, or receiving a value whose dtype differs from the column dtype, are
+    object arrays. Scalar cells of typed columns are returned as Python objects.
+
+    Tables returned by take share the value arrays of the source table and only copy them when either table
+    writes to the column (copy-on-write).
+    """
+
+    def __init__(self):
+        self._ids = []
+        self._rows = {}
+        self._columns = {}  # property_name -> [values, mask]
+        self._view_rows = {}  # property_name -> rows of the shared values array for the ids of this table
+        self._shared = set()  # names of the columns whose values array is shared with a table returned by take
+
+    def __len__(self):
+        return len(self._columns)
+
+    def __contains__(self, property_name):
+        return property_name in self._columns
+
+    def get_ids(self):
+        return list(self._ids)
+
+    def get_property_names(self, ids=None):
+        """Returns the names of the properties set for at least one of the given ids (all ids if None)"""
+        if ids is None:
+            return sorted(name for name, (values, mask) in self._columns.items() if np.any(mask[:len(self._ids)]))
+        rows, found = self._find_rows(ids)
+        rows = rows[found]
+        return sorted(name for name, (values, mask) in self._columns.items() if np.any(mask[rows]))
+
+    def get_shared_property_names(self, ids):
+        """Returns the names of the properties set for all the given ids"""
+        rows, found = self._find_rows(ids)
+        if not np.all(found):
+            return []
+        return sorted(name for name, (values, mask) in self._columns.items() if np.all(mask[rows]))
+
+    def get_values(self, property_name, ids):
+        """Returns the values and the presence mask of a property for the given ids
+
+        Parameters
+        ----------
+        property_name: str
+            The property name
+        ids: array_like
+            The channel or unit ids
+
+        Returns
+        -------
+        values: np.array
+            The property values (entries for which mask is False are zeros or None)
+        mask: np.array
+            Boolean array, True where the property is set
+        """
+        rows, found = self._find_rows(ids)
+        if property_name not in self._columns:
+            return np.empty(len(rows), dtype='object'), np.zeros(len(rows), dtype='bool')
+        values, mask = self._columns[property_name]
+        rows_found = rows[found]
+        column_mask = np.zeros(len(rows), dtype='bool')
+        column_mask[found] = mask[rows_found]
+        if np.all(found):
+            column_values = values[self._value_rows(property_name, rows)]
+        else:
+            column_values = np.zeros((len(rows),) + values.shape[1:], dtype=values.dtype)
+            column_values[found] = values[self._value_rows(property_name, rows_found)]
+        return column_values, column_mask
+
+    def get_value(self, property_name, id):
+        """Returns the value of a property for one id, raising a KeyError if it is not set"""
+        row = self._rows.get(id)
+        if row is None or property_name not in self._columns or not self._columns[property_name][1][row]:
+            raise KeyError(property_name)
+        return _cell(self._columns[property_name][0], self._value_rows(property_name, row))
+
+    def has_id(self, id):
+        return id in self._rows
+
+    def set_values(self, property_name, ids, values):
+        """Sets the values of a property for the given ids
+
+        Parameters
+        ----------
+        property_name: str
+            The property name
+        ids: array_like
+            The channel or unit ids
+        values: array_like
+            The values, one per id. If a numpy array (or a list of scalars of one type) is given, the column
+            keeps its dtype, otherwise values are stored as objects
+        """
+        rows = self._add_rows(ids)
+        if len(rows) == 0:
+            return
+        array = _as_typed_array(values, len(rows))
+        if property_name not in self._columns:
+            if array is not None:
+                column = np.zeros((len(self._rows),) + array.shape[1:], dtype=array.dtype)
+            else:
+                column = np.empty(len(self._rows), dtype='object')
+            self._columns[property_name] = [column, np.zeros(len(self._rows), dtype='bool')]
+        column = self._writable_values(property_name)
+        mask = self._columns[property_name][1]
+        if array is not None and _matches(array.dtype, array.shape[1:], column):
+            column[rows] = array
+        else:
+            column = self._to_object_column(property_name)
+            for i, row in enumerate(rows):
+                column[row] = _cell(values, i) if isinstance(values, np.ndarray) else values[i]
+        mask[rows] = True
+
+    def set_value(self, property_name, id, value):
+        """Sets the value of a property for one id"""
+        row = self._add_rows([id])[0]
+        if property_name not in self._columns:
+            self._columns[property_name] = [np.empty(len(self._rows), dtype='object'),
+                                            np.zeros(len(self._rows), dtype='bool')]
+        column = self._writable_values(property_name)
+        mask = self._columns[property_name][1]
+        if column.dtype.kind != 'O':
+            value_array = np.asarray(value)
+            if not _matches(value_array.dtype, value_array.shape, column):
+                column = self._to_object_column(property_name)
+        column[row] = value
+        mask[row] = True
+
+    def clear_values(self, property_name, ids):
+        """Clears a property for the given ids (unknown ids and properties are ignored)"""
+        if property_name not in self._columns:
+            return
+        rows, found = self._find_rows(ids)
+        mask = self._columns[property_name][1]
+        mask[rows[found]] = False
+        if not np.any(mask):
+            self._set_own_values(property_name, None)
+            del self._columns[property_name]
+        elif self._columns[property_name][0].dtype.kind == 'O':
+            self._writable_values(property_name)[rows[found]] = None
+
+    def take(self, ids, source_ids=None, property_names=None):
+        """Returns a new table with the properties of the given ids. The new table shares the value arrays of
+        this table until one of the two tables writes to them.
+
+        Parameters
+        ----------
+        ids: array_like
+            The ids of the new table
+        source_ids: array_like
+            The ids of this table whose properties are taken, one per id (if None, 'ids' is used)
+        property_names: list
+            The properties to take (if None, all properties are taken)
+
+        Returns
+        -------
+        table: PropertyTable
+            The new table
+        """
+        table = PropertyTable()
+        table._ids = list(ids)
+        table._rows = {id: i for i, id in enumerate(table._ids)}
+        rows, found = self._find_rows(table._ids if source_ids is None else source_ids)
+        rows[~found] = 0  # ids missing from this table are masked out
+        if property_names is None:
+            property_names = list(self._columns.keys())
+        for property_name in property_names:
+            if property_name not in self._columns:
+                continue
+            values, mask = self._columns[property_name]
+            column_mask = mask[rows] & found
+            if np.any(column_mask):
+                table._columns[property_name] = [values, column_mask]
+                table._view_rows[property_name] = self._value_rows(property_name, rows)
+                if property_name not in self._view_rows:
+                    self._shared.add(property_name)
+        return table
+
+    def to_dict(self):
+        """Returns an array-native dictionary representation of the table (see from_dict)"""
+        return {'ids': list(self._ids),
+                'columns': {property_name: {'values': self._column_values(property_name), 'mask': mask}
+                            for property_name, (values, mask) in self._columns.items()}}
+
+    def to_nested_dict(self):
+        """Returns the properties as a {id: {property_name: value}} dictionary"""
+        nested_dict = {}
+        for i, id in enumerate(self._ids):
+            properties = {property_name: _cell(values, self._value_rows(property_name, i))
+                          for property_name, (values, mask) in self._columns.items() if mask[i]}
+            if len(properties) > 0:
+                nested_dict[id] = properties
+        return nested_dict
+
+    @staticmethod
+    def from_dict(d):
+        """Builds a table from the output of to_dict or from a {id: {property_name: value}} dictionary"""
+        table = PropertyTable()
+        if set(d.keys()) == {'ids', 'columns'}:
+            table._ids = list(d['ids'])
+            table._rows = {id: i for i, id in enumerate(table._ids)}
+            for property_name, column in d['columns'].items():
+                table._columns[property_name] = [np.asarray(column['values']), np.asarray(column['mask'], 'bool')]
+        else:
+            for id, properties in d.items():
+                for property_name, value in properties.items():
+                    table.set_value(property_name, id, value)
+        return table
+
+    def _find_rows(self, ids):
+        rows = np.array([self._rows.get(id, -1) for id in ids], dtype='int64')
+        return rows, rows >= 0
+
+    def _add_rows(self, ids):
+        new_ids = [id for id in dict.fromkeys(ids) if id not in self._rows]
+        if len(new_ids) > 0:
+            for id in new_ids:
+                self._rows[id] = len(self._ids)
+                self._ids.append(id)
+            for property_name in list(self._columns.keys()):
+                values, mask = self._column_values(property_name), self._columns[property_name][1]
+                grown_values = np.zeros((len(self._ids),) + values.shape[1:], dtype=values.dtype)
+                grown_values[:len(values)] = values
+                grown_mask = np.zeros(len(self._ids), dtype='bool')
+                grown_mask[:len(mask)] = mask
+                self._columns[property_name][1] = grown_mask
+                self._set_own_values(property_name, grown_values)
+        return np.array([self._rows[id] for id in ids], dtype='int64')
+
+    def _value_rows(self, property_name, rows):
+        # maps rows of this table to rows of the values array of a column
+        view_rows = self._view_rows.get(property_name)
+        return rows if view_rows is None else view_rows[rows]
+
+    def _column_values(self, property_name):
+        values = self._columns[property_name][0]
+        view_rows = self._view_rows.get(property_name)
+        return values if view_rows is None else values[view_rows]
+
+    def _writable_values(self, property_name):
+        # copies a shared values array before it is modified in place
+        if property_name in self._view_rows:
+            self._set_own_values(property_name, self._column_values(property_name))
+        elif property_name in self._shared:
+            self._set_own_values(property_name, self._columns[property_name][0].copy())
+        return self._columns[property_name][0]
+
+    def _to_object_column(self, property_name):
+        values = self._column_values(property_name)
+        mask = self._columns[property_name][1]
+        if values.dtype.kind != 'O' or values.ndim > 1:
+            object_values = np.empty(len(values), dtype='object')
+            for i in np.nonzero(mask)[0]:
+                object_values[i] = _cell(values, i)
+            self._set_own_values(property_name, object_values)
+        return self._writable_values(property_name)
+
+    def _set_own_values(self, property_name, values):
+        self._columns[property_name][0] = values
+        self._view_rows.pop(property_name, None)
+        self._shared.discard(property_name)
+
+
+def _as_typed_array(values, num_values):
+    # numpy arrays keep their dtype; lists of scalars of a single type are converted when numpy infers a
+    # non-object dtype (mixed types, e.g. ints and floats, would be silently cast)
+    if isinstance(values, np.ndarray):
+        if len(values) == num_values and values.dtype.kind != 'O':
+            return values
+        return None
+    if len(values) != num_values or not all(np.isscalar(value) for value in values) or \
+            len(set(type(value) for value in values)) > 1:
+        return None
+    array = np.asarray(values)
+    if array.ndim != 1 or array.dtype.kind not in 'biufcUS':
+        return None
+    return array
+
+
+def _matches(dtype, shape, column):
+    # values are only written to a typed column when no cast is involved; strings may be shorter than the column
+    if column.dtype.kind == 'O' or shape != column.shape[1:]:
+        return False
+    if dtype.kind in 'US':
+        return dtype.kind == column.dtype.kind and dtype.itemsize <= column.dtype.itemsize
+    return dtype == column.dtype
+
+
+def _cell(values, i):
+    # scalar cells of typed columns are returned as Python objects, as they were set
+    value = values[i]
+    if isinstance(value, np.generic) and values.dtype.kind != 'O':
+        return value.item()
+    return value
@@ -139,8 +139,9 @@ class RecordingExtractor(ABC, BaseExtractor):
         extractor: BaseExtractor
             The extractor from which the epochs will be copied
         """
-        if extractor._times is not None:
-            self.set_times(deepcopy(extractor._times))
+        times = extractor._get_times()
+        if times is not None:
+            self.set_times(deepcopy(times))
 
     def frame_to_time(self, frames):
         """This function converts user-inputted frame indexes to times with units of seconds.
@@ -246,6 +247,14 @@ class RecordingExtractor(ABC, BaseExtractor):
             snippets[i] = snippet_chunk
         return snippets
 
+    def _get_channel_idxs(self, channel_ids):
+        # maps channel ids to their position in get_channel_ids() with a single pass over the channel ids
+        channel_idx_lookup = {channel_id: i for i, channel_id in enumerate(self.get_channel_ids())}
+        try:
+            return np.array([channel_idx_lookup[channel_id] for channel_id in channel_ids], dtype='int64')
+        except KeyError as e:
+            raise ValueError(str(e.args[0]) + " is not a valid channel_id")
+
     def set_channel_locations(self, locations, channel_ids=None):
         """This function sets the location key properties of each specified channel
         id with the corresponding locations of the passed in locations list.
@@ -268,10 +277,11 @@ class RecordingExtractor(ABC, BaseExtractor):
             default_locations[:] = np.nan
             self._key_properties['location'] = default_locations
         if len(channel_ids) == len(locations):
+            channel_idxs = self._get_channel_idxs(channel_ids)
             for i in range(len(channel_ids)):
                 if isinstance(locations[i], (list, np.ndarray, tuple)):
                     location = np.asarray(locations[i])
-                    channel_idx = list(self.get_channel_ids()).index(channel_ids[i])
+                    channel_idx = channel_idxs[i]
                     if len(location) == 2:
                         self._key_properties['location'][channel_idx, :2] = location
                     elif len(location) == 3:
@@ -310,7 +320,7 @@ class RecordingExtractor(ABC, BaseExtractor):
             locations[:] = np.nan
             self._key_properties['location'] = locations
         locations = np.array(locations)
-        channel_idxs = np.array([list(self.get_channel_ids()).index(ch) for ch in channel_ids])
+        channel_idxs = self._get_channel_idxs(channel_ids)
         if locations_2d:
             locations = np.array(locations)[:, :2]
         return locations[channel_idxs]
@@ -352,9 +362,10 @@ class RecordingExtractor(ABC, BaseExtractor):
         if self._key_properties['group'] is None:
             self._key_properties['group'] = np.zeros(self.get_num_channels(), dtype='int')
         if len(channel_ids) == len(groups):
+            channel_idxs = self._get_channel_idxs(channel_ids)
             for i in range(len(channel_ids)):
                 if isinstance(groups[i], (int, np.integer)):
-                    channel_idx = list(self.get_channel_ids()).index(channel_ids[i])
+                    channel_idx = channel_idxs[i]
                     self._key_properties['group'][channel_idx] = int(groups[i])
                 else:
                     raise TypeError("'group' must be an int")
@@ -385,7 +396,7 @@ class RecordingExtractor(ABC, BaseExtractor):
             groups = np.zeros(self.get_num_channels(), dtype='int')
             self._key_properties['group'] = groups
         groups = np.array(groups)
-        channel_idxs = np.array([list(self.get_channel_ids()).index(ch) for ch in channel_ids])
+        channel_idxs = self._get_channel_idxs(channel_ids)
         return groups[channel_idxs]
 
     def clear_channel_groups(self, channel_ids=None):
@@ -426,9 +437,10 @@ class RecordingExtractor(ABC, BaseExtractor):
         if self._key_properties['gain'] is None:
             self._key_properties['gain'] = np.ones(self.get_num_channels(), dtype='float')
         if len(channel_ids) == len(gains):
+            channel_idxs = self._get_channel_idxs(channel_ids)
             for i in range(len(channel_ids)):
                 if isinstance(gains[i], (int, np.integer, float)):
-                    channel_idx = list(self.get_channel_ids()).index(channel_ids[i])
+                    channel_idx = channel_idxs[i]
                     self._key_properties['gain'][channel_idx] = float(gains[i])
                 else:
                     raise TypeError("'gain' must be an int or float")
@@ -458,7 +470,7 @@ class RecordingExtractor(ABC, BaseExtractor):
             gains = np.ones(self.get_num_channels(), dtype='float')
             self._key_properties['gain'] = gains
         gains = np.array(gains)
-        channel_idxs = np.array([list(self.get_channel_ids()).index(ch) for ch in channel_ids])
+        channel_idxs = self._get_channel_idxs(channel_ids)
         return gains[channel_idxs]
 
     def clear_channel_gains(self, channel_ids=None):
@@ -499,9 +511,10 @@ class RecordingExtractor(ABC, BaseExtractor):
         if self._key_properties['offset'] is None:
             self._key_properties['offset'] = np.zeros(self.get_num_channels(), dtype='float')
         if len(channel_ids) == len(offsets):
+            channel_idxs = self._get_channel_idxs(channel_ids)
             for i in range(len(channel_ids)):
                 if isinstance(offsets[i], (int, np.integer, float)):
-                    channel_idx = list(self.get_channel_ids()).index(channel_ids[i])
+                    channel_idx = channel_idxs[i]
                     self._key_properties['offset'][channel_idx] = float(offsets[i])
                 else:
                     raise TypeError("'offset' must be an int or float")
@@ -531,7 +544,7 @@ class RecordingExtractor(ABC, BaseExtractor):
             offsets = np.zeros(self.get_num_channels(), dtype='float')
             self._key_properties['offset'] = offsets
         offsets = np.array(offsets)
-        channel_idxs = np.array([list(self.get_channel_ids()).index(ch) for ch in channel_ids])
+        channel_idxs = self._get_channel_idxs(channel_ids)
         return offsets[channel_idxs]
 
     def clear_channel_offsets(self, channel_ids=None):
@@ -571,9 +584,7 @@ class RecordingExtractor(ABC, BaseExtractor):
                     elif property_name == 'group':
                         self.set_channel_groups(value, channel_id)
                     else:
-                        if channel_id not in self._properties.keys():
-                            self._properties[channel_id] = {}
-                        self._properties[channel_id][property_name] = value
+                        self._properties.set_value(property_name, channel_id, value)
                 else:
                     raise TypeError(str(property_name) + " must be a string")
             else:
@@ -610,13 +621,124 @@ class RecordingExtractor(ABC, BaseExtractor):
             return self.get_channel_gains(channel_id)[0]
         if property_name == 'offset':
             return self.get_channel_offsets(channel_id)[0]
-        if channel_id not in self._properties.keys():
+        if not self._properties.has_id(channel_id):
             raise ValueError('no properties found for channel ' + str(channel_id))
-        if property_name not in self._properties[channel_id]:
+        if not isinstance(property_name, str):
+            raise TypeError(str(property_name) + " must be a string")
+        try:
+            return self._properties.get_value(property_name, channel_id)
+        except KeyError:
             raise RuntimeError(str(property_name) + " has not been added to channel " + str(channel_id))
+
+    def set_channel_properties(self, property_name, values, channel_ids=None):
+        """Sets a property for a list of channels at once. The values are stored in a single column, which keeps
+        the dtype of 'values' when it is a numpy array (or a list of scalars).
+
+        Parameters
+        ----------
+        property_name: str
+            The name of the property
+        values: array_like
+            The values to be set, one per channel
+        channel_ids: array_like
+            The channel ids for which the property will be set. If None, all channel ids are assumed.
+        """
+        if channel_ids is None:
+            channel_ids = self.get_channel_ids()
         if not isinstance(property_name, str):
             raise TypeError(str(property_name) + " must be a string")
-        return self._properties[channel_id][property_name]
+        if len(channel_ids) != len(values):
+            raise ValueError("channel_ids and values must have same length")
+        if property_name == 'location':
+            self.set_channel_locations(values, channel_ids)
+        elif property_name == 'group':
+            self.set_channel_groups(values, channel_ids)
+        else:
+            self._get_channel_idxs(channel_ids)
+            self._properties.set_values(property_name, channel_ids, values)
+
+    def get_channel_properties(self, property_name, channel_ids=None):
+        """Returns the values of a property for a list of channels at once.
+
+        Parameters
+        ----------
+        property_name: str
+            The name of the property
+        channel_ids: array_like
+            The channel ids for which the property will be returned. If None, all channel ids are assumed.
+
+        Returns
+        -------
+        values: np.array
+            The property values, one per channel
+        """
+        if channel_ids is None:
+            channel_ids = self.get_channel_ids()
+        if property_name == 'location':
+            return self.get_channel_locations(channel_ids)
+        if property_name == 'group':
+            return self.get_channel_groups(channel_ids)
+        if property_name == 'gain':
+            return self.get_channel_gains(channel_ids)
+        if property_name == 'offset':
+            return self.get_channel_offsets(channel_ids)
+        values, mask = self._get_channels_property_column(property_name, channel_ids)
+        if not np.all(mask):
+            raise RuntimeError(str(property_name) + " has not been added to channel " +
+                               str(channel_ids[np.nonzero(~mask)[0][0]]))
+        return values
+
+    def set_channels_property(self, *, channel_ids=None, property_name, values):
+        """Sets channel property data for a list of channels
+
+        Parameters
+        ----------
+        channel_ids: list
+            The list of channel ids for which the property will be set
+            Defaults to get_channel_ids()
+        property_name: str
+            The name of the property
+        values: list
+            The list of values to be set
+        """
+        self.set_channel_properties(property_name, values, channel_ids=channel_ids)
+
+    def get_channels_property(self, *, channel_ids=None, property_name):
+        """Returns a list of values stored under the property name corresponding
+        to a list of channels
+
+        Parameters
+        ----------
+        channel_ids: list
+            The channel ids for which the property will be returned
+            Defaults to get_channel_ids()
+        property_name: str
+            The name of the property
+
+        Returns
+        -------
+        values
+            The list of values
+        """
+        values = self.get_channel_properties(property_name, channel_ids=channel_ids)
+        if values.ndim == 1:
+            return values.tolist()
+        return list(values)
+
+    def _get_channels_property_column(self, property_name, channel_ids):
+        # returns the values and presence mask of a (non-key) property for the given channels
+        self._get_channel_idxs(channel_ids)
+        return self._properties.get_values(property_name, channel_ids)
+
+    def _get_channels_property_names(self, channel_ids):
+        # returns the (non-key) properties set for at least one of the given channels
+        self._get_channel_idxs(channel_ids)
+        return self._properties.get_property_names(channel_ids)
+
+    def _take_channels_property_table(self, channel_ids, new_channel_ids, property_names):
+        # returns a property table sharing the columns of the given channels, renamed to 'new_channel_ids'
+        # (None if the properties are not held by this recording)
+        return self._properties.take(new_channel_ids, channel_ids, property_names)
 
     def get_channel_property_names(self, channel_id):
         """Get a list of property names for a given channel.
@@ -634,9 +756,7 @@ class RecordingExtractor(ABC, BaseExtractor):
         """
         if isinstance(channel_id, (int, np.integer)):
             if channel_id in self.get_channel_ids():
-                if channel_id not in self._properties.keys():
-                    self._properties[channel_id] = {}
-                property_names = list(self._properties[channel_id].keys())
+                property_names = self._properties.get_property_names([channel_id])
                 if np.all(np.logical_not(np.isnan(self.get_channel_locations(channel_id)))):
                     property_names.extend(['location'])
                 property_names.extend(['group'])
@@ -665,12 +785,12 @@ class RecordingExtractor(ABC, BaseExtractor):
         """
         if channel_ids is None:
             channel_ids = self.get_channel_ids()
-        curr_property_name_set = set(self.get_channel_property_names(channel_id=channel_ids[0]))
-        for channel_id in channel_ids[1:]:
-            curr_channel_property_name_set = set(self.get_channel_property_names(channel_id=channel_id))
-            curr_property_name_set = curr_property_name_set.intersection(curr_channel_property_name_set)
-        property_names = list(curr_property_name_set)
-        return sorted(property_names)
+        self._get_channel_idxs(channel_ids)
+        property_names = self._properties.get_shared_property_names(channel_ids)
+        if np.all(np.logical_not(np.isnan(self.get_channel_locations(channel_ids)))):
+            property_names.append('location')
+        property_names.extend(['group', 'gain', 'offset'])
+        return sorted(set(property_names))
 
     def copy_channel_properties(self, recording, channel_ids=None):
         """Copy channel properties from another recording extractor to the current
@@ -699,13 +819,24 @@ class RecordingExtractor(ABC, BaseExtractor):
             self.set_channel_gains(gains)
             self.set_channel_offsets(offsets)
 
-            # copy normal properties
-            for channel_id in channel_ids:
-                curr_property_names = recording.get_channel_property_names(channel_id=channel_id)
-                for curr_property_name in curr_property_names:
-                    if curr_property_name not in self._key_properties.keys():  # key property
-                        value = recording.get_channel_property(channel_id=channel_id, property_name=curr_property_name)
-                        self.set_channel_property(channel_id=channel_id, property_name=curr_property_name, value=value)
+            # copy normal properties column by column
+            self._copy_channel_property_columns(recording, channel_ids, channel_ids)
+
+    def _copy_channel_property_columns(self, recording, channel_ids, recording_channel_ids):
+        self._get_channel_idxs(channel_ids)
+        property_names = [property_name for property_name in
+                          recording._get_channels_property_names(recording_channel_ids)
+                          if property_name not in self._key_properties.keys()]  # key property
+        if len(self._properties) == 0:
+            # share the columns of the source recording instead of copying them
+            table = recording._take_channels_property_table(recording_channel_ids, channel_ids, property_names)
+            if table is not None:
+                self._properties = table
+                return
+        channel_ids = np.array(channel_ids)
+        for property_name in property_names:
+            values, mask = recording._get_channels_property_column(property_name, recording_channel_ids)
+            self._properties.set_values(property_name, list(channel_ids[mask]), values[mask])
 
     def clear_channel_property(self, channel_id, property_name):
         """This function clears the channel property for the given property.
@@ -721,9 +852,8 @@ class RecordingExtractor(ABC, BaseExtractor):
             self.clear_channel_locations(channel_id)
         elif property_name == 'group':
             self.clear_channel_groups(channel_id)
-        elif channel_id in self._properties.keys():
-            if property_name in self._properties[channel_id]:
-                del self._properties[channel_id][property_name]
+        else:
+            self._properties.clear_values(property_name, [channel_id])
 
     def clear_channels_property(self, property_name, channel_ids=None):
         """This function clears the channels' properties for the given property.
@@ -737,8 +867,11 @@ class RecordingExtractor(ABC, BaseExtractor):
         """
         if channel_ids is None:
             channel_ids = self.get_channel_ids()
-        for channel_id in channel_ids:
-            self.clear_channel_property(channel_id, property_name)
+        if property_name in ('location', 'group'):
+            for channel_id in channel_ids:
+                self.clear_channel_property(channel_id, property_name)
+        else:
+            self._properties.clear_values(property_name, channel_ids)
 
     def get_epoch(self, epoch_name):
         """This function returns a SubRecordingExtractor which is a view to the
@@ -813,7 +946,8 @@ class RecordingExtractor(ABC, BaseExtractor):
                            graph=graph, geometry=geometry, verbose=verbose)
 
     def write_to_binary_dat_format(self, save_path, time_axis=0, dtype=None, chunk_size=None, chunk_mb=500,
-                                   n_jobs=1, joblib_backend='loky', return_scaled=True, verbose=False):
+                                   n_jobs=1, joblib_backend='loky', return_scaled=True, use_cache=False,
+                                   verbose=False):
         """Saves the traces of this recording extractor into binary .dat format.
 
         Parameters
@@ -836,12 +970,15 @@ class RecordingExtractor(ABC, BaseExtractor):
             Joblib backend for parallel processing ('loky', 'threading', 'multiprocessing')
         return_scaled: bool
             If True, traces are returned after scaling (using gain/offset). If False, the raw traces are returned
+        use_cache: bool
+            If True and n_jobs > 1, each worker loads the recording once and shares it between the chunks it
+            processes (the recording then stays loaded in the worker processes)
         verbose: bool
             If True, output is verbose (when chunks are used)
         """
         write_to_binary_dat_format(self, save_path=save_path, time_axis=time_axis, dtype=dtype, chunk_size=chunk_size,
                                    chunk_mb=chunk_mb, n_jobs=n_jobs, joblib_backend=joblib_backend,
-                                   return_scaled=return_scaled, verbose=verbose)
+                                   return_scaled=return_scaled, use_cache=use_cache, verbose=verbose)
 
     def write_to_h5_dataset_format(self, dataset_path, save_path=None, file_handle=None,
                                    time_axis=0, dtype=None, chunk_size=None, chunk_mb=500, verbose=False):
@@ -0,0 +1,207 @@
+import mmap
+import os
+import weakref
+
+import numpy as np
+from tqdm import tqdm
+
+from spikeextractors import RecordingExtractor
+from spikeextractors.extraction_tools import check_get_traces_args
+
+try:
+    from multiprocessing import shared_memory
+    HAVE_SHARED_MEMORY = True
+except ImportError:
+    # multiprocessing.shared_memory is available from python 3.8
+    HAVE_SHARED_MEMORY = False
+
+# extractors owning a shared memory block in this process, so that attaching to their block does not map it twice
+_shared_memory_owners = weakref.WeakValueDictionary()
+
+
+class SharedMemoryRecordingExtractor(RecordingExtractor):
+    """
+    RecordingExtractor that holds the traces of a recording in a shared memory block.
+
+    The traces are read once (in chunks) from the source recording. The extractor is dumpable: loading its
+    dictionary in another process (e.g. a joblib worker of write_to_binary_dat_format) attaches to the same block
+    without copying or re-reading the source. The block is released when the extractor that created it is deleted
+    (or closed); processes already attached to it keep a valid mapping until they close it.
+
+    Parameters
+    ----------
+    recording: RecordingExtractor
+        The recording to load in shared memory
+    return_scaled: bool
+        If True (default), the scaled traces are stored, otherwise the unscaled ones
+    chunk_size: None or int
+        Number of frames read at a time from the source recording. If None, 'chunk_mb' is used
+    chunk_mb: None or int
+        Size in Mb of the chunks read from the source recording (default 500Mb). If both 'chunk_size' and 'chunk_mb'
+        are None, the traces are read at once
+    verbose: bool
+        If True, a progress bar is shown while reading chunks
+    shared_memory_name: str or None
+        Name of an existing block to attach to, instead of loading 'recording'. This and the following arguments
+        ('channel_ids', 'num_frames', 'sampling_frequency', 'dtype') are set when loading a dumped extractor
+    """
+
+    extractor_name = 'SharedMemoryRecording'
+    has_default_locations = False
+    has_unscaled = False
+    installed = HAVE_SHARED_MEMORY  # check at class level if installed or not
+    is_writable = False
+    mode = 'file'
+    installation_mesg = "The SharedMemoryRecordingExtractor requires python >= 3.8"  # error message when not installed
+
+    def __init__(self, recording=None, return_scaled=True, chunk_size=None, chunk_mb=500, verbose=False,
+                 shared_memory_name=None, channel_ids=None, num_frames=None, sampling_frequency=None, dtype=None):
+        assert self.installed, self.installation_mesg
+        RecordingExtractor.__init__(self)
+        self._shared_memory = None
+        self._owner = None
+        self._traces = None
+        if shared_memory_name is None:
+            assert recording is not None, "Provide a 'recording' to load in shared memory"
+            channel_ids = recording.get_channel_ids()
+            num_frames = recording.get_num_frames()
+            sampling_frequency = recording.get_sampling_frequency()
+            dtype = np.dtype(recording.get_dtype(return_scaled))
+            nbytes = max(len(channel_ids) * num_frames * dtype.itemsize, 1)
+            self._shared_memory = shared_memory.SharedMemory(create=True, size=nbytes)
+            self._is_owner = True
+            _shared_memory_owners[self._shared_memory.name] = self
+        else:
+            dtype = np.dtype(dtype)
+            # keep the owner alive if it lives in this process, otherwise map the block
+            self._owner = _shared_memory_owners.get(shared_memory_name)
+            if self._owner is not None:
+                self._shared_memory = self._owner._shared_memory
+            else:
+                self._shared_memory = _attach_shared_memory(shared_memory_name)
+            self._is_owner = False
+            self.has_unscaled = not return_scaled
+
+        self._channel_ids = list(channel_ids)
+        self._sampling_frequency = float(sampling_frequency)
+        # np.frombuffer keeps the buffer exported while the traces (or views of them) are alive, so that the block
+        # cannot be unmapped under them
+        self._traces = np.frombuffer(self._shared_memory.buf, dtype=dtype,
+                                     count=len(self._channel_ids) * num_frames).reshape(len(self._channel_ids),
+                                                                                        num_frames)
+        self._channel_idxs = {ch: i for i, ch in enumerate(self._channel_ids)}
+
+        if recording is not None:
+            _fill_traces(recording, self._traces, return_scaled, chunk_size, chunk_mb, verbose)
+            self.copy_channel_properties(recording)
+            self.copy_times(recording)
+            self.copy_epochs(recording)
+            if 'gain' in recording.get_shared_channel_property_names() and not return_scaled:
+                self.set_channel_gains(recording.get_channel_gains())
+                self.set_channel_offsets(recording.get_channel_offsets())
+                self.has_unscaled = True
+            else:
+                self.clear_channel_gains()
+                self.clear_channel_offsets()
+        # the block is seen by every attached process: it is not modified after loading
+        self._traces.flags.writeable = False
+
+        self.is_dumpable = True
+        self._kwargs = {'return_scaled': not self.has_unscaled, 'shared_memory_name': self._shared_memory.name,
+                        'channel_ids': self._channel_ids, 'num_frames': num_frames,
+                        'sampling_frequency': self._sampling_frequency, 'dtype': dtype.str}
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception as e:
+            print("Unable to release shared memory", e)
+
+    @property
+    def shared_memory_name(self):
+        return self._shared_memory.name
+
+    def close(self):
+        """
+        Releases the shared memory block. The block is unlinked if it was created by this extractor
+        """
+        if self._shared_memory is None:
+            return
+        shm = self._shared_memory
+        self._shared_memory = None
+        self._traces = None
+        if self._is_owner:
+            _shared_memory_owners.pop(shm.name, None)
+            shm.unlink()
+            _close_shared_memory(shm)
+        elif self._owner is None:
+            _close_shared_memory(shm)
+        self._owner = None
+
+    def get_channel_ids(self):
+        return list(self._channel_ids)
+
+    def get_num_frames(self):
+        return self._traces.shape[1]
+
+    def get_sampling_frequency(self):
+        return self._sampling_frequency
+
+    @check_get_traces_args
+    def get_traces(self, channel_ids=None, start_frame=None, end_frame=None, return_scaled=True):
+        # indexing with a list of channels copies the traces out of the shared block
+        channel_idxs = [self._channel_idxs[ch] for ch in channel_ids]
+        return self._traces[channel_idxs, start_frame:end_frame]
+
+
+def _attach_shared_memory(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    if os.name != 'posix':
+        # blocks are only registered to the resource tracker on posix systems
+        return shared_memory.SharedMemory(name=name)
+    # python < 3.13 registers attached blocks to the resource tracker. A tracker of this process would unlink the
+    # block (owned by another process) when this process exits, and unregistering the block would drop the
+    # registration of the owner from a tracker shared with it: the block is mapped as SharedMemory does, untracked
+    import _posixshmem
+
+    shm = shared_memory.SharedMemory.__new__(shared_memory.SharedMemory)
+    shm._name = '/' + name
+    shm._fd = _posixshmem.shm_open(shm._name, os.O_RDWR, mode=0o600)
+    try:
+        shm._size = os.fstat(shm._fd).st_size
+        shm._mmap = mmap.mmap(shm._fd, shm._size)
+    except OSError:
+        os.close(shm._fd)
+        raise
+    shm._buf = memoryview(shm._mmap)
+    return shm
+
+
+def _close_shared_memory(shm):
+    try:
+        shm.close()
+    except BufferError:
+        # arrays of the block (e.g. traces of attached extractors in this process, or views returned to callers)
+        # are still alive: the mapping is released with them
+        shm._buf = None
+        shm._mmap = None
+
+
+def _fill_traces(recording, traces, return_scaled, chunk_size, chunk_mb, verbose):
+    num_channels, num_frames = traces.shape
+    if chunk_size is None and chunk_mb is not None:
+        chunk_size = max(int(chunk_mb * 1e6) // (num_channels * traces.dtype.itemsize), 1)
+    if chunk_size is None:
+        traces[:] = recording.get_traces(return_scaled=return_scaled)
+        return
+    chunk_size = int(chunk_size)
+    chunk_starts = range(0, num_frames, chunk_size)
+    if verbose:
+        chunk_starts = tqdm(chunk_starts, ascii=True, desc="Loading traces in shared memory")
+    for start_frame in chunk_starts:
+        end_frame = min(start_frame + chunk_size, num_frames)
+        traces[:, start_frame:end_frame] = recording.get_traces(start_frame=start_frame, end_frame=end_frame,
+                                                                return_scaled=return_scaled)
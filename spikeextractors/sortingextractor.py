@@ -2,7 +2,7 @@ from abc import ABC, abstractmethod
 import numpy as np
 from copy import deepcopy
 
-from .extraction_tools import get_sub_extractors_by_property
+from .extraction_tools import get_sub_extractors_by_property, get_spike_indices_in_range
 from .baseextractor import BaseExtractor
 
 
@@ -18,6 +18,9 @@ class SortingExtractor(ABC, BaseExtractor):
     def __init__(self):
         BaseExtractor.__init__(self)
         self._sampling_frequency = None
+        self._unit_spike_train_info = {}
+        self._unit_spike_train_sorted = {}
+        self._feature_columns = {}
 
     @abstractmethod
     def get_unit_ids(self):
@@ -87,6 +90,98 @@ class SortingExtractor(ABC, BaseExtractor):
         spike_trains = [self.get_unit_spike_train(uid, start_frame, end_frame) for uid in unit_ids]
         return spike_trains
 
+    def get_unit_spike_train_info(self, unit_id):
+        """This function returns the number of spikes and the first and last spike frames of the specified unit.
+        The information is computed once (without extracting the spike train when the format stores an index)
+        and cached.
+
+        Parameters
+        ----------
+        unit_id: int
+            The id that specifies a unit in the sorting
+
+        Returns
+        -------
+        spike_train_info: dict
+            A dict containing the 'num_spikes', 'first_frame', and 'last_frame' of the unit. 'first_frame' and
+            'last_frame' are None if the unit has no spikes
+        """
+        if isinstance(unit_id, (int, np.integer)):
+            if unit_id in self.get_unit_ids():
+                if unit_id not in self._unit_spike_train_info.keys():
+                    self._unit_spike_train_info.update(self._compute_unit_spike_train_info([unit_id]))
+                return dict(self._unit_spike_train_info[unit_id])
+            else:
+                raise ValueError(str(unit_id) + " is not a valid unit_id")
+        else:
+            raise ValueError(str(unit_id) + " must be an int")
+
+    def get_unit_spike_counts(self, unit_ids=None):
+        """This function returns the number of spikes of the specified units.
+
+        Parameters
+        ----------
+        unit_ids: array_like
+            The unit ids for which the number of spikes will be returned. If None, all units are used
+
+        Returns
+        -------
+        spike_counts: numpy.ndarray
+            An 1D array with the number of spikes of each unit
+        """
+        if unit_ids is None:
+            unit_ids = self.get_unit_ids()
+        elif isinstance(unit_ids, (int, np.integer)):
+            unit_ids = [unit_ids]
+        valid_unit_ids = set(self.get_unit_ids())
+        for unit_id in unit_ids:
+            if unit_id not in valid_unit_ids:
+                raise ValueError(str(unit_id) + " is not a valid unit_id")
+        missing_unit_ids = [u for u in unit_ids if u not in self._unit_spike_train_info.keys()]
+        if len(missing_unit_ids) > 0:
+            self._unit_spike_train_info.update(self._compute_unit_spike_train_info(missing_unit_ids))
+        return np.array([self._unit_spike_train_info[u]['num_spikes'] for u in unit_ids], dtype='int64')
+
+    def clear_unit_spike_train_info(self, unit_ids=None):
+        """This function clears the cached spike train info. It should be called by extractors that modify
+        their spike trains after they have been accessed.
+
+        Parameters
+        ----------
+        unit_ids: list
+            A list of ids that specifies a set of units in the sorting. If None, all units are cleared
+        """
+        if unit_ids is None:
+            self._unit_spike_train_info = {}
+            self._unit_spike_train_sorted = {}
+        else:
+            if isinstance(unit_ids, (int, np.integer)):
+                unit_ids = [unit_ids]
+            for unit_id in unit_ids:
+                self._unit_spike_train_info.pop(unit_id, None)
+                self._unit_spike_train_sorted.pop(unit_id, None)
+
+    def _compute_unit_spike_train_info(self, unit_ids):
+        # Default implementation: extractors storing an index of the spike trains should override this
+        spike_train_info = {}
+        for unit_id in unit_ids:
+            spike_train = self.get_unit_spike_train(unit_id)
+            if len(spike_train) > 0:
+                spike_train_info[unit_id] = {'num_spikes': len(spike_train), 'first_frame': int(np.min(spike_train)),
+                                             'last_frame': int(np.max(spike_train))}
+            else:
+                spike_train_info[unit_id] = {'num_spikes': 0, 'first_frame': None, 'last_frame': None}
+        return spike_train_info
+
+    def _get_unit_spike_indices_in_range(self, unit_id, start_frame, end_frame):
+        # Default implementation: extractors that can locate a frame range without extracting the whole spike
+        # train should override this. The sortedness of the spike train is checked once and cached
+        spike_train = self.get_unit_spike_train(unit_id)
+        if unit_id not in self._unit_spike_train_sorted.keys():
+            self._unit_spike_train_sorted[unit_id] = bool(np.all(spike_train[1:] >= spike_train[:-1]))
+        return get_spike_indices_in_range(spike_train, start_frame, end_frame,
+                                          is_sorted=self._unit_spike_train_sorted[unit_id])
+
     def get_sampling_frequency(self):
         """
         It returns the sampling frequency.
@@ -131,8 +226,10 @@ class SortingExtractor(ABC, BaseExtractor):
             if unit_id in self.get_unit_ids():
                 if unit_id not in self._features.keys():
                     self._features[unit_id] = {}
+                self._invalidate_feature_column(feature_name, [unit_id])
                 if indexes is None:
-                    if isinstance(feature_name, str) and len(value) == len(self.get_unit_spike_train(unit_id)):
+                    if isinstance(feature_name, str) and \
+                            len(value) == self.get_unit_spike_train_info(unit_id)['num_spikes']:
                         self._features[unit_id][feature_name] = value
                     else:
                         if not isinstance(feature_name, str):
@@ -142,6 +239,7 @@ class SortingExtractor(ABC, BaseExtractor):
                 else:
                     if isinstance(feature_name, str) and len(value) == len(indexes):
                         indexes = np.array(indexes)
+                        self._invalidate_feature_column(feature_name + '_idxs', [unit_id])
                         self._features[unit_id][feature_name] = value
                         self._features[unit_id][feature_name + '_idxs'] = indexes
                     else:
@@ -193,42 +291,38 @@ class SortingExtractor(ABC, BaseExtractor):
                     self._features[unit_id] = {}
                 if isinstance(feature_name, str):
                     if feature_name in self._features[unit_id].keys():
-                        spike_train = self.get_unit_spike_train(unit_id)
+                        features = self._features[unit_id][feature_name]
                         if start_frame is None:
                             start_frame = 0
                         if end_frame is None:
                             end_frame = np.inf
-                        if start_frame == 0 and end_frame == np.inf:
+                        spike_train_info = self.get_unit_spike_train_info(unit_id)
+                        if spike_train_info['num_spikes'] == 0 or \
+                                (start_frame <= spike_train_info['first_frame'] and
+                                 end_frame > spike_train_info['last_frame']):
                             # keep memmap objects
-                            return self._features[unit_id][feature_name]
-                        else:
-                            if len(self._features[unit_id][feature_name]) == len(spike_train):
-                                spike_indices = np.where(np.logical_and(spike_train >= start_frame,
-                                                                        spike_train < end_frame))
-                            elif len(self._features[unit_id][feature_name]) < len(spike_train):
-                                if not feature_name.endswith('idxs'):
-                                    # retrieve features on the correct idxs
-                                    assert feature_name + '_idxs' in self.get_unit_spike_feature_names(unit_id=unit_id)
-                                    feature_name_idxs = feature_name + '_idxs'
-                                    value_idxs = np.array(self.get_unit_spike_features(unit_id=unit_id,
-                                                                                       feature_name=feature_name_idxs))
-                                    spike_train = spike_train[value_idxs]
-                                    spike_indices = np.where(np.logical_and(spike_train >= start_frame,
-                                                                            spike_train < end_frame))
-                                else:
-                                    # retrieve idxs features
-                                    value_idxs = np.array(self.get_unit_spike_features(unit_id=unit_id,
-                                                                                       feature_name=feature_name))
-                                    spike_train = spike_train[value_idxs]
-                                    spike_indices = np.where(np.logical_and(spike_train >= start_frame,
-                                                                            spike_train < end_frame))
+                            return features
+                        if len(features) < spike_train_info['num_spikes']:
+                            if not feature_name.endswith('idxs'):
+                                # retrieve features on the correct idxs
+                                assert feature_name + '_idxs' in self.get_unit_spike_feature_names(unit_id=unit_id)
+                                value_idxs = self._features[unit_id][feature_name + '_idxs']
                             else:
-                                raise ValueError(str(feature_name) + " dimensions are inconsistent for unit "
-                                                 + str(unit_id))
-                            if isinstance(self._features[unit_id][feature_name], list):
-                                return list(np.array(self._features[unit_id][feature_name])[spike_indices])
-                            else:
-                                return np.array(self._features[unit_id][feature_name])[spike_indices]
+                                # retrieve idxs features
+                                value_idxs = features
+                            spike_train = self.get_unit_spike_train(unit_id)[np.asarray(value_idxs)]
+                            spike_indices = get_spike_indices_in_range(spike_train, start_frame, end_frame)
+                        elif len(features) > spike_train_info['num_spikes']:
+                            raise ValueError(str(feature_name) + " dimensions are inconsistent for unit "
+                                             + str(unit_id))
+                        else:
+                            spike_indices = self._get_unit_spike_indices_in_range(unit_id, start_frame, end_frame)
+                        if isinstance(spike_indices, slice) and isinstance(features, (list, np.ndarray)):
+                            return features[spike_indices]
+                        elif isinstance(features, list):
+                            return list(np.array(features)[spike_indices])
+                        else:
+                            return np.asarray(features)[spike_indices]
                     else:
                         raise ValueError(str(feature_name) + " has not been added to unit " + str(unit_id))
                 else:
@@ -238,6 +332,128 @@ class SortingExtractor(ABC, BaseExtractor):
         else:
             raise ValueError(str(unit_id) + " must be an int")
 
+    def get_units_spike_features(self, feature_name, unit_ids=None, start_frame=None, end_frame=None):
+        """This function extracts the specified spike features from the specified units.
+
+        Parameters
+        ----------
+        feature_name: string
+            The name of the feature to be returned
+        unit_ids: array_like
+            The unit ids from which to return spike features. If None, all unit
+            spike features will be returned
+        start_frame: int
+            The frame above which a spike frame is returned  (inclusive)
+        end_frame: int
+            The frame below which a spike frame is returned  (exclusive)
+
+        Returns
+        -------
+        spike_features: list
+            A list containing the features of each specified unit given the range of start and end frames
+        """
+        if unit_ids is None:
+            unit_ids = self.get_unit_ids()
+        unit_ids = list(unit_ids)
+        if start_frame is None and end_frame is None:
+            column = self._get_feature_column(feature_name, unit_ids)
+            if column is not None:
+                return list(column['unit_values'])
+        # the spike train info of all units is computed at once
+        self.get_unit_spike_counts(unit_ids)
+        spike_features = [self.get_unit_spike_features(uid, feature_name, start_frame, end_frame)
+                          for uid in unit_ids]
+        return spike_features
+
+    def set_units_spike_features(self, feature_name, values, unit_ids=None):
+        """This function sets a spike feature for multiple units from a single columnar array. The array
+        contains the feature values of all spikes of the specified units, concatenated in the order of the
+        units. The features of each unit are stored as views on the array (which can also be a memmap), so
+        that no data is copied.
+
+        Parameters
+        ----------
+        feature_name: str
+            The name of the feature to be stored
+        values: array_like
+            The feature values of all spikes. The first dimension must be equal to the total number of spikes
+            of the specified units
+        unit_ids: array_like
+            The unit ids for which the features will be set. If None, all units are used
+        """
+        if not isinstance(feature_name, str):
+            raise ValueError("feature_name must be a string")
+        if unit_ids is None:
+            unit_ids = self.get_unit_ids()
+        unit_ids = list(unit_ids)
+        self._validate_unit_ids(unit_ids)
+        if not isinstance(values, np.ndarray):
+            values = np.asarray(values)
+        offsets = np.concatenate(([0], np.cumsum(self.get_unit_spike_counts(unit_ids)))).astype('int64')
+        if len(values) != offsets[-1]:
+            raise ValueError("feature values should have the same length as the total number of spikes")
+        unit_values = [values[offsets[i]:offsets[i + 1]] for i in range(len(unit_ids))]
+        self._set_units_spike_features(feature_name, unit_ids, unit_values)
+        self._feature_columns[feature_name] = {'unit_ids': unit_ids, 'values': values, 'offsets': offsets,
+                                               'unit_values': unit_values}
+
+    def get_units_spike_features_array(self, feature_name, unit_ids=None):
+        """This function returns a spike feature of multiple units as a single columnar array, with the
+        feature values of all spikes concatenated in the order of the units, and the offsets of each unit
+        in the array. If the features were set with set_units_spike_features for the same units, the
+        original array (or memmap) is returned without copying.
+
+        Parameters
+        ----------
+        feature_name: str
+            The name of the feature to be returned. It must be defined for all spikes of the specified units
+        unit_ids: array_like
+            The unit ids for which the features will be returned. If None, all units are used
+
+        Returns
+        -------
+        values: numpy.ndarray
+            The concatenated feature values of the specified units
+        offsets: numpy.ndarray
+            The offsets of each unit in values (length num_units + 1). The features of the i-th unit are
+            values[offsets[i]:offsets[i + 1]]
+        """
+        if unit_ids is None:
+            unit_ids = self.get_unit_ids()
+        unit_ids = list(unit_ids)
+        column = self._get_feature_column(feature_name, unit_ids)
+        if column is not None:
+            return column['values'], column['offsets']
+        unit_values = self.get_units_spike_features(feature_name, unit_ids=unit_ids)
+        num_spikes = self.get_unit_spike_counts(unit_ids)
+        if any(len(v) != n for v, n in zip(unit_values, num_spikes)):
+            raise ValueError(str(feature_name) + " is not defined for all spikes of the units")
+        offsets = np.concatenate(([0], np.cumsum(num_spikes))).astype('int64')
+        if len(unit_values) > 0:
+            values = np.concatenate([np.asarray(v) for v in unit_values])
+        else:
+            values = np.array([])
+        return values, offsets
+
+    def _get_feature_column(self, feature_name, unit_ids):
+        # columns are dropped when the features of one of their units are set or cleared
+        column = self._feature_columns.get(feature_name)
+        if column is not None and column['unit_ids'] == list(unit_ids):
+            return column
+        return None
+
+    def _set_units_spike_features(self, feature_name, unit_ids, unit_values):
+        # stores the features of already validated units, one value per unit
+        self._invalidate_feature_column(feature_name, unit_ids)
+        for unit_id, unit_value in zip(unit_ids, unit_values):
+            self._features.setdefault(unit_id, {})[feature_name] = unit_value
+
+    def _invalidate_feature_column(self, feature_name, unit_ids):
+        # drops the column of a feature if it contains one of the given units
+        column = self._feature_columns.get(feature_name)
+        if column is not None and not set(column['unit_ids']).isdisjoint(unit_ids):
+            del self._feature_columns[feature_name]
+
     def set_times(self, times):
         """This function sets the sorting times to convert spike trains to seconds
 
@@ -246,7 +462,8 @@ class SortingExtractor(ABC, BaseExtractor):
         times: array-like
             The times in seconds for each frame
         """
-        max_frames = np.array([np.max(self.get_unit_spike_train(u)) for u in self.get_unit_ids()])
+        spike_train_infos = [self.get_unit_spike_train_info(u) for u in self.get_unit_ids()]
+        max_frames = np.array([info['last_frame'] for info in spike_train_infos if info['num_spikes'] > 0])
         assert np.all(max_frames < len(times)), "The length of 'times' should be greater than the maximum " \
                                                      "spike frame index"
         self._times = times.astype('float64')
@@ -259,8 +476,9 @@ class SortingExtractor(ABC, BaseExtractor):
         extractor: BaseExtractor
             The extractor from which the epochs will be copied
         """
-        if extractor._times is not None:
-            self.set_times(deepcopy(extractor._times))
+        times = extractor._get_times()
+        if times is not None:
+            self.set_times(deepcopy(times))
 
     def frame_to_time(self, frames):
         """This function converts user-inputted frame indexes to times with units of seconds.
@@ -310,6 +528,7 @@ class SortingExtractor(ABC, BaseExtractor):
         feature_name: string
             The name of the feature to be cleared
         """
+        self._invalidate_feature_column(feature_name, [unit_id])
         if unit_id in self._features.keys():
             if feature_name in self._features[unit_id]:
                 del self._features[unit_id][feature_name]
@@ -395,10 +614,8 @@ class SortingExtractor(ABC, BaseExtractor):
         """
         if isinstance(unit_id, (int, np.integer)):
             if unit_id in self.get_unit_ids():
-                if unit_id not in self._properties.keys():
-                    self._properties[unit_id] = {}
                 if isinstance(property_name, str):
-                    self._properties[unit_id][property_name] = value
+                    self._properties.set_value(property_name, unit_id, value)
                 else:
                     raise ValueError(str(property_name) + " must be a string")
             else:
@@ -406,6 +623,51 @@ class SortingExtractor(ABC, BaseExtractor):
         else:
             raise ValueError(str(unit_id) + " must be an int")
 
+    def set_unit_properties(self, property_name, values, unit_ids=None):
+        """Sets a property for a list of units at once. The values are stored in a single column, which keeps
+        the dtype of 'values' when it is a numpy array (or a list of scalars).
+
+        Parameters
+        ----------
+        property_name: str
+            The name of the property
+        values: array_like
+            The values to be set, one per unit
+        unit_ids: array_like
+            The unit ids for which the property will be set. If None, all unit ids are assumed.
+        """
+        if unit_ids is None:
+            unit_ids = self.get_unit_ids()
+        if not isinstance(property_name, str):
+            raise ValueError(str(property_name) + " must be a string")
+        if len(unit_ids) != len(values):
+            raise ValueError("unit_ids and values must have same length")
+        self._validate_unit_ids(unit_ids)
+        self._properties.set_values(property_name, unit_ids, values)
+
+    def get_unit_properties(self, property_name, unit_ids=None):
+        """Returns the values of a property for a list of units at once.
+
+        Parameters
+        ----------
+        property_name: str
+            The name of the property
+        unit_ids: array_like
+            The unit ids for which the property will be returned. If None, all unit ids are assumed.
+
+        Returns
+        -------
+        values: np.array
+            The property values, one per unit
+        """
+        if unit_ids is None:
+            unit_ids = self.get_unit_ids()
+        values, mask = self._get_units_property_column(property_name, unit_ids)
+        if not np.all(mask):
+            raise ValueError(str(property_name) + " has not been added to unit " +
+                             str(unit_ids[np.nonzero(~mask)[0][0]]))
+        return values
+
     def set_units_property(self, *, unit_ids=None, property_name, values):
         """Sets unit property data for a list of units
 
@@ -419,10 +681,7 @@ class SortingExtractor(ABC, BaseExtractor):
         value: list
             The list of values to be set
         """
-        if unit_ids is None:
-            unit_ids = self.get_unit_ids()
-        for i, unit in enumerate(unit_ids):
-            self.set_unit_property(unit_id=unit, property_name=property_name, value=values[i])
+        self.set_unit_properties(property_name, values, unit_ids=unit_ids)
 
     def get_unit_property(self, unit_id, property_name):
         """This function returns the data stored under the property name given
@@ -443,12 +702,10 @@ class SortingExtractor(ABC, BaseExtractor):
         """
         if isinstance(unit_id, (int, np.integer)):
             if unit_id in self.get_unit_ids():
-                if unit_id not in self._properties.keys():
-                    self._properties[unit_id] = {}
                 if isinstance(property_name, str):
-                    if property_name in list(self._properties[unit_id].keys()):
-                        return self._properties[unit_id][property_name]
-                    else:
+                    try:
+                        return self._properties.get_value(property_name, unit_id)
+                    except KeyError:
                         raise ValueError(str(property_name) + " has not been added to unit " + str(unit_id))
                 else:
                     raise ValueError(str(property_name) + " must be a string")
@@ -474,10 +731,34 @@ class SortingExtractor(ABC, BaseExtractor):
         values
             The list of values
         """
-        if unit_ids is None:
-            unit_ids = self.get_unit_ids()
-        values = [self.get_unit_property(unit_id=unit, property_name=property_name) for unit in unit_ids]
-        return values
+        values = self.get_unit_properties(property_name, unit_ids=unit_ids)
+        if values.ndim == 1:
+            return values.tolist()
+        return list(values)
+
+    def _validate_unit_ids(self, unit_ids):
+        # checks all the unit ids with a single pass over the unit ids of the sorting
+        valid_unit_ids = set(self.get_unit_ids())
+        for unit_id in unit_ids:
+            if not isinstance(unit_id, (int, np.integer)):
+                raise ValueError(str(unit_id) + " must be an int")
+            if unit_id not in valid_unit_ids:
+                raise ValueError(str(unit_id) + " is not a valid unit_id")
+
+    def _get_units_property_column(self, property_name, unit_ids):
+        # returns the values and presence mask of a property for the given units
+        self._validate_unit_ids(unit_ids)
+        return self._properties.get_values(property_name, unit_ids)
+
+    def _get_units_property_names(self, unit_ids):
+        # returns the properties set for at least one of the given units
+        self._validate_unit_ids(unit_ids)
+        return self._properties.get_property_names(unit_ids)
+
+    def _take_units_property_table(self, unit_ids, new_unit_ids, property_names):
+        # returns a property table sharing the columns of the given units, renamed to 'new_unit_ids'
+        # (None if the properties are not held by this sorting)
+        return self._properties.take(new_unit_ids, unit_ids, property_names)
 
     def get_unit_property_names(self, unit_id):
         """Get a list of property names for a given unit.
@@ -494,9 +775,7 @@ class SortingExtractor(ABC, BaseExtractor):
         """
         if isinstance(unit_id, (int, np.integer)):
             if unit_id in self.get_unit_ids():
-                if unit_id not in self._properties.keys():
-                    self._properties[unit_id] = {}
-                property_names = sorted(self._properties[unit_id].keys())
+                property_names = self._properties.get_property_names([unit_id])
                 return property_names
             else:
                 raise ValueError(str(unit_id) + " is not a valid unit id")
@@ -520,11 +799,8 @@ class SortingExtractor(ABC, BaseExtractor):
         if unit_ids is None:
             unit_ids = self.get_unit_ids()
         if len(unit_ids) > 0:
-            curr_property_name_set = set(self.get_unit_property_names(unit_id=unit_ids[0]))
-            for unit_id in unit_ids[1:]:
-                curr_unit_property_name_set = set(self.get_unit_property_names(unit_id=unit_id))
-                curr_property_name_set = curr_property_name_set.intersection(curr_unit_property_name_set)
-            property_names = sorted(list(curr_property_name_set))
+            property_names = [property_name for property_name in self._get_units_property_names(unit_ids)
+                              if np.all(self._get_units_property_column(property_name, unit_ids)[1])]
         else:
             property_names = []
         return property_names
@@ -549,11 +825,22 @@ class SortingExtractor(ABC, BaseExtractor):
                     value = sorting.get_unit_property(unit_id=unit_ids, property_name=curr_property_name)
                     self.set_unit_property(unit_id=unit_ids, property_name=curr_property_name, value=value)
             else:
-                for unit_id in unit_ids:
-                    curr_property_names = sorting.get_unit_property_names(unit_id=unit_id)
-                    for curr_property_name in curr_property_names:
-                        value = sorting.get_unit_property(unit_id=unit_id, property_name=curr_property_name)
-                        self.set_unit_property(unit_id=unit_id, property_name=curr_property_name, value=value)
+                self._copy_unit_property_columns(sorting, unit_ids, unit_ids)
+
+    def _copy_unit_property_columns(self, sorting, unit_ids, sorting_unit_ids):
+        # copies all the properties of 'sorting_unit_ids' in 'sorting' to 'unit_ids', one column at a time
+        self._validate_unit_ids(unit_ids)
+        property_names = sorting._get_units_property_names(sorting_unit_ids)
+        if len(self._properties) == 0:
+            # share the columns of the source sorting instead of copying them
+            table = sorting._take_units_property_table(sorting_unit_ids, unit_ids, property_names)
+            if table is not None:
+                self._properties = table
+                return
+        unit_ids = np.array(unit_ids)
+        for property_name in property_names:
+            values, mask = sorting._get_units_property_column(property_name, sorting_unit_ids)
+            self._properties.set_values(property_name, list(unit_ids[mask]), values[mask])
 
     def clear_unit_property(self, unit_id, property_name):
         """This function clears the unit property for the given property.
@@ -565,9 +852,7 @@ class SortingExtractor(ABC, BaseExtractor):
         property_name: string
             The name of the property to be cleared
         """
-        if unit_id in self._properties.keys():
-            if property_name in self._properties[unit_id]:
-                del self._properties[unit_id][property_name]
+        self._properties.clear_values(property_name, [unit_id])
 
     def clear_units_property(self, property_name, unit_ids=None):
         """This function clears the units' properties for the given property.
@@ -581,8 +866,7 @@ class SortingExtractor(ABC, BaseExtractor):
         """
         if unit_ids is None:
             unit_ids = self.get_unit_ids()
-        for unit_id in unit_ids:
-            self.clear_unit_property(unit_id, property_name)
+        self._properties.clear_values(property_name, unit_ids)
 
     def copy_unit_spike_features(self, sorting, unit_ids=None):
         """Copy unit spike features from another sorting extractor to the current
@@ -596,26 +880,51 @@ class SortingExtractor(ABC, BaseExtractor):
             The list (or single value) of unit_ids for which the spike features will be copied
         """
         if unit_ids is None:
-            self._features = deepcopy(sorting._features)
+            # columnar features are copied as a single array, the others unit by unit
+            columns = {feature_name: column for feature_name, column in sorting._feature_columns.items()
+                       if sorting._get_feature_column(feature_name, column['unit_ids']) is not None}
+            self._features = {}
+            for unit_id, features in sorting._features.items():
+                self._features[unit_id] = {feature_name: deepcopy(value) for feature_name, value in features.items()
+                                           if feature_name not in columns
+                                           or unit_id not in columns[feature_name]['unit_ids']}
+            self._feature_columns = {}
+            for feature_name, column in columns.items():
+                self.set_units_spike_features(feature_name, deepcopy(column['values']), unit_ids=column['unit_ids'])
+            # features that are not stored in memory (e.g. loaded on access) are copied through the getter
+            for unit_id in sorting.get_unit_ids():
+                feature_names = [feature_name for feature_name in sorting.get_unit_spike_feature_names(unit_id)
+                                 if feature_name not in self._features.get(unit_id, {}).keys()]
+                self._copy_unit_spike_features(sorting, unit_id, feature_names)
         else:
             if isinstance(unit_ids, int):
                 unit_ids = [unit_ids]
+            column_names = [feature_name for feature_name in sorting._feature_columns
+                            if sorting._get_feature_column(feature_name, unit_ids) is not None]
+            for feature_name in column_names:
+                values, _ = sorting.get_units_spike_features_array(feature_name, unit_ids=unit_ids)
+                self.set_units_spike_features(feature_name, deepcopy(values), unit_ids=unit_ids)
             for unit_id in unit_ids:
-                curr_feature_names = sorting.get_unit_spike_feature_names(unit_id=unit_id)
-                for curr_feature_name in curr_feature_names:
-                    value = sorting.get_unit_spike_features(unit_id=unit_id, feature_name=curr_feature_name)
-                    if len(value) < len(sorting.get_unit_spike_train(unit_id)):
-                        if not curr_feature_name.endswith('idxs'):
-                            assert curr_feature_name + '_idxs' in \
-                                   sorting.get_unit_spike_feature_names(unit_id=unit_id)
-                            curr_feature_name_idxs = curr_feature_name + '_idxs'
-                            value_idxs = np.array(sorting.get_unit_spike_features(unit_id=unit_id,
-                                                                                  feature_name=curr_feature_name_idxs))
-                            # find index of first spike
-                            self.set_unit_spike_features(unit_id=unit_id, feature_name=curr_feature_name,
-                                                         value=value, indexes=value_idxs)
-                    else:
-                        self.set_unit_spike_features(unit_id=unit_id, feature_name=curr_feature_name, value=value)
+                curr_feature_names = [feature_name for feature_name in
+                                      sorting.get_unit_spike_feature_names(unit_id=unit_id)
+                                      if feature_name not in column_names]
+                self._copy_unit_spike_features(sorting, unit_id, curr_feature_names)
+
+    def _copy_unit_spike_features(self, sorting, unit_id, feature_names):
+        for curr_feature_name in feature_names:
+            value = sorting.get_unit_spike_features(unit_id=unit_id, feature_name=curr_feature_name)
+            if len(value) < sorting.get_unit_spike_train_info(unit_id)['num_spikes']:
+                if not curr_feature_name.endswith('idxs'):
+                    assert curr_feature_name + '_idxs' in \
+                           sorting.get_unit_spike_feature_names(unit_id=unit_id)
+                    curr_feature_name_idxs = curr_feature_name + '_idxs'
+                    value_idxs = np.array(sorting.get_unit_spike_features(unit_id=unit_id,
+                                                                          feature_name=curr_feature_name_idxs))
+                    # find index of first spike
+                    self.set_unit_spike_features(unit_id=unit_id, feature_name=curr_feature_name,
+                                                 value=value, indexes=value_idxs)
+            else:
+                self.set_unit_spike_features(unit_id=unit_id, feature_name=curr_feature_name, value=value)
 
     def get_epoch(self, epoch_name):
         """This function returns a SubSortingExtractor which is a view to the given epoch.
@@ -710,3 +1019,4 @@ class SortingExtractor(ABC, BaseExtractor):
         """
 
         raise NotImplementedError
+
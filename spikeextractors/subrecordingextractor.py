@@ -1,4 +1,6 @@
 from .recordingextractor import RecordingExtractor
+from .multirecordingchannelextractor import MultiRecordingChannelExtractor
+from .multirecordingtimeextractor import MultiRecordingTimeExtractor
 from .extraction_tools import check_get_traces_args, cast_start_end_frame, check_get_ttl_args
 import numpy as np
 
@@ -28,6 +30,8 @@ class SubRecordingExtractor(RecordingExtractor):
 
         for i in range(len(self._channel_ids)):
             self._original_channel_id_lookup[self._renamed_channel_ids[i]] = self._channel_ids[i]
+        self._source_recording, self._source_start_frame, self._source_channel_id_lookup = \
+            self._resolve_source()
         RecordingExtractor.__init__(self)
         self.copy_channel_properties(parent_recording, channel_ids=self._renamed_channel_ids)
 
@@ -42,12 +46,42 @@ class SubRecordingExtractor(RecordingExtractor):
         self._kwargs = {'parent_recording': parent_recording.make_serialized_dict(), 'channel_ids': channel_ids,
                         'renamed_channel_ids': renamed_channel_ids, 'start_frame': start_frame, 'end_frame': end_frame}
 
+    def _resolve_source(self):
+        # Compose nested views into a single view over the deepest recording that can serve the traces directly:
+        # sub-recordings are collapsed into their own source, and multi-recordings are bypassed when all the
+        # channels (or the whole frame range) of this view belong to one of their recordings.
+        # Only extractors using the stock get_traces are traversed, so that subclasses overriding it are respected.
+        source = self._parent_recording
+        start_frame = self._start_frame
+        num_frames = self._end_frame - self._start_frame
+        lookup = dict(self._original_channel_id_lookup)
+        while True:
+            if type(source).get_traces is SubRecordingExtractor.get_traces:
+                start_frame += source._source_start_frame
+                lookup = {ch: source._source_channel_id_lookup[orig_ch] for ch, orig_ch in lookup.items()}
+                source = source._source_recording
+            elif type(source).get_traces is MultiRecordingChannelExtractor.get_traces and len(lookup) > 0:
+                r_idxs = np.unique([source._channel_map[orig_ch]['recording'] for orig_ch in lookup.values()])
+                if len(r_idxs) > 1:
+                    break
+                lookup = {ch: source._channel_map[orig_ch]['channel_id'] for ch, orig_ch in lookup.items()}
+                source = source._recordings[r_idxs[0]]
+            elif type(source).get_traces is MultiRecordingTimeExtractor.get_traces and num_frames > 0:
+                i_sec = source._find_sections_for_frames(np.array([start_frame]))[0]
+                if start_frame + num_frames > source._end_frames[i_sec]:
+                    break
+                start_frame -= source._start_frames[i_sec]
+                source = source._recordings[i_sec]
+            else:
+                break
+        return source, start_frame, lookup
+
     @check_get_traces_args
     def get_traces(self, channel_ids=None, start_frame=None, end_frame=None, return_scaled=True):
-        sf = self._start_frame + start_frame
-        ef = self._start_frame + end_frame
-        original_ch_ids = self.get_original_channel_ids(channel_ids)
-        return self._parent_recording.get_traces(channel_ids=original_ch_ids, start_frame=sf, end_frame=ef,
+        sf = self._source_start_frame + start_frame
+        ef = self._source_start_frame + end_frame
+        source_ch_ids = [self._source_channel_id_lookup[ch] for ch in channel_ids]
+        return self._source_recording.get_traces(channel_ids=source_ch_ids, start_frame=sf, end_frame=ef,
                                                  return_scaled=return_scaled)
 
     @check_get_ttl_args
@@ -123,21 +157,15 @@ class SubRecordingExtractor(RecordingExtractor):
             self.set_channel_gains(gains=gains, channel_ids=channel_ids)
             self.set_channel_offsets(offsets=offsets, channel_ids=channel_ids)
 
-            # copy normal properties
-            for channel_id in channel_ids:
-                recording_ch_id = channel_id
-                if recording is self._parent_recording:
-                    recording_ch_id = self.get_original_channel_ids(channel_id)
-                curr_property_names = recording.get_channel_property_names(channel_id=recording_ch_id)
-                for curr_property_name in curr_property_names:
-                    if curr_property_name not in self._key_properties.keys():  # key property
-                        value = recording.get_channel_property(channel_id=recording_ch_id,
-                                                               property_name=curr_property_name)
-                        self.set_channel_property(channel_id=channel_id, property_name=curr_property_name, value=value)
+            # copy normal properties column by column
+            recording_ch_ids = channel_ids
+            if recording is self._parent_recording:
+                recording_ch_ids = original_channel_ids
+            self._copy_channel_property_columns(recording, channel_ids, recording_ch_ids)
 
     def get_original_channel_ids(self, channel_ids):
         if isinstance(channel_ids, (int, np.integer)):
-            if channel_ids in self.get_channel_ids():
+            if channel_ids in self._original_channel_id_lookup:
                 original_ch_ids = self._original_channel_id_lookup[channel_ids]
             else:
                 raise ValueError("Non-valid channel_id")
@@ -145,7 +173,7 @@ class SubRecordingExtractor(RecordingExtractor):
             original_ch_ids = []
             for channel_id in channel_ids:
                 if isinstance(channel_id, (int, np.integer)):
-                    if channel_id in self.get_channel_ids():
+                    if channel_id in self._original_channel_id_lookup:
                         original_ch_id = self._original_channel_id_lookup[channel_id]
                         original_ch_ids.append(original_ch_id)
                     else:
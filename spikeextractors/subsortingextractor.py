@@ -1,4 +1,5 @@
 from .sortingextractor import SortingExtractor
+from .multisortingextractor import MultiSortingExtractor
 import numpy as np
 from .extraction_tools import check_get_unit_spike_train
 
@@ -24,6 +25,8 @@ class SubSortingExtractor(SortingExtractor):
         self._original_unit_id_lookup = {}
         for i in range(len(self._unit_ids)):
             self._original_unit_id_lookup[self._renamed_unit_ids[i]] = self._unit_ids[i]
+        self._source_unit_lookup = {unit_id: self._resolve_source(original_unit_id)
+                                    for unit_id, original_unit_id in self._original_unit_id_lookup.items()}
         self.copy_unit_properties(parent_sorting, unit_ids=self._renamed_unit_ids)
         self.copy_unit_spike_features(parent_sorting, unit_ids=self._renamed_unit_ids, start_frame=start_frame,
                                       end_frame=end_frame)
@@ -33,23 +36,59 @@ class SubSortingExtractor(SortingExtractor):
     def get_unit_ids(self):
         return list(self._renamed_unit_ids)
 
+    def _resolve_source(self, original_unit_id):
+        # Compose nested views into a single (sorting, unit_id, start_frame, end_frame) view over the deepest
+        # sorting that can serve the spike train directly: sub-sortings are collapsed into their own source and
+        # multi-sortings are bypassed. Only extractors using the stock get_unit_spike_train are traversed.
+        source = self._parent_sorting
+        source_unit_id = original_unit_id
+        start_frame = self._start_frame
+        end_frame = self._end_frame
+        while True:
+            if type(source).get_unit_spike_train is SubSortingExtractor.get_unit_spike_train:
+                source, source_unit_id, parent_start_frame, parent_end_frame = \
+                    source._source_unit_lookup[source_unit_id]
+                end_frame = min(parent_start_frame + end_frame, parent_end_frame)
+                start_frame = parent_start_frame + start_frame
+            elif type(source).get_unit_spike_train is MultiSortingExtractor.get_unit_spike_train:
+                unit_map = source._unit_map[source_unit_id]
+                source = source._sortings[unit_map['sorting_id']]
+                source_unit_id = unit_map['unit_id']
+            else:
+                break
+        return source, source_unit_id, start_frame, end_frame
+
     @check_get_unit_spike_train
     def get_unit_spike_train(self, unit_id, start_frame=None, end_frame=None):
-        original_unit_id = self._original_unit_id_lookup[unit_id]
-        sf = self._start_frame + start_frame
-        ef = self._start_frame + end_frame
-        if sf < self._start_frame:
-            sf = self._start_frame
-        if ef > self._end_frame:
-            ef = self._end_frame
+        source, source_unit_id, source_start_frame, source_end_frame = self._source_unit_lookup[unit_id]
+        sf = source_start_frame + start_frame
+        ef = source_start_frame + end_frame
+        if sf < source_start_frame:
+            sf = source_start_frame
+        if ef > source_end_frame:
+            ef = source_end_frame
         if ef == np.Inf:
             ef = None
-        return self._parent_sorting.get_unit_spike_train(unit_id=original_unit_id, start_frame=sf,
-                                                         end_frame=ef) - self._start_frame
+        return source.get_unit_spike_train(unit_id=source_unit_id, start_frame=sf,
+                                           end_frame=ef) - source_start_frame
 
     def get_sampling_frequency(self):
         return self._parent_sorting.get_sampling_frequency()
 
+    def _compute_unit_spike_train_info(self, unit_ids):
+        info = {}
+        full_unit_ids = []
+        for unit_id in unit_ids:
+            source, source_unit_id, source_start_frame, source_end_frame = self._source_unit_lookup[unit_id]
+            if source_start_frame == 0 and source_end_frame == np.Inf:
+                # unit-only view: the spike train is the one of the source sorting
+                info[unit_id] = source.get_unit_spike_train_info(source_unit_id)
+            else:
+                full_unit_ids.append(unit_id)
+        if len(full_unit_ids) > 0:
+            info.update(SortingExtractor._compute_unit_spike_train_info(self, full_unit_ids))
+        return info
+
     def frame_to_time(self, frame):
         frame2 = frame + self._start_frame
         time1 = self._parent_sorting.frame_to_time(frame2)
@@ -74,14 +113,10 @@ class SubSortingExtractor(SortingExtractor):
                 value = sorting.get_unit_property(unit_id=sorting_unit_id, property_name=curr_property_name)
                 self.set_unit_property(unit_id=unit_ids, property_name=curr_property_name, value=value)
         else:
-            for unit_id in unit_ids:
-                sorting_unit_id = unit_id
-                if sorting is self._parent_sorting:
-                    sorting_unit_id = self.get_original_unit_ids(unit_id)
-                curr_property_names = sorting.get_unit_property_names(unit_id=sorting_unit_id)
-                for curr_property_name in curr_property_names:
-                    value = sorting.get_unit_property(unit_id=sorting_unit_id, property_name=curr_property_name)
-                    self.set_unit_property(unit_id=unit_id, property_name=curr_property_name, value=value)
+            sorting_unit_ids = unit_ids
+            if sorting is self._parent_sorting:
+                sorting_unit_ids = self.get_original_unit_ids(unit_ids)
+            self._copy_unit_property_columns(sorting, unit_ids, sorting_unit_ids)
 
     def copy_unit_spike_features(self, sorting, unit_ids=None, start_frame=None, end_frame=None):
         start_frame, end_frame = self._cast_start_end_frame(start_frame, end_frame)
@@ -89,16 +124,30 @@ class SubSortingExtractor(SortingExtractor):
             unit_ids = self.get_unit_ids()
         if isinstance(unit_ids, int):
             unit_ids = [unit_ids]
-        for unit_id in unit_ids:
-            sorting_unit_id = unit_id
-            if sorting is self._parent_sorting:
-                sorting_unit_id = self.get_original_unit_ids(unit_id)
-            curr_feature_names = sorting.get_unit_spike_feature_names(unit_id=sorting_unit_id)
+        sorting_unit_ids = list(unit_ids)
+        if sorting is self._parent_sorting:
+            sorting_unit_ids = [self._original_unit_id_lookup[unit_id] for unit_id in unit_ids]
+        column_names = []
+        if start_frame is None and end_frame is None:
+            # columnar features of the parent are shared without copying
+            column_names = [feature_name for feature_name in sorting._feature_columns
+                            if sorting._get_feature_column(feature_name, sorting_unit_ids) is not None]
+            for feature_name in column_names:
+                values, _ = sorting.get_units_spike_features_array(feature_name, unit_ids=sorting_unit_ids)
+                self.set_units_spike_features(feature_name, values, unit_ids=unit_ids)
+        for unit_id, sorting_unit_id in zip(unit_ids, sorting_unit_ids):
+            curr_feature_names = [feature_name for feature_name in
+                                  sorting.get_unit_spike_feature_names(unit_id=sorting_unit_id)
+                                  if feature_name not in column_names]
+            if len(curr_feature_names) == 0:
+                continue
+            num_spikes = len(sorting.get_unit_spike_train(sorting_unit_id, start_frame=start_frame,
+                                                          end_frame=end_frame))
+            n_discarded = None
             for curr_feature_name in curr_feature_names:
                 value = sorting.get_unit_spike_features(unit_id=sorting_unit_id, feature_name=curr_feature_name,
                                                         start_frame=start_frame, end_frame=end_frame)
-                if len(value) < len(sorting.get_unit_spike_train(sorting_unit_id, start_frame=start_frame,
-                                                                 end_frame=end_frame)):
+                if len(value) < num_spikes:
                     if not curr_feature_name.endswith('idxs'):
                         assert curr_feature_name + '_idxs' in \
                                sorting.get_unit_spike_feature_names(unit_id=sorting_unit_id)
@@ -109,11 +158,10 @@ class SubSortingExtractor(SortingExtractor):
                                                                               end_frame=end_frame))
                         # find index of first spike
                         if start_frame is not None:
-                            discarded_spikes_idxs = np.where(sorting.get_unit_spike_train(sorting_unit_id) <
-                                                             start_frame)
-                            if len(discarded_spikes_idxs) > 0:
-                                n_discarded = len(discarded_spikes_idxs[0])
-                                value_idxs = value_idxs - n_discarded
+                            if n_discarded is None:
+                                n_discarded = int(np.sum(sorting.get_unit_spike_train(sorting_unit_id) <
+                                                         start_frame))
+                            value_idxs = value_idxs - n_discarded
                         self.set_unit_spike_features(unit_id=unit_id, feature_name=curr_feature_name,
                                                      value=value,
                                                      indexes=value_idxs)
@@ -122,7 +170,7 @@ class SubSortingExtractor(SortingExtractor):
 
     def get_original_unit_ids(self, unit_ids):
         if isinstance(unit_ids, (int, np.integer)):
-            if unit_ids in self.get_unit_ids():
+            if unit_ids in self._original_unit_id_lookup:
                 original_unit_ids = self._original_unit_id_lookup[unit_ids]
             else:
                 raise ValueError("Non-valid unit_id")
@@ -130,7 +178,7 @@ class SubSortingExtractor(SortingExtractor):
             original_unit_ids = []
             for unit_id in unit_ids:
                 if isinstance(unit_id, (int, np.integer)):
-                    if unit_id in self.get_unit_ids():
+                    if unit_id in self._original_unit_id_lookup:
                         original_unit_id = self._original_unit_id_lookup[unit_id]
                         original_unit_ids.append(original_unit_id)
                     else:
@@ -7,6 +7,7 @@ import numpy as np
 
 from .extraction_tools import load_extractor_from_pickle, load_extractor_from_dict, \
     load_extractor_from_json
+from .baseextractor import HAVE_PICKLE5
 
 
 def check_recordings_equal(RX1, RX2, return_scaled=True, force_dtype=None, check_times=True):
@@ -93,6 +94,13 @@ def check_sortings_equal(SX1, SX2):
         train1 = np.sort(SX1.get_unit_spike_train(id))
         train2 = np.sort(SX2.get_unit_spike_train(id))
         assert np.array_equal(train1, train2)
+        # spike train info
+        info1 = SX1.get_unit_spike_train_info(id)
+        assert info1 == SX2.get_unit_spike_train_info(id)
+        assert info1['num_spikes'] == len(train1)
+        if len(train1) > 0:
+            assert info1['first_frame'] == train1[0] and info1['last_frame'] == train1[-1]
+    assert np.array_equal(SX1.get_unit_spike_counts(list(ids1)), SX2.get_unit_spike_counts(list(ids1)))
 
 
 def check_sorting_properties_features(SX1, SX2):
@@ -170,6 +178,19 @@ def check_dumping(extractor):
         check_sortings_equal(extractor, extractor_loaded)
         check_sorting_properties_features(extractor, extractor_loaded)
 
+    # with out-of-band arrays
+    if HAVE_PICKLE5:
+        extractor.dump_to_pickle(file_path='test_dumping/test_buffers.pkl', out_of_band=True)
+        extractor_loaded = load_extractor_from_pickle('test_dumping/test_buffers.pkl')
+
+        if 'Recording' in str(type(extractor)):
+            check_recordings_equal(extractor, extractor_loaded)
+            check_recording_properties(extractor, extractor_loaded)
+        elif 'Sorting' in str(type(extractor)):
+            check_sortings_equal(extractor, extractor_loaded)
+            check_sorting_properties_features(extractor, extractor_loaded)
+        del extractor_loaded
+
     shutil.rmtree('test_dumping')
     if Path('spikeinterface_recording.json').is_file():
         os.remove('spikeinterface_recording.json')
@@ -1,7 +1,11 @@
 import os
+import pickle
 import shutil
+import subprocess
+import sys
 import tempfile
 import unittest
+from copy import deepcopy
 from pathlib import Path
 
 import numpy as np
@@ -109,6 +113,31 @@ class TestExtractors(unittest.TestCase):
 
         return (RX, RX2, RX3, SX, SX2, SX3, example_info)
 
+    def _write_spikeglx_imec_file(self, bin_file, traces, sync, first_sample=0):
+        # writes a minimal SpikeGLX imec ap file (with sync channel) and its meta file
+        bin_file = Path(bin_file)
+        bin_file.parent.mkdir(parents=True, exist_ok=True)
+        num_channels = traces.shape[0]
+        data = np.vstack((traces, sync.view('int16'))).astype('int16')
+        data.T.tofile(bin_file)
+        chan_map = ''.join(f'(AP{ch};{ch}:{ch})' for ch in range(num_channels))
+        shank_map = ''.join(f'(0:{ch % 2}:{ch // 2}:1)' for ch in range(num_channels))
+        imro = ''.join(f'({ch} 0 0 500 250 1)' for ch in range(num_channels))
+        meta = [
+            'typeThis=imec',
+            'imSampRate=30000',
+            f'nSavedChans={num_channels + 1}',
+            f'snsApLfSy={num_channels},0,1',
+            'snsSaveChanSubset=all',
+            f'fileSizeBytes={data.nbytes}',
+            f'firstSample={first_sample}',
+            'imAiRangeMax=0.6',
+            f'~imroTbl=(0,{num_channels}){imro}',
+            f'~snsChanMap=({num_channels},0,1){chan_map}(SY0;{num_channels}:{num_channels})',
+            f'~snsShankMap=(1,2,480){shank_map}',
+        ]
+        bin_file.with_suffix('.meta').write_text('\n'.join(meta) + '\n')
+
     def test_example(self):
         self.assertEqual(self.RX.get_channel_ids(), self.example_info['channel_ids'])
         self.assertEqual(self.RX.get_num_channels(), self.example_info['num_channels'])
@@ -137,6 +166,10 @@ class TestExtractors(unittest.TestCase):
                                        self.example_info['features3'][:1]))
         self.assertTrue(np.array_equal(self.SX3.get_unit_spike_features(0, 'dummy', start_frame=20, end_frame=46),
                                        self.example_info['features3'][1:6]))
+        self.assertTrue(np.shares_memory(self.SX3.get_unit_spike_features(0, 'dummy', start_frame=20, end_frame=46),
+                                         self.SX3.get_unit_spike_features(0, 'dummy')))
+        features_list = self.SX3.get_units_spike_features('dummy', unit_ids=[0], start_frame=20, end_frame=46)
+        self.assertTrue(np.array_equal(features_list[0], self.example_info['features3'][1:6]))
         self.assertTrue('dummy2' in self.SX3.get_unit_spike_feature_names(0))
         self.assertTrue('dummy2_idxs' in self.SX3.get_unit_spike_feature_names(0))
 
@@ -182,6 +215,64 @@ class TestExtractors(unittest.TestCase):
         self.assertTrue('location' in self.RX3.get_shared_channel_property_names())
         check_recording_return_types(self.RX)
 
+    def test_columnar_spike_features(self):
+        num_spikes = self.SX.get_unit_spike_counts()
+        amplitudes = np.arange(np.sum(num_spikes))
+        self.SX.set_units_spike_features('amplitudes', amplitudes)
+        offsets = np.concatenate(([0], np.cumsum(num_spikes)))
+        for i, unit_id in enumerate(self.SX.get_unit_ids()):
+            self.assertTrue(np.array_equal(self.SX.get_unit_spike_features(unit_id, 'amplitudes'),
+                                           amplitudes[offsets[i]:offsets[i + 1]]))
+        values, offsets_array = self.SX.get_units_spike_features_array('amplitudes')
+        self.assertTrue(values is amplitudes)
+        self.assertTrue(np.array_equal(offsets, offsets_array))
+
+        # replacing the features of one unit invalidates the column
+        self.SX.set_unit_spike_features(1, 'amplitudes', np.zeros(num_spikes[0]))
+        values, _ = self.SX.get_units_spike_features_array('amplitudes')
+        self.assertFalse(values is amplitudes)
+        self.assertTrue(np.array_equal(values[num_spikes[0]:], amplitudes[num_spikes[0]:]))
+
+        self.SX.set_units_spike_features('amplitudes', amplitudes)
+        self.SX.clear_unit_spike_features(2, 'amplitudes')
+        self.assertRaises(ValueError, self.SX.get_units_spike_features_array, 'amplitudes')
+
+        # copied columns are copied as a single array
+        self.SX.set_units_spike_features('amplitudes', amplitudes)
+        SX_copy = se.NumpySortingExtractor()
+        for unit_id in self.SX.get_unit_ids():
+            SX_copy.add_unit(unit_id, self.SX.get_unit_spike_train(unit_id))
+        SX_copy.copy_unit_spike_features(self.SX)
+        values, offsets_array = SX_copy.get_units_spike_features_array('amplitudes')
+        self.assertFalse(values is amplitudes)
+        self.assertTrue(np.array_equal(values, amplitudes))
+        self.assertTrue(np.array_equal(offsets, offsets_array))
+        values[0] = -1
+        self.assertEqual(self.SX.get_unit_spike_features(1, 'amplitudes')[0], amplitudes[0])
+        self.assertNotEqual(amplitudes[0], -1)
+        SX_copy.copy_unit_spike_features(self.SX, unit_ids=[1, 2, 3])
+        values, _ = SX_copy.get_units_spike_features_array('amplitudes')
+        self.assertFalse(np.shares_memory(values, amplitudes))
+
+        # setting features on some spikes invalidates the column of their indexes
+        self.SX.set_units_spike_features('amplitudes_idxs', np.arange(np.sum(num_spikes)))
+        self.SX.set_unit_spike_features(1, 'amplitudes', np.ones(2), indexes=[0, 1])
+        self.assertTrue(np.array_equal(self.SX.get_unit_spike_features(1, 'amplitudes_idxs'), [0, 1]))
+        values, offsets_array = self.SX.get_units_spike_features_array('amplitudes_idxs', unit_ids=[2, 3])
+        self.assertEqual(len(values), offsets_array[-1])
+        self.assertRaises(ValueError, self.SX.get_units_spike_features_array, 'amplitudes_idxs')
+        self.assertRaises(ValueError, self.SX.set_units_spike_features, 'amplitudes', amplitudes, unit_ids=[1, 2, 9])
+        self.SX.clear_units_spike_features('amplitudes_idxs')
+        self.SX.set_units_spike_features('amplitudes', amplitudes)
+
+        SX_sub = se.SubSortingExtractor(self.SX, unit_ids=[1, 2, 3], renamed_unit_ids=[4, 5, 6])
+        values, _ = SX_sub.get_units_spike_features_array('amplitudes')
+        self.assertTrue(values is amplitudes)
+        SX_sub_partial = se.SubSortingExtractor(self.SX, start_frame=100, end_frame=5000)
+        values, offsets_array = SX_sub_partial.get_units_spike_features_array('amplitudes')
+        self.assertTrue(np.array_equal(offsets_array[1:], np.cumsum(SX_sub_partial.get_unit_spike_counts())))
+        self.assertRaises(ValueError, self.SX3.get_units_spike_features_array, 'dummy2')
+
     def test_allocate_arrays(self):
         shape = (30, 1000)
         dtype = 'int16'
@@ -267,6 +358,48 @@ class TestExtractors(unittest.TestCase):
         os.remove('cache_sort.npz')
         os.remove('cache_sort2.npz')
 
+    @unittest.skipIf(not se.SharedMemoryRecordingExtractor.installed, "requires python >= 3.8")
+    def test_shared_memory_extractor(self):
+        shm_rec = se.SharedMemoryRecordingExtractor(self.RX, chunk_size=3000)
+        check_recording_return_types(shm_rec)
+        check_recordings_equal(self.RX, shm_rec)
+        check_dumping(shm_rec)
+
+        # parallel workers attach to the shared memory block
+        path1 = Path(self.test_dir) / 'shm.dat'
+        shm_rec.write_to_binary_dat_format(path1, dtype=shm_rec.get_dtype(), n_jobs=2, chunk_size=2000)
+        RX_dat = se.BinDatRecordingExtractor(path1, sampling_frequency=shm_rec.get_sampling_frequency(),
+                                             numchan=shm_rec.get_num_channels(), dtype=shm_rec.get_dtype())
+        check_recordings_equal(self.RX, RX_dat)
+
+        # traces returned to callers are copies and the shared block is read-only
+        traces = shm_rec.get_traces()
+        traces[:] = 0
+        check_recordings_equal(self.RX, shm_rec)
+        with self.assertRaises(ValueError):
+            shm_rec._traces[0, 0] = 0
+
+        shm_name = shm_rec.shared_memory_name
+        shm_rec_loaded = se.load_extractor_from_dict(shm_rec.dump_to_dict())
+        del shm_rec
+        check_recordings_equal(self.RX, shm_rec_loaded)
+        self.assertFalse(shm_rec_loaded._traces.flags.writeable)
+        shm_rec_loaded.close()
+
+        # an extractor attached to a block owned elsewhere can be closed while views of its traces are alive
+        from spikeextractors.sharedmemoryextractors import _shared_memory_owners
+        shm_rec = se.SharedMemoryRecordingExtractor(self.RX)
+        _shared_memory_owners.pop(shm_rec.shared_memory_name)
+        shm_rec_attached = se.load_extractor_from_dict(shm_rec.dump_to_dict())
+        self.assertIsNone(shm_rec_attached._owner)
+        traces_view = shm_rec_attached._traces[:, :10]
+        shm_rec_attached.close()
+        self.assertTrue(np.array_equal(traces_view, self.RX.get_traces(end_frame=10)))
+        del traces_view, shm_rec_attached, shm_rec
+        with self.assertRaises(FileNotFoundError):
+            se.SharedMemoryRecordingExtractor(shared_memory_name=shm_name, channel_ids=[0], num_frames=1,
+                                              sampling_frequency=1, dtype='float32')
+
     def test_not_dumpable_exception(self):
         try:
             self.RX.dump_to_json()
@@ -292,6 +425,24 @@ class TestExtractors(unittest.TestCase):
         check_dumping(RX_mda)
         check_dumping(SX_mda)
 
+        # traces are views on a memmap opened once
+        traces = RX_mda.get_traces(channel_ids=[1, 2], start_frame=10, end_frame=100)
+        self.assertIsInstance(traces.base, np.memmap)
+        self.assertTrue(np.array_equal(RX_mda.get_traces(channel_ids=[3, 0]), self.RX.get_traces(channel_ids=[3, 0])))
+        RX_mda.write_to_binary_dat_format(path1 + '/raw.dat', time_axis=0)
+        RX_mda.write_to_binary_dat_format(path1 + '/raw_t.dat', time_axis=1, dtype='float32')
+        raw = np.memmap(path1 + '/raw.dat', dtype=RX_mda.get_dtype(), mode='r').reshape(-1, 4)
+        self.assertTrue(np.array_equal(raw.T, self.RX.get_traces()))
+        raw_t = np.memmap(path1 + '/raw_t.dat', dtype='float32', mode='r').reshape(4, -1)
+        self.assertTrue(np.array_equal(raw_t, self.RX.get_traces()))
+        del raw, raw_t
+
+        # npy mode
+        se.MdaRecordingExtractor.write_recording(self.RX, path1, raw_fname='raw.npy')
+        RX_npy = se.MdaRecordingExtractor(path1, raw_fname='raw.npy')
+        check_recordings_equal(self.RX, RX_npy)
+        check_dumping(RX_npy)
+
     def test_hdsort_extractor(self):
         path = self.test_dir + '/results_test_hdsort_extractor.mat'
         locations = np.ones((10, 2))
@@ -323,6 +474,266 @@ class TestExtractors(unittest.TestCase):
         check_recordings_equal(self.RX, RX_biocam)
         check_dumping(RX_biocam)
 
+        path2 = self.test_dir + '/raw_compressed.brw'
+        se.BiocamRecordingExtractor.write_recording(self.RX, path2, dtype='int16', chunk_size=1000,
+                                                    compression='gzip', dataset_chunk_frames=300)
+        RX_biocam_compressed = se.BiocamRecordingExtractor(path2)
+        self.assertEqual(RX_biocam_compressed.get_dtype(), np.dtype('int16'))
+        check_recordings_equal(self.RX, RX_biocam_compressed)
+        self.assertTrue(np.array_equal(RX_biocam_compressed.get_traces(channel_ids=[3, 1], start_frame=250,
+                                                                       end_frame=2750),
+                                       self.RX.get_traces(channel_ids=[3, 1], start_frame=250, end_frame=2750)))
+
+    @staticmethod
+    def _write_maxone_file(file_path, framenos, channels, electrodes, spikes=None):
+        # writes a MaxOne file in the legacy (20160704) format, with the frame numbers in the last two signal rows
+        import h5py
+        signals = np.zeros((len(channels) + 2, len(framenos)), dtype='uint16')
+        signals[:len(channels)] = np.random.RandomState(seed=0).randint(0, 1000, (len(channels), len(framenos)))
+        signals[-2] = framenos & 0xffff
+        signals[-1] = framenos >> 16
+        mapping = np.zeros(len(channels), dtype=[('channel', 'i4'), ('electrode', 'i4'), ('x', 'f8'), ('y', 'f8')])
+        mapping['channel'] = channels
+        mapping['electrode'] = electrodes
+        mapping['x'] = np.arange(len(channels)) * 17.5
+        with h5py.File(file_path, 'w') as f:
+            f.create_dataset('version', data=np.array([b'20160704']))
+            f.create_dataset('mapping', data=mapping)
+            f.create_dataset('settings/lsb', data=np.array([1e-6]))
+            f.create_dataset('sig', data=signals)
+            if spikes is not None:
+                f.create_dataset('proc0/spikeTimes', data=spikes)
+
+    def test_maxone_missing_frames(self):
+        num_channels = 4
+        num_frames = 1000
+        # frames 300 and 700 are preceded by gaps of 4 and 9 missing frames
+        framenos = np.arange(num_frames) + 1000
+        framenos[300:] += 4
+        framenos[700:] += 9
+        path1 = self.test_dir + '/maxone.raw.h5'
+        self._write_maxone_file(path1, framenos, np.arange(num_channels), np.arange(num_channels) + 100)
+
+        RX_max = se.MaxOneRecordingExtractor(path1)
+        RX_max.correct_for_missing_frames(chunk_size=300)
+        fs = RX_max.get_sampling_frequency()
+        times = (framenos - framenos[0]) / fs
+        self.assertTrue(np.allclose(RX_max.frame_to_time(np.arange(num_frames)), times))
+        self.assertTrue(np.array_equal(RX_max.time_to_frame(times), np.arange(num_frames)))
+        # times in a gap are mapped to the first frame after the gap
+        self.assertEqual(RX_max.time_to_frame(times[299] + 2 / fs), 300)
+
+        # the corrected times are kept when copying times and when dumping
+        RX_copy = se.NumpyRecordingExtractor(timeseries=RX_max.get_traces(), sampling_frequency=fs)
+        RX_copy.copy_times(RX_max)
+        self.assertTrue(np.allclose(RX_copy.frame_to_time(np.arange(num_frames)), times))
+        RX_multi = se.MultiRecordingChannelExtractor([RX_max, RX_max])
+        self.assertTrue(np.allclose(RX_multi.frame_to_time(np.arange(num_frames)), times))
+        RX_loaded = se.load_extractor_from_dict(RX_max.dump_to_dict())
+        self.assertTrue(np.allclose(RX_loaded.frame_to_time(np.arange(num_frames)), times))
+        RX_max.dump_to_pickle(self.test_dir + '/maxone.pkl')
+        RX_loaded = se.load_extractor_from_pickle(self.test_dir + '/maxone.pkl')
+        self.assertTrue(np.allclose(RX_loaded.frame_to_time(np.arange(num_frames)), times))
+        del RX_max, RX_loaded
+
+    def test_maxone_spikes(self):
+        num_frames = 2000
+        first_frame = 1000
+        framenos = np.arange(num_frames) + first_frame
+        # channel 4 is not routed (electrode -1) and channel 9 is not in the mapping
+        channels = np.array([3, 0, 2, 1, 4])
+        electrodes = np.array([100, 101, 102, 103, -1])
+        rng = np.random.RandomState(seed=0)
+        num_spikes = 300
+        spikes = np.zeros(num_spikes, dtype=[('frameno', 'i8'), ('channel', 'i4'), ('amplitude', 'f4')])
+        spikes['frameno'] = rng.randint(first_frame - 200, first_frame + num_frames, num_spikes)
+        spikes['channel'] = rng.choice([0, 1, 3, 4, 9], num_spikes)  # no spikes on channel 2
+        spikes['amplitude'] = rng.uniform(-100, 0, num_spikes)
+        spikes['frameno'][spikes['channel'] == 1] = first_frame - 1  # spikes of channel 1 precede the recording
+        path1 = self.test_dir + '/maxone_spikes.raw.h5'
+        self._write_maxone_file(path1, framenos, channels, electrodes, spikes)
+
+        # expected values, computed channel by channel
+        routed_channels = [3, 0, 2, 1]
+        duration = num_frames / 20000.
+        expected_rates = [np.sum(spikes['channel'] == ch) / duration for ch in routed_channels]
+        expected_amplitudes = [np.median(spikes['amplitude'][spikes['channel'] == ch])
+                               if np.any(spikes['channel'] == ch) else 0 for ch in routed_channels]
+        expected_unit_ids = [ch for ch in routed_channels if np.any(spikes['channel'] == ch)]
+
+        RX_max = se.MaxOneRecordingExtractor(path1)
+        self.assertEqual(RX_max.get_channel_ids(), routed_channels)
+        self.assertTrue(np.allclose(RX_max.get_channel_properties('spike_rate'), expected_rates))
+        self.assertTrue(np.allclose(RX_max.get_channel_properties('spike_amplitude'), expected_amplitudes))
+        self.assertEqual(RX_max.get_channel_property(2, 'spike_rate'), 0)
+        self.assertTrue(np.array_equal(RX_max.get_channel_properties('electrode'), [100, 101, 102, 103]))
+        self.assertTrue(np.array_equal(RX_max.get_channel_locations()[:, 0], [0, 17.5, 35, 52.5]))
+
+        SX_max = se.MaxOneSortingExtractor(path1)
+        self.assertEqual(SX_max.get_unit_ids(), expected_unit_ids)
+        for unit_id in expected_unit_ids:
+            spike_idxs = np.nonzero(spikes['channel'] == unit_id)[0]
+            spike_train = spikes['frameno'][spike_idxs] - first_frame
+            valid = spike_train >= 0
+            self.assertTrue(np.array_equal(SX_max.get_unit_spike_train(unit_id), spike_train[valid]))
+            self.assertTrue(np.array_equal(SX_max.get_unit_spike_features(unit_id, 'amplitude'),
+                                           spikes['amplitude'][spike_idxs][valid]))
+        self.assertEqual(len(SX_max.get_unit_spike_train(1)), 0)
+        del RX_max, SX_max
+
+    def test_mcsh5_recording(self):
+        import h5py
+        import warnings
+        num_channels = 6
+        num_frames = 60000
+        rng = np.random.RandomState(seed=0)
+        info = np.zeros(num_channels, dtype=[('ChannelID', 'i4'), ('Label', 'S4'), ('Unit', 'S2'), ('Tick', 'i8'),
+                                             ('Exponent', 'i4'), ('ConversionFactor', 'i8')])
+        info['ChannelID'] = [12, 7, 3, 25, 8, 1]
+        info['Label'] = [b'E' + str(ch).encode() for ch in info['ChannelID']]
+        info['Unit'] = b'V'
+        info['Tick'] = 40  # us, i.e. 25 kHz
+        info['Exponent'] = -12
+        info['ConversionFactor'] = 59605
+        all_signals = []
+        path1 = self.test_dir + '/mcs.h5'
+        with h5py.File(path1, 'w') as f:
+            for stream_id in range(2):
+                stream = f.create_group('/Data/Recording_0/AnalogStream/Stream_' + str(stream_id))
+                signals = rng.randint(-1000, 1000, (num_channels, num_frames)).astype('int32')
+                stream.create_dataset('ChannelData', data=signals, chunks=(2, 15000), compression='gzip')
+                stream.create_dataset('ChannelDataTimeStamps', data=np.array([[0, 0, num_frames - 1]]))
+                stream.create_dataset('InfoChannel', data=info)
+                all_signals.append(signals)
+
+        channel_ids = [25, 12, 1, 1]
+        channel_idxs = [3, 0, 5, 5]
+        conv = 59605 * 1e-12
+        for read_ahead_frames in [None, 12000]:
+            with warnings.catch_warnings():
+                # the chunk cache can only be set if openMCSH5File did not keep the dataset open
+                warnings.simplefilter('error', UserWarning)
+                RX_mcs = se.MCSH5RecordingExtractor(path1, read_ahead_frames=read_ahead_frames)
+            self.assertEqual(RX_mcs.get_channel_ids(), [12, 7, 3, 25, 8, 1])
+            self.assertEqual(RX_mcs.get_num_frames(), num_frames)
+            self.assertAlmostEqual(RX_mcs.get_sampling_frequency(), 25000)
+            for stream_id in [0, 1]:
+                RX_mcs.set_stream_id(stream_id)
+                # 4 time chunks of the 3 chunks along the channels
+                self.assertEqual(RX_mcs._reader._dataset.id.get_access_plist().get_chunk_cache()[1],
+                                 12 * 2 * 15000 * 4)
+                signals = all_signals[stream_id]
+                for start_frame in range(0, num_frames, 7000):
+                    end_frame = min(start_frame + 7000, num_frames)
+                    traces = RX_mcs.get_traces(channel_ids=channel_ids, start_frame=start_frame, end_frame=end_frame)
+                    self.assertTrue(np.allclose(traces, signals[channel_idxs, start_frame:end_frame] * conv))
+                self.assertTrue(np.allclose(RX_mcs.get_traces(start_frame=59990), signals[:, 59990:] * conv))
+            del RX_mcs
+
+    def test_spikeglx_ttl_index(self):
+        from spikeextractors.extractors.spikeglxrecordingextractor.readSGLX import ExtractDigital
+        from spikeextractors.extractors.spikeglxrecordingextractor.spikeglxrecordingextractor import \
+            _compute_ttl_index, _get_digital_channel
+
+        def ttl_events_reference(recording, start_frame, end_frame, line):
+            # TTL events extracted from the unpacked bits of the requested range
+            dig = np.squeeze(ExtractDigital(recording._raw, firstSamp=start_frame, lastSamp=end_frame, dwReq=0,
+                                            dLineList=[line], meta=recording._meta))
+            diff_dig = np.diff(dig.astype(int))
+            rising = np.where(diff_dig > 0)[0] + start_frame
+            falling = np.where(diff_dig < 0)[0] + start_frame
+            ttl_frames = np.concatenate((rising, falling))
+            ttl_states = np.array([1] * len(rising) + [-1] * len(falling))
+            sort_idxs = np.argsort(ttl_frames)
+            return ttl_frames[sort_idxs], ttl_states[sort_idxs]
+
+        num_frames = 5000
+        traces = np.random.RandomState(seed=0).randint(-100, 100, (4, num_frames))
+        sync = np.random.RandomState(seed=1).randint(0, 2 ** 16, num_frames // 50).astype('uint16').repeat(50)
+        # edges at chunk boundaries
+        sync[999] ^= 1
+        sync[1000] ^= 3
+        bin_file = Path(self.test_dir) / 'spikeglx' / 'run_g0_t0.imec0.ap.bin'
+        self._write_spikeglx_imec_file(bin_file, traces, sync)
+
+        RX_sglx = se.SpikeGLXRecordingExtractor(bin_file)
+        self.assertTrue(np.array_equal(RX_sglx.get_traces(return_scaled=False), traces))
+        full_index = _compute_ttl_index(RX_sglx._raw, _get_digital_channel(RX_sglx._meta), num_frames)
+        for chunk_size in [1000, 333, 1]:
+            chunk_index = _compute_ttl_index(RX_sglx._raw, _get_digital_channel(RX_sglx._meta), num_frames,
+                                             chunk_size=chunk_size)
+            for (frames, states), (chunk_frames, chunk_states) in zip(full_index, chunk_index):
+                self.assertTrue(np.array_equal(frames, chunk_frames))
+                self.assertTrue(np.array_equal(states, chunk_states))
+        for line in [0, 1, 7, 8, 15]:
+            for start_frame, end_frame in [(0, num_frames), (999, 1001), (1000, 4321), (17, 19)]:
+                ttl_frames, ttl_states = RX_sglx.get_ttl_events(start_frame=start_frame, end_frame=end_frame,
+                                                                channel_id=line)
+                ref_frames, ref_states = ttl_events_reference(RX_sglx, start_frame, end_frame, line)
+                self.assertTrue(np.array_equal(ttl_frames, ref_frames))
+                self.assertTrue(np.array_equal(ttl_states, ref_states))
+        index_file = bin_file.parent / 'run_g0_t0.imec0.ap.ttl_index.npz'
+        self.assertTrue(index_file.is_file())
+        del RX_sglx
+
+        # the sidecar index is recomputed when the binary file changes
+        sync = np.roll(sync, 25)
+        self._write_spikeglx_imec_file(bin_file, traces, sync)
+        stat = bin_file.stat()
+        os.utime(bin_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+        RX_sglx = se.SpikeGLXRecordingExtractor(bin_file)
+        for line in [0, 15]:
+            ttl_frames, ttl_states = RX_sglx.get_ttl_events(channel_id=line)
+            ref_frames, ref_states = ttl_events_reference(RX_sglx, 0, num_frames, line)
+            self.assertTrue(np.array_equal(ttl_frames, ref_frames))
+            self.assertTrue(np.array_equal(ttl_states, ref_states))
+        del RX_sglx
+
+    def test_spikeglx_multi_recording(self):
+        run_folder = Path(self.test_dir) / 'spikeglx_run'
+        rs = np.random.RandomState(seed=0)
+        num_frames = [1000, 500, 700]
+        first_samples = [0, 1000, 30000]
+        gates_triggers = [(0, 0), (0, 1), (1, 0)]
+        traces = [rs.randint(-100, 100, (4, n)) for n in num_frames]
+        for (gate, trigger), traces_i, first_sample in zip(gates_triggers, traces, first_samples):
+            probe_folder = run_folder / f'run_g{gate}' / f'run_g{gate}_imec0'
+            self._write_spikeglx_imec_file(probe_folder / f'run_g{gate}_t{trigger}.imec0.ap.bin', traces_i,
+                                           np.zeros(traces_i.shape[1], dtype='uint16'), first_sample=first_sample)
+        # files of other probes, runs, and folders are ignored
+        self._write_spikeglx_imec_file(run_folder / 'run_g0' / 'run_g0_imec1' / 'run_g0_t0.imec1.ap.bin', traces[0],
+                                       np.zeros(num_frames[0], dtype='uint16'))
+        self._write_spikeglx_imec_file(run_folder / 'run2_g0' / 'run2_g0_imec0' / 'run2_g0_t0.imec0.ap.bin',
+                                       traces[0], np.zeros(num_frames[0], dtype='uint16'))
+        self._write_spikeglx_imec_file(run_folder / 'backup' / 'run_g0' / 'run_g0_imec0' / 'run_g0_t0.imec0.ap.bin',
+                                       traces[0], np.zeros(num_frames[0], dtype='uint16'))
+
+        RX_sglx = se.SpikeGLXMultiRecordingExtractor(run_folder / 'run_g1' / 'run_g1_imec0' / 'run_g1_t0.imec0.ap.bin')
+        self.assertEqual(RX_sglx.file_paths,
+                         [run_folder / f'run_g{gate}' / f'run_g{gate}_imec0' / f'run_g{gate}_t{trigger}.imec0.ap.bin'
+                          for gate, trigger in gates_triggers])
+        self.assertEqual(RX_sglx.get_epoch_names(), ['g0_t0', 'g0_t1', 'g1_t0'])
+        self.assertEqual(RX_sglx.get_num_frames(), sum(num_frames))
+        all_traces = np.concatenate(traces, axis=1)
+        self.assertTrue(np.array_equal(RX_sglx.get_traces(return_scaled=False), all_traces))
+        self.assertTrue(np.array_equal(RX_sglx.get_traces(channel_ids=[1, 2], start_frame=900, end_frame=1600,
+                                                          return_scaled=False), all_traces[1:3, 900:1600]))
+
+        # the gap between the second and third file is kept in the time axis
+        fs = RX_sglx.get_sampling_frequency()
+        self.assertAlmostEqual(RX_sglx.frame_to_time(1500), 1.0)
+        self.assertEqual(RX_sglx.time_to_frame(1.0), 1500)
+        self.assertEqual(RX_sglx.time_to_frame(100 / fs), 100)
+        # times in the gap are mapped to the end frame of the previous file
+        self.assertEqual(RX_sglx.time_to_frame(0.5), 1500)
+        self.assertTrue(np.array_equal(RX_sglx.time_to_frame(np.array([100 / fs, 0.5, 1.0])), [100, 1500, 1500]))
+
+        # the same gate and trigger in two searched folders is ambiguous
+        self._write_spikeglx_imec_file(run_folder / 'run_g1' / 'run_g1_imec0' / 'run_g0_t1.imec0.ap.bin', traces[1],
+                                       np.zeros(num_frames[1], dtype='uint16'))
+        with self.assertRaises(ValueError):
+            se.SpikeGLXMultiRecordingExtractor(run_folder / 'run_g0' / 'run_g0_imec0' / 'run_g0_t0.imec0.ap.bin')
+
     def test_mearec_extractors(self):
         path1 = self.test_dir + '/raw.h5'
         se.MEArecRecordingExtractor.write_recording(self.RX, path1)
@@ -371,6 +782,65 @@ class TestExtractors(unittest.TestCase):
         check_sortings_equal(self.SX, SX_spy)
         check_dumping(SX_spy)
 
+    def test_phy_sorting_extractor(self):
+        phy_folder = Path(self.test_dir) / 'phy'
+        phy_folder.mkdir()
+        rng = np.random.RandomState(0)
+        num_spikes = 200
+        spike_times = rng.randint(0, 10000, num_spikes).astype('uint64')  # unsorted
+        spike_clusters = rng.choice([0, 2, 5], num_spikes).astype('int32')
+        amplitudes = rng.uniform(10, 20, num_spikes)
+        pc_features = rng.normal(0, 1, (num_spikes, 3, 4)).astype('float32')
+        np.save(phy_folder / 'spike_times.npy', spike_times[:, None])
+        np.save(phy_folder / 'spike_clusters.npy', spike_clusters)
+        np.save(phy_folder / 'amplitudes.npy', amplitudes[:, None])
+        np.save(phy_folder / 'pc_features.npy', pc_features)
+        with (phy_folder / 'params.py').open('w') as f:
+            f.write("dat_path = 'recording.dat'\nn_channels_dat = 4\ndtype = 'int16'\nsample_rate = 30000.\n")
+        with (phy_folder / 'cluster_group.tsv').open('w') as f:
+            f.write('cluster_id\tgroup\n0\tgood\n5\tnoise\n')
+
+        SX_phy = se.PhySortingExtractor(phy_folder)
+        self.assertEqual(SX_phy.get_unit_ids(), [0, 2, 5])
+        self.assertEqual(SX_phy.get_units_property(property_name='quality'), ['good', 'unsorted', 'noise'])
+        start_frame, end_frame = 2000, 7000
+        for unit_id in SX_phy.get_unit_ids():
+            spike_mask = spike_clusters == unit_id
+            self.assertTrue(np.array_equal(SX_phy.get_unit_spike_train(unit_id), spike_times[spike_mask]))
+            self.assertTrue(np.array_equal(SX_phy.get_unit_spike_features(unit_id, 'amplitudes'),
+                                           amplitudes[spike_mask]))
+            self.assertTrue(np.array_equal(SX_phy.get_unit_spike_features(unit_id, 'pc_features'),
+                                           pc_features[spike_mask]))
+            range_mask = spike_mask & (spike_times >= start_frame) & (spike_times < end_frame)
+            self.assertTrue(np.array_equal(SX_phy.get_unit_spike_train(unit_id, start_frame, end_frame),
+                                           spike_times[range_mask]))
+            self.assertTrue(np.array_equal(SX_phy.get_unit_spike_features(unit_id, 'amplitudes', start_frame,
+                                                                          end_frame), amplitudes[range_mask]))
+            self.assertTrue(np.array_equal(SX_phy.get_unit_spike_features(unit_id, 'pc_features', start_frame,
+                                                                          end_frame), pc_features[range_mask]))
+            info = SX_phy.get_unit_spike_train_info(unit_id)
+            self.assertEqual(info['num_spikes'], np.sum(spike_mask))
+            self.assertEqual(info['first_frame'], np.min(spike_times[spike_mask]))
+            self.assertEqual(info['last_frame'], np.max(spike_times[spike_mask]))
+        # features are kept memory-mapped
+        for feature_name in ['amplitudes', 'pc_features']:
+            features = SX_phy._spike_features[feature_name]
+            self.assertTrue(isinstance(features, np.memmap) or isinstance(features.base, np.memmap))
+        self.assertEqual(SX_phy.get_unit_spike_feature_names(0), ['amplitudes', 'pc_features'])
+
+        SX_phy_good = se.PhySortingExtractor(phy_folder, exclude_cluster_groups=['noise'])
+        self.assertEqual(SX_phy_good.get_unit_ids(), [0, 2])
+        self.assertTrue(np.array_equal(SX_phy_good.get_unit_spike_features(2, 'amplitudes'),
+                                       amplitudes[spike_clusters == 2]))
+
+        # without amplitudes.npy, amplitudes default to ones
+        (phy_folder / 'amplitudes.npy').unlink()
+        SX_phy_no_amplitudes = se.PhySortingExtractor(phy_folder)
+        self.assertTrue(np.array_equal(SX_phy_no_amplitudes.get_unit_spike_features(2, 'amplitudes', start_frame,
+                                                                                      end_frame),
+                                       np.ones(np.sum((spike_clusters == 2) & (spike_times >= start_frame) &
+                                                      (spike_times < end_frame)))))
+
     def test_multi_sub_recording_extractor(self):
         RX_multi = se.MultiRecordingTimeExtractor(
             recordings=[self.RX, self.RX, self.RX],
@@ -382,6 +852,16 @@ class TestExtractors(unittest.TestCase):
         check_recordings_equal(self.RX, RX_multi.recordings[1])
         check_recordings_equal(self.RX, RX_multi.recordings[2])
         self.assertEqual(4, len(RX_sub.get_channel_ids()))
+        frames = np.array([0, 10, self.RX.get_num_frames() + 5, 3 * self.RX.get_num_frames() - 1, 20])
+        times = RX_multi.frame_to_time(frames)
+        self.assertTrue(np.allclose(times, [RX_multi.frame_to_time(f) for f in frames]))
+        self.assertTrue(np.array_equal(RX_multi.time_to_frame(times), frames))
+        RX_multi_parallel = se.MultiRecordingTimeExtractor(recordings=[self.RX, self.RX, self.RX], n_jobs=2)
+        num_frames = self.RX.get_num_frames()
+        traces = RX_multi_parallel.get_traces(start_frame=10, end_frame=2 * num_frames + 20)
+        self.assertTrue(np.array_equal(traces, np.concatenate([self.RX.get_traces(start_frame=10),
+                                                               self.RX.get_traces(),
+                                                               self.RX.get_traces(end_frame=20)], axis=1)))
 
         RX_multi = se.MultiRecordingChannelExtractor(
             recordings=[self.RX, self.RX2, self.RX3],
@@ -424,6 +904,15 @@ class TestExtractors(unittest.TestCase):
         self.assertEqual(rx2.get_channel_property(0, "foo"), RX_multi_c.get_channel_property(4, "foo"))
         self.assertTrue(np.array_equal(rx3.get_channel_locations([0])[0], RX_multi_c.get_channel_locations([8])[0]))
 
+        # channels from different recordings in arbitrary order, read in parallel
+        RX_multi_c = se.MultiRecordingChannelExtractor(recordings=[rx1, rx2, rx3], n_jobs=2)
+        traces = RX_multi_c.get_traces(channel_ids=[9, 0, 5, 1, 11], start_frame=10, end_frame=100)
+        self.assertTrue(np.array_equal(traces[[1, 3]], rx1.get_traces(channel_ids=[0, 1], start_frame=10,
+                                                                      end_frame=100)))
+        self.assertTrue(np.array_equal(traces[2], rx2.get_traces(channel_ids=[1], start_frame=10, end_frame=100)[0]))
+        self.assertTrue(np.array_equal(traces[[0, 4]], rx3.get_traces(channel_ids=[1, 3], start_frame=10,
+                                                                      end_frame=100)))
+
     def test_ttl_frames_in_sub_multi(self):
         # sub recording
         start_frame = self.example_info['num_frames'] // 3
@@ -463,6 +952,158 @@ class TestExtractors(unittest.TestCase):
         check_sortings_equal(self.SX, SX_multi.sortings[0])
         check_sortings_equal(self.SX2, SX_multi.sortings[1])
 
+    def test_nested_sub_extractors(self):
+        N = self.RX.get_num_frames()
+        # nested sub-recordings over a multi-recording are read directly from the root recording
+        RX_multi = se.MultiRecordingTimeExtractor(recordings=[self.RX, self.RX3])
+        RX_sub = se.SubRecordingExtractor(RX_multi, channel_ids=[1, 2, 3], renamed_channel_ids=[10, 20, 30],
+                                          start_frame=N + 10, end_frame=N + 500)
+        RX_sub_sub = se.SubRecordingExtractor(RX_sub, channel_ids=[30, 10], start_frame=5, end_frame=400)
+        self.assertIs(RX_sub_sub._source_recording, self.RX3)
+        self.assertEqual(RX_sub_sub._source_start_frame, 15)
+        self.assertTrue(np.array_equal(RX_sub_sub.get_traces(start_frame=2, end_frame=100),
+                                       self.RX3.get_traces(channel_ids=[3, 1], start_frame=17, end_frame=115)))
+        RX_sub_span = se.SubRecordingExtractor(RX_multi, start_frame=N - 10, end_frame=N + 10)
+        self.assertIs(RX_sub_span._source_recording, RX_multi)
+        self.assertTrue(np.array_equal(RX_sub_span.get_traces(),
+                                       RX_multi.get_traces(start_frame=N - 10, end_frame=N + 10)))
+
+        # nested sub-sortings over a multi-sorting are read directly from the root sortings
+        SX_multi = se.MultiSortingExtractor(sortings=[self.SX, self.SX2])
+        SX_sub = se.SubSortingExtractor(SX_multi, start_frame=100, end_frame=N)
+        SX_sub_sub = se.SubSortingExtractor(SX_sub, unit_ids=[1, 5], renamed_unit_ids=[7, 8],
+                                            start_frame=50, end_frame=2000)
+        sorting, unit_id, start_frame, end_frame = SX_sub_sub._source_unit_lookup[8]
+        self.assertIs(sorting, self.SX2)
+        self.assertEqual((start_frame, end_frame), (150, 2100))
+        for sub_unit_id, multi_unit_id in zip([7, 8], [1, 5]):
+            spike_train = SX_multi.get_unit_spike_train(multi_unit_id, start_frame=150, end_frame=2100) - 150
+            self.assertTrue(np.array_equal(SX_sub_sub.get_unit_spike_train(sub_unit_id), spike_train))
+
+    def test_sub_extractors_by_property(self):
+        self.RX.set_channel_groups([1, 0, 1, 0])
+        self.RX.set_channels_property(property_name='shank', values=['b', 'a', 'b', 'a'])
+        self.assertEqual(self.RX.get_channels_property(channel_ids=[2, 1], property_name='shank'), ['b', 'a'])
+        RX_subs, groups = self.RX.get_sub_extractors_by_property('group', return_property_list=True)
+        self.assertTrue(np.array_equal(groups, [0, 1]))
+        self.assertEqual([RX_sub.get_channel_ids() for RX_sub in RX_subs], [[1, 3], [0, 2]])
+        self.assertEqual(RX_subs[1].get_channels_property(property_name='shank'), ['b', 'b'])
+        check_recordings_equal(se.SubRecordingExtractor(self.RX, channel_ids=[1, 3]), RX_subs[0])
+
+        SX_multi = se.MultiSortingExtractor(sortings=[self.SX, self.SX2])
+        unit_ids = SX_multi.get_unit_ids()
+        SX_multi.set_units_property(property_name='group', values=[unit_id % 2 for unit_id in unit_ids])
+        self.assertEqual(self.SX.get_units_property(property_name='group'), [unit_id % 2 for unit_id in unit_ids[:3]])
+        SX_subs = SX_multi.get_sub_extractors_by_property('group')
+        self.assertEqual(SX_subs[0].get_unit_ids(), [unit_id for unit_id in unit_ids if unit_id % 2 == 0])
+        self.assertEqual(SX_subs[1].get_units_property(property_name='group'), [1] * len(SX_subs[1].get_unit_ids()))
+
+    def test_columnar_properties(self):
+        self.RX.set_channel_properties('impedance', np.array([1., 2., 3., 4.]))
+        self.RX.set_channel_property(2, 'impedance', 5.)
+        self.RX.set_channel_property(3, 'name', 'ch3')
+        impedances = self.RX.get_channel_properties('impedance', channel_ids=[3, 2])
+        self.assertEqual(impedances.dtype, np.dtype('float64'))
+        self.assertTrue(np.array_equal(impedances, [4., 5.]))
+        self.assertIn('impedance', self.RX.get_shared_channel_property_names())
+        self.assertNotIn('name', self.RX.get_shared_channel_property_names())
+        self.assertIn('name', self.RX.get_channel_property_names(3))
+        self.RX.set_channel_property(1, 'impedance', 'high')
+        self.assertEqual(self.RX.get_channel_property(1, 'impedance'), 'high')
+        self.assertEqual(self.RX.get_channel_property(0, 'impedance'), 1.)
+        RX_sub = se.SubRecordingExtractor(self.RX, channel_ids=[3, 0], renamed_channel_ids=[0, 1])
+        self.assertEqual(RX_sub.get_channels_property(property_name='impedance'), [4., 1.])
+        self.assertIn('name', RX_sub.get_channel_property_names(0))
+        self.assertNotIn('name', RX_sub.get_channel_property_names(1))
+        self.RX.clear_channels_property('name')
+        self.assertNotIn('name', self.RX.get_channel_property_names(3))
+
+        self.SX.set_unit_properties('quality', np.array([0.5, 0.8, 0.9]))
+        self.SX.set_unit_property(1, 'label', 'good')
+        self.assertTrue(np.array_equal(self.SX.get_unit_properties('quality', unit_ids=[2, 3]), [0.8, 0.9]))
+        self.assertIn('quality', self.SX.get_shared_unit_property_names())
+        self.assertNotIn('label', self.SX.get_shared_unit_property_names())
+        with self.assertRaises(ValueError):
+            self.SX.get_unit_properties('label')
+        SX_multi = se.MultiSortingExtractor(sortings=[self.SX, self.SX])
+        self.assertTrue(np.array_equal(SX_multi.get_unit_properties('quality'), [0.5, 0.8, 0.9] * 2))
+        SX_sub = se.SubSortingExtractor(SX_multi, unit_ids=[0, 4])
+        self.assertIn('label', SX_sub.get_unit_property_names(0))
+        self.assertNotIn('label', SX_sub.get_unit_property_names(4))
+        self.assertTrue(np.array_equal(SX_sub.get_unit_properties('quality'), [0.5, 0.8]))
+
+    def test_shared_property_columns(self):
+        self.RX.set_channel_properties('impedance', np.array([1., 2., 3., 4.]))
+        self.RX.set_channel_property(1, 'name', 'ch1')
+        RX_sub = se.SubRecordingExtractor(self.RX, channel_ids=[3, 1], renamed_channel_ids=[0, 1])
+        self.assertIs(RX_sub._properties._columns['impedance'][0], self.RX._properties._columns['impedance'][0])
+        RX_sub_sub = se.SubRecordingExtractor(RX_sub, channel_ids=[1])
+        self.assertIs(RX_sub_sub._properties._columns['impedance'][0], self.RX._properties._columns['impedance'][0])
+        self.assertEqual(RX_sub_sub.get_channel_property(1, 'impedance'), 2.)
+        self.assertEqual(RX_sub_sub.get_channel_property(1, 'name'), 'ch1')
+        # writes to the parent or to a sub-extractor are not seen by the others
+        self.RX.set_channel_properties('impedance', np.array([10., 20.]), channel_ids=[3, 1])
+        RX_sub.set_channel_property(0, 'impedance', 30.)
+        self.assertTrue(np.array_equal(self.RX.get_channel_properties('impedance'), [1., 20., 3., 10.]))
+        self.assertTrue(np.array_equal(RX_sub.get_channel_properties('impedance'), [30., 2.]))
+        self.assertTrue(np.array_equal(RX_sub_sub.get_channel_properties('impedance'), [2.]))
+        RX_sub.clear_channel_property(1, 'name')
+        self.assertEqual(self.RX.get_channel_property(1, 'name'), 'ch1')
+        self.assertEqual(RX_sub_sub.get_channel_property(1, 'name'), 'ch1')
+        self.assertNotIn('name', RX_sub.get_channel_property_names(1))
+
+        self.SX.set_unit_properties('quality', np.array([0.5, 0.8, 0.9]))
+        SX_sub = se.SubSortingExtractor(self.SX, unit_ids=[3, 1])
+        self.assertIs(SX_sub._properties._columns['quality'][0], self.SX._properties._columns['quality'][0])
+        SX_sub.set_unit_property(1, 'label', 'new')
+        self.SX.set_unit_property(3, 'quality', 1.)
+        self.assertEqual(SX_sub.get_units_property(property_name='quality'), [0.9, 0.5])
+        self.assertEqual(SX_sub.get_unit_property(1, 'label'), 'new')
+        self.assertNotIn('label', self.SX.get_unit_property_names(1))
+
+    def test_property_round_trip(self):
+        self.RX.set_channel_properties('mixed', [1, 2, 3, 4])
+        self.RX.set_channel_property(0, 'mixed', 5.5)
+        self.RX.set_channel_property(1, 'mixed', True)
+        self.RX.set_channel_property(2, 'mixed', 'a')
+        values = self.RX.get_channels_property(property_name='mixed')
+        self.assertEqual(values, [5.5, True, 'a', 4])
+        self.assertEqual([type(value) for value in values], [float, bool, str, int])
+        self.RX.set_channel_properties('flags', [True, False, True, False])
+        self.RX.set_channel_property(3, 'flags', 1)
+        self.assertIs(type(self.RX.get_channel_property(0, 'flags')), bool)
+        self.assertIs(type(self.RX.get_channel_property(3, 'flags')), int)
+        self.RX.set_channel_properties('numbers', [1, 2.5, 3, 4])
+        self.assertEqual([type(value) for value in self.RX.get_channels_property(property_name='numbers')],
+                         [int, float, int, int])
+        self.RX.set_channel_properties('rate', np.array([1., 2., 3., 4.]))
+        self.RX.set_channel_property(1, 'rate', 5)
+        self.assertIs(type(self.RX.get_channel_property(1, 'rate')), int)
+        self.assertIs(type(self.RX.get_channel_property(0, 'rate')), float)
+        self.SX.set_unit_properties('name', ['a', 'b', 'c'])
+        self.SX.set_unit_property(2, 'name', 'longer')
+        self.assertEqual(self.SX.get_units_property(property_name='name'), ['a', 'longer', 'c'])
+        self.assertIs(type(self.SX.get_unit_property(1, 'name')), str)
+
+    def test_lazy_extractor_registry(self):
+        code = "import sys, spikeextractors as se; " \
+               "assert 'spikeextractors.extractors.nwbextractors' not in sys.modules; " \
+               "assert se.NwbRecordingExtractor.extractor_name == 'NwbRecording'; " \
+               "assert 'spikeextractors.extractors.nwbextractors' in sys.modules"
+        subprocess.run([sys.executable, '-c', code], check=True, cwd=str(Path(se.__file__).parents[1]))
+        self.assertIn(se.MdaRecordingExtractor, se.recording_extractor_full_list)
+        self.assertIs(se.sorting_extractor_dict['NpzSorting'], se.NpzSortingExtractor)
+        with self.assertRaises(AttributeError):
+            se.NotAnExtractor
+
+        namespace = {}
+        exec('from spikeextractors import *', namespace)
+        self.assertIs(namespace['MdaRecordingExtractor'], se.MdaRecordingExtractor)
+        self.assertIs(namespace['RecordingExtractor'], se.RecordingExtractor)
+        self.assertIs(namespace['load_extractor_from_pickle'], se.load_extractor_from_pickle)
+        self.assertIn(se.MdaSortingExtractor, namespace['sorting_extractor_full_list'])
+        self.assertIn(se.MdaRecordingExtractor, namespace['recording_extractor_full_list'])
+
     def test_dump_load_multi_sub_extractor(self):
         # generate dumpable formats
         path1 = self.test_dir + '/mda'
@@ -484,6 +1125,58 @@ class TestExtractors(unittest.TestCase):
         SX_multi = se.MultiSortingExtractor(sortings=[SX_mda, SX_mda, SX_mda])
         check_dumping(SX_multi)
 
+    def test_load_extractor_cache(self):
+        from spikeextractors.baseextractor import _extractor_cache
+
+        path1 = self.test_dir + '/mda'
+        se.MdaRecordingExtractor.write_recording(self.RX, path1)
+        RX_sub = se.SubRecordingExtractor(se.MdaRecordingExtractor(path1), channel_ids=[0, 1])
+        d = RX_sub.dump_to_dict()
+
+        RX_loaded = se.load_extractor_from_dict(d, use_cache=True)
+        self.assertIs(se.load_extractor_from_dict(deepcopy(d), use_cache=True), RX_loaded)
+        self.assertIsNot(se.load_extractor_from_dict(d), RX_loaded)
+        check_recordings_equal(RX_sub, RX_loaded)
+
+        max_size = _extractor_cache.max_size
+        try:
+            _extractor_cache.clear()
+            _extractor_cache.max_size = 1
+            RX_loaded = se.load_extractor_from_dict(d, use_cache=True)
+            se.load_extractor_from_dict(se.MdaRecordingExtractor(path1).dump_to_dict(), use_cache=True)
+            # evicted but still referenced
+            self.assertIs(se.load_extractor_from_dict(d, use_cache=True), RX_loaded)
+            se.load_extractor_from_dict(se.MdaRecordingExtractor(path1).dump_to_dict(), use_cache=True)
+            del RX_loaded
+            self.assertEqual(len(_extractor_cache), 1)
+        finally:
+            _extractor_cache.max_size = max_size
+            _extractor_cache.clear()
+
+    @unittest.skipIf(not se.baseextractor.HAVE_PICKLE5, "requires python >= 3.8 or pickle5")
+    def test_dump_to_pickle_out_of_band(self):
+        path1 = self.test_dir + '/mda'
+        se.MdaRecordingExtractor.write_recording(self.RX, path1)
+        RX_mda = se.MdaRecordingExtractor(path1)
+        templates = np.random.RandomState(seed=0).normal(0, 1, (RX_mda.get_num_channels(), 100, 2))
+        RX_mda.set_channel_properties('template', templates)
+        pkl_file = Path(self.test_dir) / 'rec.pkl'
+        RX_mda.dump_to_pickle(pkl_file, out_of_band=True)
+        self.assertTrue((Path(self.test_dir) / 'rec_buffers.bin').is_file())
+        self.assertLess(pkl_file.stat().st_size, templates.nbytes)
+
+        RX_loaded = se.load_extractor_from_pickle(pkl_file)
+        column = RX_loaded._properties.get_values('template', RX_loaded.get_channel_ids())[0]
+        self.assertTrue(np.array_equal(column, templates))
+        column_base = RX_loaded._properties._columns['template'][0]
+        while not isinstance(column_base, np.memmap) and column_base.base is not None:
+            column_base = column_base.base
+        self.assertIsInstance(column_base, np.memmap)
+        # loaded arrays are copy-on-write
+        RX_loaded.set_channel_properties('template', np.zeros_like(templates))
+        self.assertTrue(np.array_equal(se.load_extractor_from_pickle(pkl_file).get_channel_properties('template'),
+                                       templates))
+
     def test_nwb_extractor(self):
         path1 = self.test_dir + '/test.nwb'
         se.NwbRecordingExtractor.write_recording(self.RX, path1)
@@ -491,6 +1184,10 @@ class TestExtractors(unittest.TestCase):
         check_recording_return_types(RX_nwb)
         check_recordings_equal(self.RX, RX_nwb)
         check_dumping(RX_nwb)
+        self.assertTrue(np.array_equal(RX_nwb.get_traces(channel_ids=[3, 1, 1], start_frame=10, end_frame=20),
+                                       self.RX.get_traces(channel_ids=[3, 1, 1], start_frame=10, end_frame=20)))
+        # the open file handle is re-opened by unpickled copies
+        check_recordings_equal(self.RX, pickle.loads(pickle.dumps(RX_nwb)))
 
         del RX_nwb
         se.NwbRecordingExtractor.write_recording(recording=self.RX, save_path=path1, overwrite=True)
@@ -547,6 +1244,26 @@ class TestExtractors(unittest.TestCase):
         check_sortings_equal(self.SX2, SX_nwb)
         check_dumping(SX_nwb)
 
+        # Test compressed spike times and features
+        se.NwbRecordingExtractor.write_recording(recording=self.RX, save_path=path1, overwrite=True)
+        se.NwbSortingExtractor.write_sorting(sorting=self.SX2, save_path=path1, use_times=False, compression='gzip')
+        SX_nwb = se.NwbSortingExtractor(path1)
+        check_sortings_equal(self.SX2, SX_nwb)
+        self.assertTrue(np.array_equal(SX_nwb.get_unit_properties('shared_unit_prop'), [0, 1, 2]))
+        self.assertEqual(SX_nwb.get_unit_property(4, 'stability'), 80)
+        self.assertNotIn('stability', SX_nwb.get_unit_property_names(3))
+
+        # spike train info of unsorted spike trains and inclusive start_frame
+        for unit_id in self.SX2.get_unit_ids():
+            spike_train = SX_nwb.get_unit_spike_train(unit_id)
+            info = SX_nwb.get_unit_spike_train_info(unit_id)
+            self.assertEqual(info['first_frame'], np.min(spike_train))
+            self.assertEqual(info['last_frame'], np.max(spike_train))
+            self.assertTrue(np.array_equal(
+                SX_nwb.get_unit_spike_train(unit_id, start_frame=info['first_frame'], end_frame=info['last_frame']),
+                spike_train[(spike_train >= info['first_frame']) & (spike_train < info['last_frame'])]))
+            self.assertIn(info['first_frame'], SX_nwb.get_unit_spike_train(unit_id, start_frame=info['first_frame']))
+
         # Test writting multiple recordings using metadata
         metadata = get_default_nwbfile_metadata()
         path_nwb = self.test_dir + '/test_multiple.nwb'
@@ -697,6 +1414,60 @@ class TestExtractors(unittest.TestCase):
         check_sortings_equal(SX_multisorting, SX_neuroscope_mse)
         check_dumping(SX_neuroscope_mse)
 
+        # Tests for the binary cache of the parsed .res.%i and .clu.%i files
+        SX_neuroscope_mse_cached = se.NeuroscopeMultiSortingExtractor(nscope_dir, cache_binary=True)
+        self.assertTrue(len(list(nscope_dir.glob('*.res.*.npz'))) > 0)
+        SX_neuroscope_mse_cached = se.NeuroscopeMultiSortingExtractor(nscope_dir, cache_binary=True)
+        check_sortings_equal(SX_multisorting, SX_neuroscope_mse_cached)
+        check_dumping(SX_neuroscope_mse_cached)
+
+    def test_neuroscope_lazy_waveforms(self):
+        from spikeextractors.extractors.neuroscopeextractors.neuroscopeextractors import read_int_text_file
+
+        nscope_dir = Path(self.test_dir) / 'neuroscope_spk'
+        nscope_dir.mkdir()
+        rng = np.random.RandomState(0)
+        n_spikes, n_samples, n_channels = 50, 8, 3
+        res = np.sort(rng.randint(0, 10000, n_spikes))
+        clu = rng.choice([1, 2, 3], n_spikes)
+        waveforms = rng.randint(-1000, 1000, (n_spikes, n_samples, n_channels)).astype('int16')
+        np.savetxt(nscope_dir / 'sorting.res', res, fmt='%i')
+        np.savetxt(nscope_dir / 'sorting.clu', np.concatenate(([3], clu)), fmt='%i')
+        waveforms.tofile(str(nscope_dir / 'sorting.spk'))
+        with (nscope_dir / 'sorting.xml').open('w') as f:
+            f.write('<xml><acquisitionSystem><nBits>16</nBits><samplingRate>20000</samplingRate></acquisitionSystem>'
+                    '<neuroscope><spikes><nSamples>8</nSamples></spikes></neuroscope></xml>')
+
+        SX_neuroscope = se.NeuroscopeSortingExtractor(folder_path=nscope_dir, spkfile_path=nscope_dir / 'sorting.spk')
+        self.assertEqual(SX_neuroscope.get_unit_ids(), [1, 2, 3])
+        start_frame, end_frame = 2000, 7000
+        for unit_id in SX_neuroscope.get_unit_ids():
+            spike_mask = clu == unit_id
+            self.assertIn('waveforms', SX_neuroscope.get_unit_spike_feature_names(unit_id))
+            self.assertTrue(np.array_equal(SX_neuroscope.get_unit_spike_train(unit_id), res[spike_mask]))
+            unit_waveforms = SX_neuroscope.get_unit_spike_features(unit_id, 'waveforms')
+            self.assertEqual(unit_waveforms.shape, (np.sum(spike_mask), n_channels, n_samples))
+            self.assertTrue(np.array_equal(unit_waveforms, np.moveaxis(waveforms[spike_mask], 1, -1)))
+            range_mask = spike_mask & (res >= start_frame) & (res < end_frame)
+            self.assertTrue(np.array_equal(SX_neuroscope.get_unit_spike_features(unit_id, 'waveforms',
+                                                                                 start_frame, end_frame),
+                                           np.moveaxis(waveforms[range_mask], 1, -1)))
+
+        # malformed text files fail instead of being truncated
+        bad_res_file = nscope_dir / 'bad.res'
+        with bad_res_file.open('w') as f:
+            f.write('10\n20\n3x0\n40\n')
+        self.assertRaises(ValueError, read_int_text_file, bad_res_file)
+
+        # the binary cache is discarded when the size of the text file changes, even with the same mtime
+        res_file = nscope_dir / 'sorting.res'
+        self.assertTrue(np.array_equal(read_int_text_file(res_file, cache_binary=True), res))
+        self.assertTrue((nscope_dir / 'sorting.res.npz').is_file())
+        mtime_ns = res_file.stat().st_mtime_ns
+        np.savetxt(res_file, res[:-1], fmt='%i')
+        os.utime(res_file, ns=(mtime_ns, mtime_ns))
+        self.assertTrue(np.array_equal(read_int_text_file(res_file, cache_binary=True), res[:-1]))
+
     def test_cell_explorer_extractor(self):
         sorter_id = "cell_explorer_sorter"
         cell_explorer_dir = Path(self.test_dir) / sorter_id
@@ -60,6 +60,30 @@ class TestNumpyExtractors(unittest.TestCase):
         st = self.SX.get_unit_spike_train(unit_id=1)
         self.assertTrue(np.allclose(st, self._train1))
 
+    def test_spike_features_in_range(self):
+        # sorted times on and around half frames, unsorted times
+        times_list = [np.array([0.5, 1.5, 2.5, 2.5, 3.4, 3.5, 4.5, 7, 7.6, 10.5]), np.arange(0, 1000, 3),
+                      np.random.RandomState(seed=0).uniform(0, 100, 50)]
+        for times in times_list:
+            SX = se.NumpySortingExtractor()
+            SX.add_unit(unit_id=0, times=times)
+            features = np.arange(len(times))
+            SX.set_unit_spike_features(0, 'feature', features)
+            frames = np.rint(times)
+            for start_frame, end_frame in [(1, 4), (2, 5), (3, 8), (0, 11), (4, None), (None, 8), (8, 8)]:
+                start = 0 if start_frame is None else start_frame
+                end = np.inf if end_frame is None else end_frame
+                expected = features[(frames >= start) & (frames < end)]
+                self.assertTrue(np.array_equal(SX.get_unit_spike_features(0, 'feature', start_frame, end_frame),
+                                               expected))
+                self.assertTrue(np.array_equal(SX.get_units_spike_features('feature', [0], start_frame,
+                                                                           end_frame)[0], expected))
+
+        # the cached sortedness is cleared when the unit is replaced
+        SX.add_unit(unit_id=0, times=times_list[1])
+        SX.set_unit_spike_features(0, 'feature', np.arange(len(times_list[1])))
+        self.assertTrue(np.array_equal(SX.get_unit_spike_features(0, 'feature', 30, 60), np.arange(10, 20)))
+
 
 if __name__ == '__main__':
     unittest.main()
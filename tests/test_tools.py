@@ -109,6 +109,45 @@ class TestTools(unittest.TestCase):
         assert np.allclose(data, self.RX.get_traces())
         del data  # this close the file
 
+        # time_axis=0 chunk_mb=1 n_jobs=2 use_cache=True
+        self.RX.write_to_binary_dat_format(self.test_dir / 'rec.dat', time_axis=0,
+                                           dtype='float32', chunk_mb=1, n_jobs=2, use_cache=True)
+        data = np.memmap(self.test_dir / 'rec.dat', dtype='float32', mode='r', shape=(nb_sample, nb_chan)).T
+        assert np.allclose(data, self.RX.get_traces())
+        del data  # this close the file
+
+    def test_h5_traces_reader(self):
+        import h5py
+        from spikeextractors.extraction_tools import open_h5_dataset_with_chunk_cache, H5TracesReader
+
+        with h5py.File(self.test_dir / 'rec.h5', 'w') as f:
+            f.create_dataset('traces', data=self._X.T, chunks=(512, 8))
+        with h5py.File(self.test_dir / 'rec.h5', 'r') as f:
+            dataset = open_h5_dataset_with_chunk_cache(f, 'traces', time_axis=0)
+            self.assertGreaterEqual(dataset.id.get_access_plist().get_chunk_cache()[1], 4 * 4 * 512 * 8 * 8)
+            channel_idxs = [5, 3, 3, 20]
+            for read_ahead_frames in [None, 1000]:
+                reader = H5TracesReader(dataset, time_axis=0, read_ahead_frames=read_ahead_frames)
+                for start_frame in range(0, 3000, 300):
+                    traces = reader.read(channel_idxs, start_frame, start_frame + 300)
+                    assert np.array_equal(traces, self._X[channel_idxs, start_frame:start_frame + 300])
+                assert np.array_equal(reader.read(range(32), 9990, 10000), self._X[:, 9990:10000])
+
+            # the cache of an already open dataset cannot be set
+            with self.assertWarns(UserWarning):
+                open_h5_dataset_with_chunk_cache(f, 'traces', time_axis=0, num_time_chunks=16)
+
+        # concurrent reads in read-ahead mode
+        from concurrent.futures import ThreadPoolExecutor
+        with h5py.File(self.test_dir / 'rec.h5', 'r') as f:
+            reader = H5TracesReader(open_h5_dataset_with_chunk_cache(f, 'traces', time_axis=0), time_axis=0,
+                                    read_ahead_frames=500)
+            start_frames = np.random.RandomState(seed=0).randint(0, 9700, 200)
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                all_traces = list(executor.map(lambda s: reader.read(channel_idxs, s, s + 300), start_frames))
+            for start_frame, traces in zip(start_frames, all_traces):
+                assert np.array_equal(traces, self._X[channel_idxs, start_frame:start_frame + 300])
+
 
 if __name__ == '__main__':
     unittest.main()